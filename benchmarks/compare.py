@@ -0,0 +1,89 @@
+"""
+Compare two benchmark result files written by benchmarks.run, e.g.
+
+    python -m benchmarks.compare baseline.json results.json --threshold 0.1
+
+Exits with status 1 if any median latency got slower by more than the threshold.
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+from typing import Any, Optional, Tuple
+
+ResultKey = Tuple[str, str, str, str]
+
+
+def result_key(result: dict[str, Any]) -> tuple[str, str, str]:
+    return (
+        result["workload"],
+        json.dumps(result["params"], sort_keys=True),
+        result["mode"],
+    )
+
+
+def index_results(report: dict[str, Any]) -> dict[ResultKey, dict[str, Any]]:
+    """map each (workload, params, mode, operation) to its stats"""
+    return {
+        (*result_key(result), operation): stats
+        for result in report["results"]
+        for operation, stats in result["operations"].items()
+    }
+
+
+def compare_reports(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float
+) -> tuple[list[str], bool]:
+    """
+    Return a line comparing each benchmark found in both reports,
+    and whether any median latency regressed by more than the threshold
+    """
+    baseline_results = index_results(baseline)
+    current_results = index_results(current)
+    lines = [
+        f"{'workload':<18}{'mode':<21}{'operation':<11}{'base ms':>10}{'new ms':>10}"
+        f"{'change':>9}{'nodes':>16}"
+    ]
+    regressed = False
+    for key, stats in current_results.items():
+        base_stats = baseline_results.get(key)
+        if base_stats is None:
+            continue
+        workload, _params, mode, operation = key
+        base_median = base_stats["latency"]["median_s"]
+        median = stats["latency"]["median_s"]
+        change = median / base_median - 1 if base_median > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            regressed = True
+            flag = "  REGRESSED"
+        nodes = f"{base_stats['nodes_expanded']}->{stats['nodes_expanded']}"
+        lines.append(
+            f"{workload:<18}{mode:<21}{operation:<11}{base_median * 1000:>10.3f}"
+            f"{median * 1000:>10.3f}{change:>+9.1%}{nodes:>16}{flag}"
+        )
+    return lines, regressed
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="the relative slowdown in median latency which counts as a regression",
+    )
+    args = parser.parse_args(argv)
+    with open(args.baseline) as baseline_file, open(args.current) as current_file:
+        lines, regressed = compare_reports(
+            json.load(baseline_file), json.load(current_file), args.threshold
+        )
+    print("\n".join(lines))
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
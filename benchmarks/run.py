@@ -0,0 +1,254 @@
+"""
+Run the benchmark workloads and write the results as JSON, e.g.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --quick --workloads family_tree fan_out
+    python -m benchmarks.run --set fan_out.width=5 --mode binding_store
+
+Compare two result files with benchmarks.compare.
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+import numpy as np
+
+import fuzzy_reasoner
+from fuzzy_reasoner.prover.SLDProver import SLDProver
+from fuzzy_reasoner.prover.SearchStats import SearchStats
+from fuzzy_reasoner.types.Atom import Atom
+
+from benchmarks.workloads import GENERATORS, QUICK_PARAMS, Workload
+
+RESULTS_VERSION = 1
+
+# extra SLDProver settings for each search mode
+MODES: dict[str, dict[str, Any]] = {
+    "default": {},
+    "tabling": {"tabling": True},
+    "binding_store": {"binding_store": True},
+    "iterative_deepening": {"iterative_deepening": True},
+    "similarity_graph": {"similarity_graph": True},
+    "int8_embeddings": {"embedding_storage": "int8"},
+}
+
+# runs a proof of the goal with the given hooks, returning the number of proofs found
+Operation = Callable[[SLDProver, Atom, Optional[SearchStats]], int]
+
+
+def summarize_latencies(latencies: list[float]) -> dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "mean_s": statistics.mean(ordered),
+        "median_s": statistics.median(ordered),
+        "min_s": ordered[0],
+        "max_s": ordered[-1],
+        "p95_s": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+    }
+
+
+def measure_operation(
+    prover: SLDProver,
+    goals: list[Atom],
+    operation: Operation,
+    repeat: int,
+) -> dict[str, Any]:
+    """
+    Time the operation on every goal, then run it once more without timing to collect
+    SearchStats and the peak memory the proofs allocate
+    """
+    latencies = []
+    for _ in range(repeat):
+        for goal in goals:
+            start = time.perf_counter()
+            operation(prover, goal, None)
+            latencies.append(time.perf_counter() - start)
+    total_time = sum(latencies)
+
+    stats = SearchStats()
+    tracemalloc.start()
+    num_proofs = sum(operation(prover, goal, stats) for goal in goals)
+    _current, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "latency": summarize_latencies(latencies),
+        "throughput_goals_per_s": len(latencies) / total_time
+        if total_time > 0
+        else None,
+        "nodes_expanded": stats.goals_expanded,
+        "peak_memory_bytes": peak_memory,
+        "num_proofs": num_proofs,
+        "search_stats": stats.as_dict(),
+    }
+
+
+def prove_operation(prover: SLDProver, goal: Atom, stats: Optional[SearchStats]) -> int:
+    return 1 if prover.prove(goal, hooks=stats) is not None else 0
+
+
+def prove_all_operation(
+    prover: SLDProver, goal: Atom, stats: Optional[SearchStats]
+) -> int:
+    return len(prover.prove_all(goal, hooks=stats))
+
+
+OPERATIONS: dict[str, Operation] = {
+    "prove": prove_operation,
+    "prove_all": prove_all_operation,
+}
+
+
+def run_workload(
+    workload: Workload, mode: str, operations: list[str], repeat: int
+) -> dict[str, Any]:
+    settings = {**workload.prover_settings, **MODES[mode]}
+    tracemalloc.start()
+    start = time.perf_counter()
+    prover = SLDProver(knowledge=workload.knowledge, **settings)
+    build_time = time.perf_counter() - start
+    _current, build_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "workload": workload.name,
+        "params": workload.params,
+        "mode": mode,
+        "num_rules": len(workload.knowledge),
+        "num_goals": len(workload.goals),
+        "build_s": build_time,
+        "build_peak_memory_bytes": build_memory,
+        "operations": {
+            name: measure_operation(prover, workload.goals, OPERATIONS[name], repeat)
+            for name in operations
+        },
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info() -> dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "fuzzy_reasoner_version": fuzzy_reasoner.__version__,
+        "python_version": platform.python_version(),
+        "numpy_version": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def parse_param_overrides(overrides: list[str]) -> dict[str, dict[str, Any]]:
+    """parse overrides like fan_out.width=5 into parameters per workload"""
+    params: dict[str, dict[str, Any]] = {}
+    for override in overrides:
+        key, _, value = override.partition("=")
+        workload, _, param = key.partition(".")
+        if workload not in GENERATORS or not param or not value:
+            raise ValueError(f"Invalid parameter override: {override}")
+        params.setdefault(workload, {})[param] = json.loads(value)
+    return params
+
+
+def run_benchmarks(
+    workloads: list[str],
+    modes: list[str],
+    operations: list[str],
+    repeat: int = 3,
+    quick: bool = False,
+    param_overrides: Optional[dict[str, dict[str, Any]]] = None,
+) -> dict[str, Any]:
+    results = []
+    for name in workloads:
+        params = {
+            **(QUICK_PARAMS[name] if quick else {}),
+            **(param_overrides or {}).get(name, {}),
+        }
+        workload = GENERATORS[name](**params)
+        for mode in modes:
+            results.append(run_workload(workload, mode, operations, repeat))
+    return {
+        "version": RESULTS_VERSION,
+        "environment": environment_info(),
+        "settings": {"repeat": repeat, "quick": quick},
+        "results": results,
+    }
+
+
+def format_results(report: dict[str, Any]) -> str:
+    lines = [
+        f"{'workload':<18}{'mode':<21}{'operation':<11}{'median ms':>11}"
+        f"{'goals/s':>10}{'nodes':>9}{'peak KiB':>10}"
+    ]
+    for result in report["results"]:
+        for operation, stats in result["operations"].items():
+            throughput = stats["throughput_goals_per_s"]
+            lines.append(
+                f"{result['workload']:<18}{result['mode']:<21}{operation:<11}"
+                f"{stats['latency']['median_s'] * 1000:>11.3f}"
+                f"{throughput if throughput is not None else float('nan'):>10.1f}"
+                f"{stats['nodes_expanded']:>9}"
+                f"{stats['peak_memory_bytes'] / 1024:>10.1f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--workloads", nargs="+", choices=list(GENERATORS), default=list(GENERATORS)
+    )
+    parser.add_argument(
+        "--mode", dest="modes", nargs="+", choices=list(MODES), default=["default"]
+    )
+    parser.add_argument(
+        "--operations", nargs="+", choices=list(OPERATIONS), default=list(OPERATIONS)
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--quick", action="store_true", help="use small versions of the workloads"
+    )
+    parser.add_argument(
+        "--set",
+        dest="overrides",
+        action="append",
+        default=[],
+        metavar="WORKLOAD.PARAM=VALUE",
+        help="override a generator parameter, with the value parsed as JSON",
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        args.workloads,
+        args.modes,
+        args.operations,
+        args.repeat,
+        args.quick,
+        parse_param_overrides(args.overrides),
+    )
+    print(format_results(report))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Callable
+import numpy as np
+from numpy.typing import NDArray
+
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+X = Variable("X")
+Y = Variable("Y")
+Z = Variable("Z")
+
+
+@dataclass(frozen=True, eq=False)
+class Workload:
+    """
+    A synthetic knowledge base along with the goals to prove against it.
+    Every workload is fully determined by its generator's parameters, including the random seed,
+    so the same parameters always produce the same knowledge and goals.
+    """
+
+    name: str
+    params: dict[str, Any]
+    knowledge: list[Rule]
+    goals: list[Atom]
+    # extra SLDProver constructor arguments
+    prover_settings: dict[str, Any] = field(default_factory=dict)
+
+
+def family_tree(
+    generations: int = 6,
+    children_per_parent: int = 3,
+    num_goals: int = 20,
+    seed: int = 0,
+) -> Workload:
+    """
+    A tree of parent_of facts with grandparent_of and ancestor_of rules.
+    The goals ask for the grandchildren and the ancestors of randomly chosen people.
+    """
+    rng = np.random.default_rng(seed)
+    parent_of = Predicate("parent_of")
+    grandparent_of = Predicate("grandparent_of")
+    ancestor_of = Predicate("ancestor_of")
+    knowledge = [
+        Rule(grandparent_of(X, Y), (parent_of(X, Z), parent_of(Z, Y))),
+        Rule(ancestor_of(X, Y), (parent_of(X, Y),)),
+        Rule(ancestor_of(X, Y), (parent_of(X, Z), ancestor_of(Z, Y))),
+    ]
+    people = [Constant("person_0")]
+    generation = list(people)
+    for _ in range(generations - 1):
+        next_generation = []
+        for parent in generation:
+            for _child in range(children_per_parent):
+                child = Constant(f"person_{len(people)}")
+                people.append(child)
+                next_generation.append(child)
+                knowledge.append(Rule(parent_of(parent, child)))
+        generation = next_generation
+    # people are numbered generation by generation, so the first ones have grandchildren
+    num_grandparents = sum(children_per_parent**g for g in range(generations - 2))
+    goals: list[Atom] = []
+    for goal_number in range(num_goals):
+        if goal_number % 2 == 0:
+            grandparent = people[int(rng.integers(0, max(1, num_grandparents)))]
+            goals.append(grandparent_of(grandparent, X))
+        else:
+            goals.append(ancestor_of(X, people[int(rng.integers(0, len(people)))]))
+    return Workload(
+        "family_tree",
+        {
+            "generations": generations,
+            "children_per_parent": children_per_parent,
+            "num_goals": num_goals,
+            "seed": seed,
+        },
+        knowledge,
+        goals,
+        {"max_proof_depth": generations + 1},
+    )
+
+
+def transitive_chain(length: int = 50, num_goals: int = 5, seed: int = 0) -> Workload:
+    """
+    A single long chain of edge facts with a recursive path rule, so proving a path between
+    distant nodes needs a proof as deep as the chain
+    """
+    rng = np.random.default_rng(seed)
+    edge = Predicate("edge")
+    path = Predicate("path")
+    nodes = [Constant(f"node_{i}") for i in range(length + 1)]
+    knowledge = [
+        Rule(path(X, Y), (edge(X, Y),)),
+        Rule(path(X, Y), (edge(X, Z), path(Z, Y))),
+        *(Rule(edge(nodes[i], nodes[i + 1])) for i in range(length)),
+    ]
+    goals: list[Atom] = [path(nodes[0], nodes[length])]
+    for start in rng.integers(0, length, num_goals - 1).tolist():
+        goals.append(path(nodes[start], X))
+    return Workload(
+        "transitive_chain",
+        {"length": length, "num_goals": num_goals, "seed": seed},
+        knowledge,
+        goals,
+        {"max_proof_depth": length + 1},
+    )
+
+
+def fan_out(width: int = 4, depth: int = 4, num_goals: int = 3) -> Workload:
+    """
+    Every level has width alternative rules for proving the level above it,
+    and only the last alternative at each level succeeds, so the search tree has
+    roughly width ** depth branches which mostly fail
+    """
+    levels = [Predicate(f"level_{level}") for level in range(depth + 1)]
+    target = Constant("target")
+    knowledge = [Rule(levels[depth](target))]
+    for level in range(depth):
+        for option in range(width):
+            choice = Predicate(f"choice_{level}_{option}")
+            knowledge.append(Rule(levels[level](X), (levels[level + 1](X), choice(X))))
+        knowledge.append(Rule(Predicate(f"choice_{level}_{width - 1}")(target)))
+    goals: list[Atom] = [levels[0](X) for _ in range(num_goals)]
+    return Workload(
+        "fan_out",
+        {"width": width, "depth": depth, "num_goals": num_goals},
+        knowledge,
+        goals,
+        {"max_proof_depth": 2 * depth + 1},
+    )
+
+
+def fuzzy_embeddings(
+    num_predicates: int = 40,
+    num_constants: int = 200,
+    num_facts: int = 2000,
+    embedding_dim: int = 32,
+    similarity_density: float = 0.1,
+    num_goals: int = 20,
+    seed: int = 0,
+) -> Workload:
+    """
+    Facts whose predicates and constants have random embeddings, proven with fuzzy unification.
+    The embeddings are scattered around 1 / similarity_density cluster centers,
+    so roughly that fraction of predicate and constant pairs are similar enough to unify.
+    The goals use new predicates close to a cluster center, so they only match fuzzily.
+    """
+    rng = np.random.default_rng(seed)
+    num_clusters = max(1, round(1 / similarity_density))
+    centers = rng.normal(size=(num_clusters, embedding_dim))
+
+    def embedding(cluster: int) -> NDArray[np.float64]:
+        noise = rng.normal(scale=0.3, size=embedding_dim)
+        return centers[cluster] + noise * np.linalg.norm(centers[cluster]) / np.sqrt(
+            embedding_dim
+        )
+
+    predicates = [
+        Predicate(f"rel_{i}", embedding(i % num_clusters))
+        for i in range(num_predicates)
+    ]
+    constants = [
+        Constant(f"entity_{i}", embedding(i % num_clusters))
+        for i in range(num_constants)
+    ]
+    knowledge = [
+        Rule(predicates[p](constants[c1], constants[c2]))
+        for p, c1, c2 in rng.integers(
+            0, [num_predicates, num_constants, num_constants], size=(num_facts, 3)
+        ).tolist()
+    ]
+    goals: list[Atom] = []
+    for goal_number in range(num_goals):
+        cluster = int(rng.integers(0, num_clusters))
+        query = Predicate(f"query_{goal_number}", embedding(cluster))
+        subject = Constant(f"query_entity_{goal_number}", embedding(cluster))
+        goals.append(query(subject, X))
+    return Workload(
+        "fuzzy_embeddings",
+        {
+            "num_predicates": num_predicates,
+            "num_constants": num_constants,
+            "num_facts": num_facts,
+            "embedding_dim": embedding_dim,
+            "similarity_density": similarity_density,
+            "num_goals": num_goals,
+            "seed": seed,
+        },
+        knowledge,
+        goals,
+        {"max_proof_depth": 2, "min_similarity_threshold": 0.8},
+    )
+
+
+GENERATORS: dict[str, Callable[..., Workload]] = {
+    "family_tree": family_tree,
+    "transitive_chain": transitive_chain,
+    "fan_out": fan_out,
+    "fuzzy_embeddings": fuzzy_embeddings,
+}
+
+# small versions of every workload, which run in a few seconds in total
+QUICK_PARAMS: dict[str, dict[str, Any]] = {
+    "family_tree": {"generations": 4, "num_goals": 6},
+    "transitive_chain": {"length": 15, "num_goals": 3},
+    "fan_out": {"width": 3, "depth": 3, "num_goals": 2},
+    "fuzzy_embeddings": {
+        "num_predicates": 10,
+        "num_constants": 40,
+        "num_facts": 200,
+        "num_goals": 5,
+    },
+}
@@ -1,6 +1,12 @@
 __version__ = "0.3.2"
 
 from .prover.SLDProver import SLDProver
+from .prover.ParallelProver import ParallelProver
+from .prover.LSHIndex import LSHConfig
+from .prover.SymbolTable import SymbolTable
+from .prover.SearchBudget import CancellationToken, SearchBudget
+from .prover.SearchHooks import SearchHooks
+from .prover.SearchStats import SearchStats
 
 from .types import Atom, Constant, Predicate, Rule, Variable, Knowledge
 
@@ -8,6 +14,13 @@ from .similarity import cosine_similarity, symbol_compare
 
 __all__ = (
     "SLDProver",
+    "ParallelProver",
+    "LSHConfig",
+    "SymbolTable",
+    "SearchBudget",
+    "CancellationToken",
+    "SearchHooks",
+    "SearchStats",
     "Atom",
     "Constant",
     "Predicate",
@@ -0,0 +1,343 @@
+from __future__ import annotations
+from typing import Any, Iterable, Iterator, Optional, Sequence, Union, cast
+import numpy as np
+from numpy.typing import NDArray
+
+from fuzzy_reasoner.similarity import symbol_compare
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+
+Symbol = Union[Constant, Predicate]
+
+# the dtypes an EmbeddingMatrix can store its rows in, from most to least precise
+EMBEDDING_STORAGES = ("float64", "float32", "float16", "int8")
+
+# how many embeddings to convert or score at once, to bound the size of temporary arrays
+BLOCK_SIZE = 1 << 22
+
+
+class EmbeddingMatrix:
+    """
+    Holds the embeddings of predicates and constants as the rows of one contiguous,
+    L2-normalized matrix. Cosine similarity then becomes a plain dot product,
+    and a query can be scored against many rows with a single matrix-vector product.
+
+    The rows can be stored in a compact form to save memory: float32, float16, or int8
+    with a float32 scale per row, where each row is its codes times its scale.
+    Scores are computed straight from the compact rows in float32, block by block,
+    and every similarity is within error_bound of the exact cosine similarity.
+    """
+
+    matrix: NDArray[Any]
+    # the scale of each row of an int8 matrix
+    scales: Optional[NDArray[np.float32]]
+    # the largest L2 distance between a stored row and the exact normalized embedding
+    row_error: float
+
+    def __init__(self, symbols: Iterable[Symbol], storage: str = "float64") -> None:
+        self._rows: dict[Symbol, int] = {}
+        embeddings: list[Any] = []
+        for symbol in symbols:
+            if symbol.embedding is None or symbol in self._rows:
+                continue
+            self._rows[symbol] = len(embeddings)
+            embeddings.append(symbol.embedding)
+        self.matrix, self.scales, self.row_error = compress_embeddings(
+            embeddings, storage
+        )
+
+    @classmethod
+    def from_rules(
+        cls, rules: Iterable[Rule], storage: str = "float64"
+    ) -> Optional[EmbeddingMatrix]:
+        """
+        Build a matrix from all the symbols used in the rules,
+        or return None if the embeddings can't be stacked into a matrix
+        """
+        try:
+            return cls(iter_rule_symbols(rules), storage)
+        except (ValueError, TypeError):
+            return None
+
+    @classmethod
+    def from_normalized(
+        cls,
+        rows: dict[Symbol, int],
+        matrix: NDArray[Any],
+        scales: Optional[NDArray[np.float32]] = None,
+        row_error: float = 0.0,
+    ) -> EmbeddingMatrix:
+        """
+        Use an already-normalized matrix as it is, e.g. a memory-mapped one loaded from a file,
+        with the given row for each symbol, and the scales and row error of a compact one
+        """
+        embedding_matrix = cls.__new__(cls)
+        embedding_matrix._rows = rows
+        embedding_matrix.matrix = matrix
+        embedding_matrix.scales = scales
+        embedding_matrix.row_error = row_error
+        return embedding_matrix
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def storage(self) -> str:
+        return self.matrix.dtype.name
+
+    @property
+    def compute_dtype(self) -> type:
+        """the dtype scores are computed in, which is float32 for any compact storage"""
+        return np.float64 if self.storage == "float64" else np.float32
+
+    @property
+    def error_bound(self) -> float:
+        """
+        The most a similarity computed from the stored rows can differ from the exact cosine
+        similarity, from the storage error of both rows, plus the rounding error of a dot product
+        in the compute dtype. A unification can only succeed or fail differently than it would
+        with exact similarities if its exact similarity is within this of the threshold.
+        """
+        error = self.row_error
+        dim = self.matrix.shape[1] if self.matrix.ndim == 2 else 0
+        # the standard bound on the rounding error of a dot product of length dim, with
+        # a couple more roundings for the int8 scales, for vectors of norm at most 1 + error
+        rounding = (dim + 2) * float(np.finfo(self.compute_dtype).eps) / 2
+        return 2 * error + error**2 + rounding / (1 - rounding) * (1 + error) ** 2
+
+    def astype(self, storage: str) -> EmbeddingMatrix:
+        """
+        A copy of the matrix stored in another form. Its row error adds to this one's,
+        since its rows are converted from these rather than from the original embeddings.
+        """
+        matrix, scales, row_error = compress_rows(self.vectors(), storage)
+        return EmbeddingMatrix.from_normalized(
+            dict(self._rows), matrix, scales, self.row_error + row_error
+        )
+
+    def add(self, symbols: Iterable[Symbol]) -> list[int]:
+        """
+        Append rows for the embedded symbols which aren't in the matrix yet, returning their rows.
+        This copies the whole matrix, so symbols are best added in batches. Raises ValueError
+        if the new embeddings can't be stacked with the existing ones.
+        """
+        new_rows: dict[Symbol, int] = {}
+        embeddings: list[Any] = []
+        for symbol in symbols:
+            if symbol.embedding is None or symbol in self._rows or symbol in new_rows:
+                continue
+            new_rows[symbol] = len(self) + len(embeddings)
+            embeddings.append(symbol.embedding)
+        if not embeddings:
+            return []
+        new_matrix, new_scales, row_error = compress_embeddings(
+            embeddings, self.storage
+        )
+        if len(self) and new_matrix.shape[1] != self.matrix.shape[1]:
+            raise ValueError("All embeddings must be 1-dimensional and the same size")
+        # the scales are replaced first, since readers take the matrix first and then the scales
+        if new_scales is not None:
+            self.scales = (
+                np.concatenate([self.scales, new_scales])
+                if self.scales is not None
+                else new_scales
+            )
+        # the new rows must exist before any symbol refers to them
+        self.matrix = np.ascontiguousarray(
+            np.concatenate([self.matrix, new_matrix]) if len(self) else new_matrix
+        )
+        self.row_error = max(self.row_error, row_error)
+        self._rows.update(new_rows)
+        return list(new_rows.values())
+
+    def select(self, symbols: Sequence[Optional[Symbol]]) -> EmbeddingMatrix:
+        """
+        A new matrix in the same storage with a row for each symbol, in order, copied as it is
+        from this one's row for the symbol, so the original embedding isn't read, or stored from
+        the symbol's embedding if it has no row, or zeros for None or a symbol without one.
+        Raises ValueError if the new embeddings can't be stacked with the existing ones.
+        """
+        copied: list[int] = []
+        copied_rows: list[int] = []
+        missing: list[int] = []
+        for index, symbol in enumerate(symbols):
+            row = self._rows.get(symbol) if symbol is not None else None
+            if row is not None:
+                copied.append(index)
+                copied_rows.append(row)
+            elif symbol is not None and symbol.embedding is not None:
+                missing.append(index)
+        # taken after the rows, which add() only points at once they're in the matrix and scales
+        matrix = self.matrix
+        scales = self.scales
+        new_matrix, new_scales, row_error = compress_embeddings(
+            [cast(Symbol, symbols[index]).embedding for index in missing], self.storage
+        )
+        dim = matrix.shape[1] if len(matrix) else new_matrix.shape[1]
+        if missing and new_matrix.shape[1] != dim:
+            raise ValueError("All embeddings must be 1-dimensional and the same size")
+        selected = np.zeros((len(symbols), dim), dtype=self.storage)
+        selected_scales = (
+            np.zeros(len(symbols), dtype=np.float32) if self.storage == "int8" else None
+        )
+        if copied:
+            selected[copied] = matrix[copied_rows]
+            if selected_scales is not None and scales is not None:
+                selected_scales[copied] = scales[copied_rows]
+            row_error = max(row_error, self.row_error)
+        if missing:
+            selected[missing] = new_matrix
+            if selected_scales is not None and new_scales is not None:
+                selected_scales[missing] = new_scales
+        return EmbeddingMatrix.from_normalized({}, selected, selected_scales, row_error)
+
+    def row(self, symbol: Symbol) -> Optional[int]:
+        return self._rows.get(symbol)
+
+    def vectors(
+        self, rows: Optional[NDArray[np.int64]] = None, dtype: type = np.float64
+    ) -> NDArray[np.floating[Any]]:
+        """the stored rows, or all of them, expanded from their compact form"""
+        matrix = self.matrix
+        scales = self.scales
+        if rows is None:
+            rows = np.arange(len(matrix))
+        return expand_rows(
+            matrix[rows], scales[rows] if scales is not None else None, dtype
+        )
+
+    def vector(self, symbol: Symbol) -> NDArray[np.floating[Any]]:
+        """return the normalized embedding of the symbol, even if it's not in the matrix"""
+        row = self._rows.get(symbol)
+        if row is not None:
+            if self.scales is None and self.storage == "float64":
+                return self.matrix[row]
+            return self.vectors(np.array([row]))[0]
+        return normalize_rows(np.asarray(symbol.embedding, dtype=np.float64))
+
+    def scores(self, queries: NDArray[np.floating[Any]]) -> NDArray[np.floating[Any]]:
+        """
+        The dot product of every row with the normalized query, or with each of a matrix of
+        queries, as an array of (rows,) or (rows, queries). Compact rows are scored block by block
+        in float32, and int8 rows are scaled after the dot product, so each block only needs
+        converting to float32 rather than expanding to its full values.
+        """
+        matrix = self.matrix
+        scales = self.scales
+        dtype = self.compute_dtype
+        queries = np.asarray(queries, dtype=dtype)
+        if matrix.dtype == dtype:
+            return matrix @ queries
+        num_queries = queries.shape[1] if queries.ndim == 2 else 1
+        block_rows = max(1, BLOCK_SIZE // max(1, matrix.shape[1] + num_queries))
+        scores: NDArray[np.floating[Any]] = np.empty(
+            (len(matrix), *queries.shape[1:]), dtype=dtype
+        )
+        for start in range(0, len(matrix), block_rows):
+            end = min(start + block_rows, len(matrix))
+            block_scores = matrix[start:end].astype(dtype) @ queries
+            if scales is not None:
+                block_scores *= scales[start:end].reshape(-1, *[1] * (queries.ndim - 1))
+            scores[start:end] = block_scores
+        return scores
+
+    def similarity(self, item1: Symbol, item2: Symbol) -> float:
+        """
+        Equivalent to cosine_similarity, but uses the pre-normalized rows when possible
+        """
+        if item1.embedding is None or item2.embedding is None:
+            return symbol_compare(item1, item2)
+        return float(np.dot(self.vector(item1), self.vector(item2)))
+
+
+def compress_embeddings(
+    embeddings: list[Any], storage: str
+) -> tuple[NDArray[Any], Optional[NDArray[np.float32]], float]:
+    """
+    Normalize the embeddings into the rows of a matrix stored in the given form, block by block,
+    so the full float64 matrix is never built for compact storage. Returns the matrix,
+    the int8 scales, and the largest L2 distance between a stored row and its exact value.
+    Raises ValueError if the embeddings aren't all 1-dimensional and the same size.
+    """
+    if storage not in EMBEDDING_STORAGES:
+        raise ValueError(f"Embedding storage must be one of {EMBEDDING_STORAGES}")
+    if not embeddings:
+        return np.zeros((0, 0), dtype=storage), None, 0.0
+    block_rows = max(
+        1, BLOCK_SIZE // max(1, len(np.asarray(embeddings[0]).reshape(-1)))
+    )
+    blocks: list[tuple[NDArray[Any], Optional[NDArray[np.float32]], float]] = []
+    for start in range(0, len(embeddings), block_rows):
+        block = np.array(embeddings[start : start + block_rows], dtype=np.float64)
+        if block.ndim != 2 or (blocks and block.shape[1] != blocks[0][0].shape[1]):
+            raise ValueError("All embeddings must be 1-dimensional and the same size")
+        blocks.append(compress_rows(normalize_rows(block), storage))
+    matrix = np.ascontiguousarray(np.concatenate([block[0] for block in blocks]))
+    scales = (
+        np.concatenate([block[1] for block in blocks if block[1] is not None])
+        if storage == "int8"
+        else None
+    )
+    return matrix, scales, max(block[2] for block in blocks)
+
+
+def compress_rows(
+    normalized: NDArray[np.float64], storage: str
+) -> tuple[NDArray[Any], Optional[NDArray[np.float32]], float]:
+    """store normalized rows in the given form, see compress_embeddings"""
+    if storage not in EMBEDDING_STORAGES:
+        raise ValueError(f"Embedding storage must be one of {EMBEDDING_STORAGES}")
+    scales = None
+    if storage == "int8":
+        # each row is scaled so its largest element maps to +-127
+        max_values = (
+            np.abs(normalized).max(axis=1)
+            if normalized.size
+            else np.zeros(len(normalized))
+        )
+        scales = (max_values / 127).astype(np.float32)
+        divisors = np.where(scales > 0, scales, 1.0)[:, np.newaxis]
+        matrix = np.clip(np.rint(normalized / divisors), -127, 127).astype(np.int8)
+    else:
+        matrix = normalized.astype(storage)
+    if storage == "float64" or not normalized.size:
+        return matrix, scales, 0.0
+    errors = np.linalg.norm(
+        expand_rows(matrix, scales, np.float64) - normalized, axis=1
+    )
+    return matrix, scales, float(errors.max())
+
+
+def expand_rows(
+    matrix: NDArray[Any],
+    scales: Optional[NDArray[np.float32]],
+    dtype: type = np.float64,
+) -> NDArray[np.floating[Any]]:
+    """the values of stored rows, as an array of the given dtype"""
+    rows: NDArray[np.floating[Any]] = matrix.astype(dtype)
+    if scales is not None:
+        rows *= scales.astype(dtype)[:, np.newaxis]
+    return rows
+
+
+def normalize_rows(embeddings: NDArray[np.float64]) -> NDArray[np.float64]:
+    """L2-normalize the last axis, leaving any all-zero embeddings as zeros"""
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+def iter_rule_symbols(rules: Iterable[Rule]) -> Iterator[Symbol]:
+    for rule in rules:
+        yield from iter_atom_symbols(rule.head)
+        for atom in rule.body or ():
+            yield from iter_atom_symbols(atom)
+
+
+def iter_atom_symbols(atom: Atom) -> Iterator[Symbol]:
+    yield atom.predicate
+    for term in atom.terms:
+        if isinstance(term, Constant):
+            yield term
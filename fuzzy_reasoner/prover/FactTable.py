@@ -0,0 +1,357 @@
+from __future__ import annotations
+from itertools import chain
+from threading import Lock
+from typing import (
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+    overload,
+)
+import numpy as np
+from numpy.typing import NDArray
+
+from fuzzy_reasoner.prover.EmbeddingMatrix import EmbeddingMatrix
+from fuzzy_reasoner.prover.SymbolTable import SymbolTable
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+
+NO_ROWS = np.zeros(0, dtype=np.int64)
+
+
+class FactColumns(NamedTuple):
+    """
+    A consistent snapshot of a FactTable's columns, along with the argument indexes built so far.
+    Facts may be appended to the table after the snapshot was taken, but never removed,
+    so every row in the columns is always a valid row of the table.
+    """
+
+    columns: NDArray[np.int64]
+    indexes: dict[int, dict[int, NDArray[np.int64]]]
+    # the distinct constants of each argument position, for comparing the facts in bulk
+    symbol_columns: dict[int, Optional[SymbolColumn]]
+
+
+class SymbolColumn(NamedTuple):
+    """
+    The distinct constants in one argument position of a FactColumns snapshot,
+    so a goal constant can be compared with each of them once, rather than once per fact
+    """
+
+    # the symbol id of each distinct constant, in ascending order
+    ids: NDArray[np.int64]
+    # for each row, the index of its constant in ids
+    inverse: NDArray[np.int64]
+    # the L2-normalized embedding of each constant, with zeros for constants without one,
+    # or None if none of them have an embedding or the table doesn't use fuzzy constants
+    vectors: Optional[EmbeddingMatrix]
+    embedded: NDArray[np.bool_]
+
+
+class FactTable(Sequence[Rule]):
+    """
+    The ground facts of one predicate and arity, stored as a column of interned constant ids
+    per argument position, so the facts matching a bound argument can be found with a hash lookup
+    instead of unifying against every fact.
+
+    Constants are numbered by symbol in a SymbolTable, since that's how they compare
+    whenever they're compared exactly.
+    With fuzzy_constants, a constant with an embedding only compares exactly against a position
+    in which no fact has an embedded constant, so can_index() checks this first.
+
+    A FactTable is a sequence of its fact rules, so it can be used anywhere a list of
+    candidate rules can. Facts can be appended to a table, but removing facts means building
+    a new table with without(), so proofs which are already running never see rows disappear.
+
+    A table can also start from columns loaded from a file, which may be memory-mapped.
+    The rules for these loaded facts are only built the first time each one is needed.
+
+    Given the prover's EmbeddingMatrix, constants are compared in bulk using copies of their rows,
+    in its storage, rather than their own embeddings, which are then never read.
+    """
+
+    predicate: Predicate
+    arity: int
+    symbols: SymbolTable
+    fuzzy_constants: bool
+    # the number of facts which came from loaded columns, which are always the first rows
+    num_loaded: int
+    embeddings: Optional[EmbeddingMatrix]
+
+    def __init__(
+        self,
+        predicate: Predicate,
+        arity: int,
+        symbols: SymbolTable,
+        fuzzy_constants: bool,
+        facts: Iterable[Rule] = (),
+        loaded_columns: Optional[NDArray[np.int64]] = None,
+        embedded_positions: Optional[Sequence[bool]] = None,
+        embeddings: Optional[EmbeddingMatrix] = None,
+    ) -> None:
+        self.predicate = predicate
+        self.arity = arity
+        self.fuzzy_constants = fuzzy_constants
+        self.symbols = symbols
+        self.embeddings = embeddings
+        self._loaded_columns = (
+            loaded_columns
+            if loaded_columns is not None
+            else np.zeros((0, arity), dtype=np.int64)
+        )
+        self.num_loaded = len(self._loaded_columns)
+        self._loaded_facts: dict[int, Rule] = {}
+        self._facts: list[Rule] = []
+        # every fact object in the table, for identity membership checks
+        self._members: set[Rule] = set()
+        self._row_ids: list[int] = []
+        self._embedded_positions = (
+            list(embedded_positions)
+            if embedded_positions is not None
+            else [
+                any(
+                    symbols.constants[symbol_id].embedding is not None
+                    for symbol_id in np.unique(column).tolist()
+                )
+                for column in self._loaded_columns.T
+            ]
+        )
+        self._columns: Optional[FactColumns] = None
+        # whether each constant in the table is the object its symbol id stands for,
+        # or at least has the same embedding, so constants can be compared by id
+        self._uniform_symbols = True
+        self._lock = Lock()
+        for fact in facts:
+            self.append(fact)
+
+    def __len__(self) -> int:
+        return self.num_loaded + len(self._facts)
+
+    def __iter__(self) -> Iterator[Rule]:
+        return chain(self.loaded_facts(), self._facts)
+
+    def __contains__(self, fact: object) -> bool:
+        return fact in self._members
+
+    @overload
+    def __getitem__(self, index: int) -> Rule:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> FactTable:
+        ...
+
+    def __getitem__(self, index: int | slice) -> Rule | FactTable:
+        if isinstance(index, slice):
+            return FactTable(
+                self.predicate,
+                self.arity,
+                self.symbols,
+                self.fuzzy_constants,
+                [self.fact(row) for row in range(*index.indices(len(self)))],
+                embeddings=self.embeddings,
+            )
+        return self.fact(index if index >= 0 else len(self) + index)
+
+    @property
+    def added_facts(self) -> list[Rule]:
+        """the facts which were appended to the table, rather than loaded"""
+        return self._facts
+
+    def loaded_facts(self) -> Iterator[Rule]:
+        return (self.fact(row) for row in range(self.num_loaded))
+
+    def fact(self, row: int) -> Rule:
+        if row >= self.num_loaded:
+            return self._facts[row - self.num_loaded]
+        fact = self._loaded_facts.get(row)
+        if fact is None:
+            # facts compare by identity, so each loaded fact must only ever be built once
+            with self._lock:
+                fact = self._loaded_facts.get(row)
+                if fact is None:
+                    constants = self.symbols.constants
+                    fact = Rule(
+                        Atom(
+                            self.predicate,
+                            tuple(
+                                constants[symbol_id]
+                                for symbol_id in self._loaded_columns[row].tolist()
+                            ),
+                        )
+                    )
+                    self._members.add(fact)
+                    self._loaded_facts[row] = fact
+        return fact
+
+    def append(self, fact: Rule) -> None:
+        """add a ground fact, which must have this table's predicate and arity"""
+        constant_ids = self.symbols.constants
+        # the lock stops a snapshot being built concurrently from replacing the reset below
+        with self._lock:
+            for position, term in enumerate(fact.head.terms):
+                assert isinstance(term, Constant)
+                symbol_id = constant_ids.add(term)
+                self._row_ids.append(symbol_id)
+                if term.embedding is not None:
+                    self._embedded_positions[position] = True
+                if constant_ids[symbol_id].embedding is not term.embedding:
+                    self._uniform_symbols = False
+            self._members.add(fact)
+            self._facts.append(fact)
+            self._columns = None
+
+    def without(self, removed: set[Rule]) -> Optional[FactTable]:
+        """return a new table without the removed facts, or None if there would be none left"""
+        remaining = [fact for fact in self if fact not in removed]
+        if not remaining:
+            return None
+        return FactTable(
+            self.predicate,
+            self.arity,
+            self.symbols,
+            self.fuzzy_constants,
+            remaining,
+            embeddings=self.embeddings,
+        )
+
+    def columns(self) -> FactColumns:
+        columns = self._columns
+        if columns is None:
+            with self._lock:
+                num_facts = len(self._facts)
+                added_columns = np.array(
+                    self._row_ids[: num_facts * self.arity], dtype=np.int64
+                ).reshape(num_facts, self.arity)
+                columns = FactColumns(
+                    # loaded columns are used as they are, so memory-mapped pages are shared
+                    np.concatenate([self._loaded_columns, added_columns])
+                    if num_facts
+                    else self._loaded_columns,
+                    {},
+                    {},
+                )
+                self._columns = columns
+        return columns
+
+    def embedded_positions(self) -> list[bool]:
+        """whether any fact has a constant with an embedding, for each argument position"""
+        return list(self._embedded_positions)
+
+    def can_index(self, position: int, constant: Constant) -> bool:
+        """whether the facts matching this constant can be found by exact symbol lookup"""
+        return (
+            not self.fuzzy_constants
+            or constant.embedding is None
+            or not self._embedded_positions[position]
+        )
+
+    def symbol_column(
+        self, columns: FactColumns, position: int
+    ) -> Optional[SymbolColumn]:
+        """
+        The distinct constants at this position of the snapshot, or None if they can't be
+        compared in bulk, because constants with the same symbol have different embeddings,
+        or the embeddings can't be stacked into a matrix
+        """
+        if position in columns.symbol_columns:
+            return columns.symbol_columns[position]
+        symbol_column = None
+        if self._uniform_symbols:
+            ids, inverse = np.unique(columns.columns[:, position], return_inverse=True)
+            constants = [
+                self.symbols.constants[symbol_id] for symbol_id in ids.tolist()
+            ]
+            embedded = np.array(
+                [constant.embedding is not None for constant in constants], dtype=bool
+            )
+            inverse = inverse.reshape(-1)
+            if not self.fuzzy_constants or not embedded.any():
+                symbol_column = SymbolColumn(ids, inverse, None, embedded)
+            else:
+                vectors = stack_embeddings(constants, self.embeddings)
+                if vectors is not None:
+                    symbol_column = SymbolColumn(ids, inverse, vectors, embedded)
+        columns.symbol_columns[position] = symbol_column
+        return symbol_column
+
+    def lookup(
+        self, columns: FactColumns, position: int, constant: Constant
+    ) -> NDArray[np.int64]:
+        """return the rows of the snapshot whose constant at this position has the same symbol"""
+        index = columns.indexes.get(position)
+        if index is None:
+            index = build_position_index(columns.columns[:, position])
+            columns.indexes[position] = index
+        symbol_id = self.symbols.constants.get_id(constant.symbol)
+        rows = index.get(symbol_id) if symbol_id is not None else None
+        return NO_ROWS if rows is None else rows
+
+
+class FactTableRows(Sequence[Rule]):
+    """
+    A contiguous range of a fact table's rows, e.g. one worker's share of the candidate facts.
+    Goals are matched against the whole table and then restricted to the range, so each fact
+    is compared exactly the same way as when matching against the whole table.
+    """
+
+    table: FactTable
+    start: int
+    stop: int
+
+    def __init__(self, table: FactTable, start: int, stop: int) -> None:
+        self.table = table
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @overload
+    def __getitem__(self, index: int) -> Rule:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> FactTableRows:
+        ...
+
+    def __getitem__(self, index: int | slice) -> Rule | FactTableRows:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("fact table rows can only be sliced contiguously")
+            return FactTableRows(
+                self.table, self.start + start, self.start + max(start, stop)
+            )
+        return self.table.fact(
+            self.start + (index if index >= 0 else len(self) + index)
+        )
+
+
+def stack_embeddings(
+    constants: Sequence[Constant], embeddings: Optional[EmbeddingMatrix]
+) -> Optional[EmbeddingMatrix]:
+    """
+    The L2-normalized embeddings of the constants as the rows of a matrix, with zeros for
+    missing ones, taken from the embeddings' rows where possible, and otherwise normalized
+    into float64, or None if they aren't all 1-dimensional and the same size
+    """
+    try:
+        return (embeddings if embeddings is not None else EmbeddingMatrix(())).select(
+            constants
+        )
+    except (ValueError, TypeError):
+        return None
+
+
+def build_position_index(column: NDArray[np.int64]) -> dict[int, NDArray[np.int64]]:
+    """map each symbol id in the column to the rows containing it, in ascending order"""
+    order = np.argsort(column, kind="stable")
+    unique_ids, starts = np.unique(column[order], return_index=True)
+    return {
+        int(symbol_id): rows
+        for symbol_id, rows in zip(unique_ids, np.split(order, starts[1:]))
+    }
@@ -0,0 +1,415 @@
+from __future__ import annotations
+import json
+import os
+from typing import Any, Generic, NamedTuple, Optional, Sequence, cast
+import numpy as np
+from numpy.typing import NDArray
+
+from fuzzy_reasoner.prover.EmbeddingMatrix import (
+    EmbeddingMatrix,
+    Symbol,
+    compress_rows,
+    iter_rule_symbols,
+    normalize_rows,
+)
+from fuzzy_reasoner.prover.RuleIndex import RuleIndex
+from fuzzy_reasoner.prover.SimilarityGraph import NeighbourArrays, SimilarityGraph
+from fuzzy_reasoner.prover.SymbolTable import (
+    SymbolNamespace,
+    SymbolT,
+    SymbolTable,
+    same_embedding,
+)
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "knowledge.json"
+CONSTANT_ROWS_FILE = "constant_rows.npy"
+PREDICATE_ROWS_FILE = "predicate_rows.npy"
+EMBEDDINGS_FILE = "embeddings.npy"
+NORMALIZED_EMBEDDINGS_FILE = "normalized_embeddings.npy"
+# the scale of each row of int8 normalized embeddings
+NORMALIZED_SCALES_FILE = "normalized_scales.npy"
+# the neighbour arrays of a SimilarityGraph, by NeighbourArrays field
+SIMILARITY_GRAPH_FILES = {
+    "indptr": "similarity_graph_indptr.npy",
+    "indices": "similarity_graph_indices.npy",
+    "similarities": "similarity_graph_similarities.npy",
+}
+
+
+class LoadedFacts(NamedTuple):
+    """the ground facts of one predicate, as an (n, arity) array of constant ids"""
+
+    predicate: Predicate
+    columns: NDArray[np.int64]
+    embedded_positions: list[bool]
+
+
+class KnowledgeFile(NamedTuple):
+    """
+    A knowledge base loaded from a directory written by save_knowledge().
+    The embeddings, normalized embeddings, fact columns and similarity graph arrays are each
+    stored as a .npy file, so they can be memory-mapped rather than read in, and processes
+    loading the same files share their pages through the OS page cache.
+    """
+
+    symbols: SymbolTable
+    rules: list[Rule]
+    facts: list[LoadedFacts]
+    embeddings: EmbeddingMatrix
+    # the similarity graph of the embeddings, if one was saved
+    similarity_graph: Optional[SimilarityGraph]
+
+
+def save_knowledge(
+    index: RuleIndex,
+    path: str,
+    similarity_graph: Optional[SimilarityGraph] = None,
+    embedding_storage: str = "float64",
+) -> None:
+    """
+    Save every rule in the index to the directory at path, which is created if needed.
+    Constants and predicates are saved by id, numbered like the index's SymbolTable, with
+    a further id for each symbol whose embedding differs from the SymbolTable's symbol with
+    the same symbol string, see SavedSymbols. The ids are assigned without changing the SymbolTable.
+    Fact tables are saved as columns of ids, unless one of their facts uses such a symbol,
+    in which case its facts are saved as rules, since loaded columns can only refer to
+    the SymbolTable's symbols. Embeddings are saved as NumPy arrays, with the normalized copy
+    in the given storage, see EmbeddingMatrix, along with the similarity graph if there is one,
+    renumbered to match the saved embeddings.
+    """
+    rules, fact_tables = index.rules_and_fact_tables()
+    # the fact columns hold ids from the index's table, so its symbols are copied after taking
+    # them, since ids are only ever added
+    table_columns = [table.columns().columns for table in fact_tables]
+    constants = SavedSymbols(index.symbols.constants)
+    predicates = SavedSymbols(index.symbols.predicates)
+    for table in fact_tables:
+        predicates.add(table.predicate)
+        # loaded facts are always built from the table's symbols
+        for fact in table.added_facts:
+            for term in fact.head.terms:
+                assert isinstance(term, Constant)
+                constants.add(term)
+    for rule in rules:
+        for item in iter_rule_symbols([rule]):
+            if isinstance(item, Constant):
+                constants.add(item)
+            else:
+                predicates.add(item)
+
+    saved_tables = []
+    saved_columns: list[tuple[str, NDArray[np.int64]]] = []
+    fact_rules: list[Rule] = []
+    for table, columns in zip(fact_tables, table_columns):
+        added_facts = table.added_facts[: len(columns) - table.num_loaded]
+        added_columns = np.array(
+            [
+                [constants.id(cast(Constant, term)) for term in fact.head.terms]
+                for fact in added_facts
+            ],
+            dtype=np.int64,
+        ).reshape(len(added_facts), table.arity)
+        if np.any(added_columns >= constants.num_symbols):
+            fact_rules.extend(table.fact(row) for row in range(len(columns)))
+            continue
+        file_name = f"facts_{len(saved_columns)}.npy"
+        saved_columns.append(
+            (
+                file_name,
+                np.concatenate([columns[: table.num_loaded], added_columns])
+                if len(added_facts)
+                else columns,
+            )
+        )
+        saved_tables.append(
+            {
+                "predicate": predicates.id(table.predicate),
+                "file": file_name,
+                "embedded_positions": table.embedded_positions(),
+            }
+        )
+    saved_rules = [
+        save_rule(rule, constants, predicates) for rule in [*rules, *fact_rules]
+    ]
+
+    embeddings: list[Any] = []
+    # the saved row of each embedded symbol, to renumber the similarity graph with
+    saved_rows: dict[Symbol, int] = {}
+    symbol_rows: dict[str, NDArray[np.int64]] = {}
+    saved_symbols: list[tuple[SavedSymbols[Any], str]] = [
+        (constants, CONSTANT_ROWS_FILE),
+        (predicates, PREDICATE_ROWS_FILE),
+    ]
+    for saved, rows_file in saved_symbols:
+        rows = np.full(len(saved.objects), -1, dtype=np.int64)
+        for symbol_id, item in enumerate(saved.objects):
+            if item.embedding is not None:
+                rows[symbol_id] = len(embeddings)
+                saved_rows[item] = len(embeddings)
+                embeddings.append(np.asarray(item.embedding))
+        symbol_rows[rows_file] = rows
+    embedding_matrix = np.array(embeddings) if embeddings else np.zeros((0, 0))
+    if embedding_matrix.ndim != 2:
+        raise ValueError("All embeddings must be 1-dimensional and the same size")
+    normalized_matrix, scales, row_error = compress_rows(
+        normalize_rows(embedding_matrix.astype(np.float64)), embedding_storage
+    )
+    neighbours = None
+    if similarity_graph is not None:
+        graph_rows = np.full(len(similarity_graph), -1, dtype=np.int64)
+        for item, saved_row in saved_rows.items():
+            graph_row = similarity_graph.embeddings.row(item)
+            if graph_row is not None and graph_row < len(graph_rows):
+                graph_rows[graph_row] = saved_row
+        neighbours = similarity_graph.renumber(
+            graph_rows,
+            EmbeddingMatrix.from_normalized({}, normalized_matrix, scales, row_error),
+        )
+
+    os.makedirs(path, exist_ok=True)
+    for file_name, columns in saved_columns:
+        np.save(os.path.join(path, file_name), columns)
+    for rows_file, rows in symbol_rows.items():
+        np.save(os.path.join(path, rows_file), rows)
+    np.save(os.path.join(path, EMBEDDINGS_FILE), embedding_matrix)
+    np.save(os.path.join(path, NORMALIZED_EMBEDDINGS_FILE), normalized_matrix)
+    if scales is not None:
+        np.save(os.path.join(path, NORMALIZED_SCALES_FILE), scales)
+    saved_graph = None
+    if similarity_graph is not None and neighbours is not None:
+        for field, file_name in SIMILARITY_GRAPH_FILES.items():
+            np.save(os.path.join(path, file_name), getattr(neighbours, field))
+        saved_graph = {"min_similarity": similarity_graph.min_similarity}
+    with open(os.path.join(path, MANIFEST_FILE), "w") as manifest_file:
+        json.dump(
+            {
+                "version": FORMAT_VERSION,
+                "constants": [item.symbol for item in constants.objects],
+                "predicates": [item.symbol for item in predicates.objects],
+                "fact_tables": saved_tables,
+                "rules": saved_rules,
+                "similarity_graph": saved_graph,
+                "embedding_row_error": row_error,
+            },
+            manifest_file,
+        )
+
+
+def load_knowledge(path: str, mmap: bool = True) -> KnowledgeFile:
+    """
+    Load a knowledge base saved with save_knowledge(). With mmap, the arrays are
+    memory-mapped read-only, so only the pages which are actually used are ever read.
+    """
+    with open(os.path.join(path, MANIFEST_FILE)) as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported knowledge file version: {manifest.get('version')}"
+        )
+    constant_symbols: list[str] = manifest["constants"]
+    constant_rows: list[int] = load_array(path, CONSTANT_ROWS_FILE, False).tolist()
+    predicate_symbols: list[str] = manifest["predicates"]
+    predicate_rows: list[int] = load_array(path, PREDICATE_ROWS_FILE, False).tolist()
+    embedding_matrix = load_array(path, EMBEDDINGS_FILE, mmap)
+    symbols = SymbolTable.from_arrays(
+        constant_symbols,
+        constant_rows,
+        predicate_symbols,
+        predicate_rows,
+        embedding_matrix,
+    )
+    constants = load_symbols(
+        symbols.constants, constant_symbols, constant_rows, embedding_matrix
+    )
+    predicates = load_symbols(
+        symbols.predicates, predicate_symbols, predicate_rows, embedding_matrix
+    )
+    embedding_rows: dict[Symbol, int] = {}
+    saved_symbols: list[tuple[Sequence[Symbol], list[int]]] = [
+        (constants, constant_rows),
+        (predicates, predicate_rows),
+    ]
+    for items, rows in saved_symbols:
+        for item, row in zip(items, rows):
+            if row >= 0:
+                embedding_rows[item] = row
+    facts = [
+        LoadedFacts(
+            predicates[table["predicate"]],
+            load_array(path, table["file"], mmap),
+            table["embedded_positions"],
+        )
+        for table in manifest["fact_tables"]
+    ]
+    normalized_matrix = load_array(path, NORMALIZED_EMBEDDINGS_FILE, mmap)
+    embeddings = EmbeddingMatrix.from_normalized(
+        embedding_rows,
+        normalized_matrix,
+        load_array(path, NORMALIZED_SCALES_FILE, mmap)
+        if normalized_matrix.dtype == np.int8
+        else None,
+        manifest.get("embedding_row_error", 0.0),
+    )
+    # older knowledge files don't have a similarity graph
+    saved_graph = manifest.get("similarity_graph")
+    similarity_graph = (
+        SimilarityGraph(
+            embeddings,
+            saved_graph["min_similarity"],
+            NeighbourArrays(
+                **{
+                    field: load_array(path, file_name, mmap)
+                    for field, file_name in SIMILARITY_GRAPH_FILES.items()
+                }
+            ),
+        )
+        if saved_graph is not None
+        else None
+    )
+    return KnowledgeFile(
+        symbols,
+        [load_rule(rule, constants, predicates) for rule in manifest["rules"]],
+        facts,
+        embeddings,
+        similarity_graph,
+    )
+
+
+def load_array(path: str, file_name: str, mmap: bool) -> NDArray[Any]:
+    array = np.load(os.path.join(path, file_name), mmap_mode="r" if mmap else None)
+    # empty arrays can't be memory-mapped, and don't need to be
+    return np.asarray(array) if array.size == 0 else array
+
+
+class SavedSymbols(Generic[SymbolT]):
+    """
+    The ids symbols of one kind are saved with. The objects of the SymbolTable namespace keep
+    their ids, and each new symbol string gets the next id, so a table loaded from the saved
+    symbol strings numbers them the same way. A symbol whose embedding differs from the one
+    saved for its symbol string gets its own id after all of those, along with its own
+    embedding row. Every symbol must be added before any id is taken.
+    """
+
+    def __init__(self, namespace: SymbolNamespace[SymbolT]) -> None:
+        self._symbols: list[SymbolT] = list(namespace.objects)
+        self._ids = {
+            item.symbol: symbol_id for symbol_id, item in enumerate(self._symbols)
+        }
+        self._variants: list[SymbolT] = []
+        self._variant_ids: dict[str, list[int]] = {}
+
+    @property
+    def num_symbols(self) -> int:
+        """the number of distinct symbol strings, whose ids come before any variant's"""
+        return len(self._symbols)
+
+    @property
+    def objects(self) -> list[SymbolT]:
+        return self._symbols + self._variants
+
+    def add(self, item: SymbolT) -> None:
+        if self._find(item) is not None:
+            return
+        if item.symbol not in self._ids:
+            self._ids[item.symbol] = len(self._symbols)
+            self._symbols.append(item)
+            return
+        self._variant_ids.setdefault(item.symbol, []).append(len(self._variants))
+        self._variants.append(item)
+
+    def id(self, item: SymbolT) -> int:
+        symbol_id = self._find(item)
+        assert symbol_id is not None
+        return symbol_id
+
+    def _find(self, item: SymbolT) -> Optional[int]:
+        symbol_id = self._ids.get(item.symbol)
+        if symbol_id is None:
+            return None
+        if same_embedding(self._symbols[symbol_id].embedding, item.embedding):
+            return symbol_id
+        for variant in self._variant_ids.get(item.symbol, ()):
+            if same_embedding(self._variants[variant].embedding, item.embedding):
+                return self.num_symbols + variant
+        return None
+
+
+def load_symbols(
+    namespace: SymbolNamespace[SymbolT],
+    symbols: Sequence[str],
+    rows: Sequence[int],
+    embeddings: NDArray[Any],
+) -> list[SymbolT]:
+    """
+    The object for each saved id: the namespace's object for a symbol string's own id,
+    or a new symbol with its own embedding row for a variant, see SavedSymbols
+    """
+    items: list[SymbolT] = []
+    for symbol_id, (symbol, row) in enumerate(zip(symbols, rows)):
+        table_id = namespace.get_id(symbol)
+        assert table_id is not None
+        item = namespace[table_id]
+        if table_id != symbol_id:
+            item = type(item)(symbol, embeddings[row] if row >= 0 else None)
+        items.append(item)
+    return items
+
+
+# a rule is saved as its variable names, its head and its body, with each atom saved as
+# the predicate id followed by its terms, where constants are saved as their id (>= 0)
+# and variables as -1 - their position in the variable names
+SavedAtom = Sequence[int]
+
+
+def save_rule(
+    rule: Rule,
+    constants: SavedSymbols[Constant],
+    predicates: SavedSymbols[Predicate],
+) -> dict[str, Any]:
+    variables: dict[Variable, int] = {}
+
+    def save_atom(atom: Atom) -> SavedAtom:
+        terms = [
+            -1 - variables.setdefault(term, len(variables))
+            if isinstance(term, Variable)
+            else constants.id(term)
+            for term in atom.terms
+        ]
+        return [predicates.id(atom.predicate), *terms]
+
+    head = save_atom(rule.head)
+    body = [save_atom(atom) for atom in rule.body] if rule.body is not None else None
+    return {
+        "variables": [variable.name for variable in variables],
+        "head": head,
+        "body": body,
+    }
+
+
+def load_rule(
+    saved_rule: dict[str, Any],
+    constants: Sequence[Constant],
+    predicates: Sequence[Predicate],
+) -> Rule:
+    variables = [Variable(name) for name in saved_rule["variables"]]
+
+    def load_atom(saved_atom: SavedAtom) -> Atom:
+        return Atom(
+            predicates[saved_atom[0]],
+            tuple(
+                variables[-1 - term] if term < 0 else constants[term]
+                for term in saved_atom[1:]
+            ),
+        )
+
+    body: Optional[list[SavedAtom]] = saved_rule["body"]
+    return Rule(
+        load_atom(saved_rule["head"]),
+        tuple(load_atom(atom) for atom in body) if body is not None else None,
+    )
@@ -0,0 +1,133 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Iterable, Union
+import numpy as np
+from numpy.typing import NDArray
+
+from fuzzy_reasoner.prover.EmbeddingMatrix import BLOCK_SIZE, EmbeddingMatrix
+
+
+@dataclass(frozen=True)
+class LSHConfig:
+    """
+    Settings for approximate nearest-neighbour lookup of fuzzy predicates.
+    More tables and a larger probe radius increase recall, more bits per table increase speed.
+    Arities with fewer than min_index_size distinct embedded predicates are always scanned exactly.
+    """
+
+    num_tables: int = 8
+    num_bits: int = 12
+    probe_radius: int = 1
+    seed: int = 0
+    min_index_size: int = 1000
+
+
+class LSHIndex:
+    """
+    Random-projection locality sensitive hashing over L2-normalized vectors.
+    Each table hashes a vector to the sign pattern of its projections onto random hyperplanes,
+    so vectors with a high cosine similarity are likely to land in the same bucket in some table.
+    Queries only rescore the rows found in their buckets, rather than every row.
+    The vectors can be an EmbeddingMatrix, in which case they're used in its storage.
+    """
+
+    vectors: EmbeddingMatrix
+    config: LSHConfig
+
+    def __init__(
+        self,
+        vectors: Union[NDArray[np.floating[Any]], EmbeddingMatrix],
+        config: LSHConfig = LSHConfig(),
+    ) -> None:
+        if config.num_bits > 62:
+            raise ValueError("num_bits must be at most 62")
+        if config.probe_radius not in (0, 1):
+            raise ValueError("probe_radius must be 0 or 1")
+        if not isinstance(vectors, EmbeddingMatrix):
+            vectors = EmbeddingMatrix.from_normalized({}, vectors)
+        self.vectors = vectors
+        self.config = config
+        rng = np.random.default_rng(config.seed)
+        dim = vectors.matrix.shape[1]
+        self._planes = rng.standard_normal((config.num_tables, config.num_bits, dim))
+        self._bit_values = 1 << np.arange(config.num_bits, dtype=np.int64)
+        self._buckets: list[dict[int, NDArray[np.int64]]] = []
+        # compact rows are expanded a block at a time, so they're never all expanded at once
+        block_rows = max(1, BLOCK_SIZE // max(1, dim))
+        codes = np.concatenate(
+            [
+                self._hash(
+                    vectors.vectors(
+                        np.arange(start, min(start + block_rows, len(vectors))),
+                        vectors.compute_dtype,
+                    )
+                )
+                for start in range(0, len(vectors), block_rows)
+            ]
+            or [np.zeros((config.num_tables, 0), dtype=np.int64)],
+            axis=1,
+        )
+        for table_codes in codes:
+            order = np.argsort(table_codes, kind="stable")
+            unique_codes, starts = np.unique(table_codes[order], return_index=True)
+            self._buckets.append(
+                {
+                    int(code): rows
+                    for code, rows in zip(unique_codes, np.split(order, starts[1:]))
+                }
+            )
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _hash(self, vectors: NDArray[np.floating[Any]]) -> NDArray[np.int64]:
+        """return the bucket code of each vector in each table, as an array of (tables, vectors)"""
+        projections = np.einsum("tbd,nd->tnb", self._planes, vectors)
+        return (projections > 0).astype(np.int64) @ self._bit_values
+
+    def candidate_rows(self, query: NDArray[np.floating[Any]]) -> NDArray[np.int64]:
+        """return the rows sharing a bucket with the query in any table, including nearby probes"""
+        codes = self._hash(query[np.newaxis, :])[:, 0]
+        probes = [0]
+        if self.config.probe_radius == 1:
+            probes += [int(bit) for bit in self._bit_values]
+        found: list[NDArray[np.int64]] = []
+        for table, code in zip(self._buckets, codes):
+            for probe in probes:
+                rows = table.get(int(code) ^ probe)
+                if rows is not None:
+                    found.append(rows)
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def search(
+        self, query: NDArray[np.floating[Any]], min_similarity: float
+    ) -> tuple[NDArray[np.int64], NDArray[np.floating[Any]]]:
+        """
+        Return the rows likely to have a similarity >= min_similarity with the normalized query,
+        along with their exact similarities
+        """
+        rows = self.candidate_rows(query)
+        dtype = self.vectors.compute_dtype
+        similarities = self.vectors.vectors(rows, dtype) @ np.asarray(
+            query, dtype=dtype
+        )
+        matches = similarities >= min_similarity
+        return rows[matches], similarities[matches]
+
+    def recall(
+        self, queries: Iterable[NDArray[np.floating[Any]]], min_similarity: float
+    ) -> float:
+        """
+        Measure the fraction of rows found by an exact scan which the index also finds
+        for the given normalized queries. Returns 1.0 if the exact scan finds nothing.
+        """
+        found = 0
+        expected = 0
+        for query in queries:
+            exact_rows = np.flatnonzero(self.vectors.scores(query) >= min_similarity)
+            approximate_rows, _similarities = self.search(query, min_similarity)
+            expected += len(exact_rows)
+            found += len(np.intersect1d(exact_rows, approximate_rows))
+        return found / expected if expected else 1.0
@@ -0,0 +1,50 @@
+from __future__ import annotations
+from typing import Iterable, Sequence
+
+from fuzzy_reasoner.prover.RuleIndex import CandidateGroup, RuleIndex
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Rule import Rule
+
+
+class OverlayRuleIndex:
+    """
+    A small index of extra rules layered on top of a base RuleIndex, without copying the base.
+    Candidate lookups return the base index's candidates followed by the overlay's own,
+    so building one only costs as much as the number of extra rules.
+    """
+
+    base: RuleIndex
+    overlay: RuleIndex
+
+    def __init__(self, base: RuleIndex, rules: Iterable[Rule]) -> None:
+        self.base = base
+        # rules which are already in the base index would otherwise be tried twice
+        self.overlay = RuleIndex(
+            (rule for rule in rules if rule not in base),
+            base.similarity_func,
+            base.embeddings,
+            base.ann_config,
+            base.fact_store,
+        )
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.overlay)
+
+    def candidates(
+        self, goal: Atom, min_similarity_threshold: float = 0.5
+    ) -> list[CandidateGroup]:
+        return [
+            *self.base.candidates(goal, min_similarity_threshold),
+            *self.overlay.candidates(goal, min_similarity_threshold),
+        ]
+
+    def candidates_many(
+        self, goals: Sequence[Atom], min_similarity_threshold: float = 0.5
+    ) -> list[list[CandidateGroup]]:
+        return [
+            [*base_groups, *overlay_groups]
+            for base_groups, overlay_groups in zip(
+                self.base.candidates_many(goals, min_similarity_threshold),
+                self.overlay.candidates_many(goals, min_similarity_threshold),
+            )
+        ]
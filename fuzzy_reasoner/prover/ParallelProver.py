@@ -0,0 +1,263 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+import os
+from typing import Any, Optional, Sequence, Tuple
+
+from fuzzy_reasoner.prover.FactTable import FactTable, FactTableRows
+from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.Proof import Proof
+from fuzzy_reasoner.prover.ProofState import ProofState
+from fuzzy_reasoner.prover.RuleIndex import CandidateGroup
+from fuzzy_reasoner.prover.SLDProver import (
+    SLDProver,
+    knowledge_to_rules,
+    sort_proofs,
+)
+from fuzzy_reasoner.prover.SymbolRegistry import SymbolRegistry
+from fuzzy_reasoner.prover.operations.recurse import resolve_rules
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Knowledge import Knowledge
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+
+# a range of top-level branches of a proof, or None for every branch
+BranchRange = Optional[Tuple[int, int]]
+
+
+class ParallelProver:
+    """
+    Runs the proofs of an SLDProver across a pool of worker processes, to use more than one core.
+    Each worker builds its own copy of the prover from the prover's rules when it starts.
+    prove_many() splits a batch of goals between the workers, and prove_all() splits the
+    top-level OR branches of a single goal, i.e. the candidate rules for the goal itself.
+
+    Results are pickled back to this process with every rule and symbol mapped back to
+    the original objects, so proofs can be used exactly like the ones SLDProver returns.
+    With the "spawn" or "forkserver" start methods, the prover's similarity func must be picklable.
+    """
+
+    prover: SLDProver
+    max_workers: int
+    chunks_per_worker: int
+
+    def __init__(
+        self,
+        prover: SLDProver,
+        max_workers: Optional[int] = None,
+        chunks_per_worker: int = 4,
+        mp_context: Optional[BaseContext] = None,
+    ) -> None:
+        self.prover = prover
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunks_per_worker = chunks_per_worker
+        rules = list(prover.rule_index.rules)
+        self._registry = SymbolRegistry(rules)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(rules, get_prover_settings(prover)),
+        )
+
+    def __enter__(self) -> ParallelProver:
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+    @property
+    def _num_chunks(self) -> int:
+        return self.max_workers * self.chunks_per_worker
+
+    def prove_many(
+        self, goals: Sequence[Goal | Atom], extra_knowledge: Optional[Knowledge] = None
+    ) -> list[Proof | None]:
+        """
+        Find the best proof of each goal, like SLDProver.prove_many(), with the goals
+        split between the workers. Goals with the same predicate are kept together.
+        """
+        extra_rules = knowledge_to_rules(extra_knowledge or [])
+        goal_groups: dict[tuple[Predicate, int], list[int]] = {}
+        for position, goal in enumerate(goals):
+            atom = get_goal_atom(goal)
+            key = (atom.predicate, len(atom.terms))
+            goal_groups.setdefault(key, []).append(position)
+        positions = [position for group in goal_groups.values() for position in group]
+        chunks = [
+            positions[start:stop]
+            for start, stop in split_range(len(positions), self._num_chunks)
+        ]
+        futures = []
+        for chunk in chunks:
+            chunk_goals = [goals[position] for position in chunk]
+            payload = self._registry.dumps((chunk_goals, extra_rules))
+            registry = register_query(self._registry, chunk_goals, extra_rules)
+            futures.append(
+                (chunk, registry, self._executor.submit(_prove_many_task, payload))
+            )
+        results: list[Proof | None] = [None] * len(goals)
+        for chunk, registry, future in futures:
+            for position, proof in zip(chunk, registry.loads(future.result())):
+                results[position] = proof
+        return results
+
+    def prove_all(
+        self, goal: Goal | Atom, extra_knowledge: Optional[Knowledge] = None
+    ) -> list[Proof]:
+        """
+        Find every proof of the goal, like SLDProver.prove_all(), with the top-level branches
+        split between the workers. With tabling, the whole goal is proven by one worker instead,
+        since the goal's table needs to see every branch.
+        """
+        extra_rules = knowledge_to_rules(extra_knowledge or [])
+        branch_ranges: list[BranchRange] = (
+            [None]
+            if self.prover.tabling
+            else list(
+                split_range(
+                    count_branches(self.prover, goal, extra_rules), self._num_chunks
+                )
+            )
+        )
+        registry = register_query(self._registry, [goal], extra_rules)
+        futures = [
+            self._executor.submit(
+                _prove_all_task,
+                self._registry.dumps((goal, extra_rules, branch_range)),
+            )
+            for branch_range in branch_ranges
+        ]
+        # merge in branch order, so the stable sort orders ties the same way as prove_all
+        proofs = [
+            proof for future in futures for proof in registry.loads(future.result())
+        ]
+        return sort_proofs(proofs, self.prover.iterative_deepening)
+
+
+def get_prover_settings(prover: SLDProver) -> dict[str, Any]:
+    """the constructor arguments needed to rebuild the prover from its rules"""
+    return {
+        "max_proof_depth": prover.max_proof_depth,
+        "min_similarity_threshold": prover.min_similarity_threshold,
+        "similarity_func": prover.similarity_func,
+        "similarity_cache_size": (
+            prover.similarity_cache.maxsize if prover.similarity_cache else None
+        ),
+        "ann_config": prover.ann_config,
+        "tabling": prover.tabling,
+        "binding_store": prover.binding_store,
+        "iterative_deepening": prover.iterative_deepening,
+        "fact_store": prover.fact_store,
+        "similarity_graph": prover.similarity_graph is not None,
+        "embedding_storage": prover.embedding_storage,
+    }
+
+
+def get_goal_atom(goal: Goal | Atom) -> Atom:
+    return goal.statement if isinstance(goal, Goal) else goal
+
+
+def register_query(
+    registry: SymbolRegistry, goals: Sequence[Goal | Atom], extra_rules: list[Rule]
+) -> SymbolRegistry:
+    """register the objects of a query which aren't part of the prover's own rules"""
+    query_registry = SymbolRegistry(extra_rules, parent=registry)
+    for goal in goals:
+        query_registry.add_atom(get_goal_atom(goal))
+    return query_registry
+
+
+def split_range(length: int, num_chunks: int) -> list[tuple[int, int]]:
+    """split range(length) into at most num_chunks contiguous (start, stop) pairs of similar size"""
+    num_chunks = max(1, min(num_chunks, length))
+    bounds = [length * chunk // num_chunks for chunk in range(num_chunks + 1)]
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if start < stop]
+
+
+def count_branches(
+    prover: SLDProver, goal: Goal | Atom, extra_rules: list[Rule]
+) -> int:
+    ctx = prover._build_context(extra_rules)
+    adjusted_goal = prover._adjust_goal(goal, ctx)
+    return sum(len(rules) for _sim, rules in ctx.candidates(adjusted_goal.statement))
+
+
+def slice_candidate_groups(
+    candidate_groups: list[CandidateGroup], start: int, stop: int
+) -> list[CandidateGroup]:
+    """keep only the candidate rules between start and stop, counting across all the groups"""
+    sliced: list[CandidateGroup] = []
+    offset = 0
+    for similarity, rules in candidate_groups:
+        group_start = max(start - offset, 0)
+        group_stop = min(stop - offset, len(rules))
+        if group_start < group_stop:
+            # fact tables are sliced as a range of rows, which are matched like the whole table
+            sliced.append(
+                (
+                    similarity,
+                    FactTableRows(rules, group_start, group_stop)
+                    if isinstance(rules, FactTable)
+                    else rules[group_start:group_stop],
+                )
+            )
+        offset += len(rules)
+    return sliced
+
+
+def prove_branches(
+    prover: SLDProver,
+    goal: Goal | Atom,
+    extra_rules: list[Rule],
+    branch_range: BranchRange,
+) -> list[Proof]:
+    """find every proof of the goal which starts with one of the given top-level branches"""
+    if branch_range is None:
+        return list(prover.iter_proofs(goal, extra_rules))
+    ctx = prover._build_context(extra_rules)
+    adjusted_goal = prover._adjust_goal(goal, ctx)
+    candidate_groups = slice_candidate_groups(
+        ctx.candidates(adjusted_goal.statement), *branch_range
+    )
+    return [
+        Proof(step, proof_state.substitutions)
+        for proof_state, step in resolve_rules(
+            adjusted_goal,
+            prover.max_proof_depth,
+            ProofState(),
+            ctx,
+            candidate_groups,
+        )
+    ]
+
+
+# -- worker process state and tasks --
+
+_worker_prover: Optional[SLDProver] = None
+_worker_registry: Optional[SymbolRegistry] = None
+
+
+def _init_worker(rules: list[Rule], settings: dict[str, Any]) -> None:
+    global _worker_prover, _worker_registry
+    _worker_prover = SLDProver(rules, **settings)
+    _worker_registry = SymbolRegistry(rules)
+
+
+def _prove_many_task(payload: bytes) -> bytes:
+    assert _worker_prover is not None and _worker_registry is not None
+    goals, extra_rules = _worker_registry.loads(payload)
+    registry = register_query(_worker_registry, goals, extra_rules)
+    return registry.dumps(_worker_prover.prove_many(goals, extra_rules))
+
+
+def _prove_all_task(payload: bytes) -> bytes:
+    assert _worker_prover is not None and _worker_registry is not None
+    goal, extra_rules, branch_range = _worker_registry.loads(payload)
+    registry = register_query(_worker_registry, [goal], extra_rules)
+    return registry.dumps(
+        prove_branches(_worker_prover, goal, extra_rules, branch_range)
+    )
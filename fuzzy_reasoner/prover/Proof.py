@@ -1,6 +1,6 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
 from immutables import Map
 
 from fuzzy_reasoner.prover.operations.substitution import SubstitutionsMap, resolve_term
@@ -22,26 +22,131 @@ class ProofNode:
     substitutions: SubstitutionsMap = Map()
 
 
-@dataclass(frozen=True, eq=False)
+class ProofStep(NamedTuple):
+    """
+    Compact record of one resolution step, which the search builds instead of a ProofNode.
+    Steps keep a reference to the persistent substitutions map they finished with,
+    rather than a copy, so each ProofNode gets the same substitutions it always has.
+    The ProofNode tree is built from the steps only when a proof's nodes are actually needed.
+    """
+
+    goal: Atom
+    rule: Rule
+    goal_scope: int
+    rule_scope: int
+    unification_similarity: float
+    overall_similarity: float
+    # the proof of the last goal in the rule's body, linking back to the ones before it
+    last_child: Optional[StepChain] = None
+    # the substitutions when the step finished, or None to use the ones of the step above it,
+    # for searches which don't keep persistent substitutions, like the binding store
+    substitutions: Optional[SubstitutionsMap] = None
+    # substitutions to layer over the step's own for this step,
+    # for steps reused from a proof found elsewhere, such as a tabled answer
+    extra_substitutions: Optional[SubstitutionsMap] = None
+
+    def resolve_substitutions(
+        self, parent_substitutions: SubstitutionsMap
+    ) -> SubstitutionsMap:
+        """the substitutions to resolve this step against, given the ones of the step above it"""
+        substitutions = (
+            parent_substitutions if self.substitutions is None else self.substitutions
+        )
+        if self.extra_substitutions is None:
+            return substitutions
+        return substitutions.update(self.extra_substitutions)
+
+    def children(self) -> list[ProofStep]:
+        steps = []
+        chain = self.last_child
+        while chain is not None:
+            steps.append(chain.step)
+            chain = chain.previous
+        steps.reverse()
+        return steps
+
+    def to_proof_node(self, parent_substitutions: SubstitutionsMap) -> ProofNode:
+        substitutions = self.resolve_substitutions(parent_substitutions)
+        return ProofNode(
+            self.goal,
+            self.rule,
+            goal_scope=self.goal_scope,
+            rule_scope=self.rule_scope,
+            unification_similarity=self.unification_similarity,
+            overall_similarity=self.overall_similarity,
+            substitutions=substitutions,
+            children=(
+                [child.to_proof_node(substitutions) for child in self.children()]
+                if self.last_child is not None
+                else None
+            ),
+        )
+
+
+class StepChain(NamedTuple):
+    """a proof step along with a back-pointer to the step proving the goal before it"""
+
+    step: ProofStep
+    previous: Optional[StepChain]
+
+
+@dataclass(frozen=True, eq=False, init=False)
 class Proof:
-    head: ProofNode
+    """
+    A proof of a goal. Proofs found by the search hold just the ProofStep of the goal and
+    the substitutions the proof finished with, and only build the tree of ProofNodes
+    the first time head is accessed, so proofs which are never looked at stay cheap.
+    """
+
+    step: Optional[ProofStep]
+    substitutions: SubstitutionsMap
+    # the tree of ProofNodes, which is only built from the step when it's first needed
+    _head: Optional[ProofNode] = field(default=None, repr=False)
+
+    def __init__(
+        self, head: ProofNode | ProofStep, substitutions: SubstitutionsMap = Map()
+    ) -> None:
+        object.__setattr__(self, "substitutions", substitutions)
+        if isinstance(head, ProofNode):
+            object.__setattr__(self, "step", None)
+            object.__setattr__(self, "_head", head)
+        else:
+            object.__setattr__(self, "step", head)
+            object.__setattr__(self, "_head", None)
+
+    @property
+    def head(self) -> ProofNode:
+        if self._head is None:
+            assert self.step is not None
+            # the proof is frozen, but caching the tree doesn't change what it describes
+            object.__setattr__(
+                self, "_head", self.step.to_proof_node(self.substitutions)
+            )
+        assert self._head is not None
+        return self._head
 
     @property
     def goal(self) -> Atom:
-        return self.head.goal
+        return self.step.goal if self.step is not None else self.head.goal
 
     @property
     def similarity_score(self) -> float:
+        if self.step is not None:
+            return self.step.overall_similarity
         return self.head.overall_similarity
 
     @property
     def variable_bindings(self) -> Map[Variable, Constant | Variable]:
+        if self.step is not None:
+            goal_scope = self.step.goal_scope
+            substitutions = self.step.resolve_substitutions(self.substitutions)
+        else:
+            goal_scope = self.head.goal_scope
+            substitutions = self.head.substitutions
         bindings: dict[Variable, Constant | Variable] = {}
         for term in self.goal.terms:
             if isinstance(term, Variable):
-                bindings[term] = resolve_term(
-                    term, self.head.goal_scope, self.head.substitutions
-                )
+                bindings[term] = resolve_term(term, goal_scope, substitutions)
         return Map(bindings)
 
     def __str__(self) -> str:
@@ -0,0 +1,89 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from fuzzy_reasoner.prover.OverlayRuleIndex import OverlayRuleIndex
+from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.RuleIndex import CandidateGroup, RuleIndex
+from fuzzy_reasoner.prover.SearchBudget import SearchBudget
+from fuzzy_reasoner.prover.SearchHooks import SearchHooks, TracedSimilarity
+from fuzzy_reasoner.prover.operations.substitution import ScopeAllocator
+from fuzzy_reasoner.prover.operations.unify import unify_failure_reason
+from fuzzy_reasoner.similarity import SimilarityFunc
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+
+if TYPE_CHECKING:
+    from fuzzy_reasoner.prover.operations.iterative_deepening import FailureMemo
+    from fuzzy_reasoner.prover.operations.tabling import TableStore
+
+
+@dataclass(frozen=True, eq=False)
+class ProofContext:
+    """
+    Everything the proof search operations need which stays the same for a whole proof run
+    """
+
+    rule_index: RuleIndex | OverlayRuleIndex
+    similarity_func: Optional[SimilarityFunc]
+    min_similarity_threshold: float
+    # set when subgoals should be tabled rather than re-proven every time they appear
+    tables: Optional[TableStore] = None
+    # set when subgoals which failed should be remembered, for iterative deepening
+    failures: Optional[FailureMemo] = None
+    # hands out the variable scopes for this run
+    scopes: ScopeAllocator = field(default_factory=ScopeAllocator)
+    # candidate rules already looked up for each goal predicate and arity during this run
+    candidate_cache: dict[tuple[Predicate, int], list[CandidateGroup]] = field(
+        default_factory=dict
+    )
+    # set when the search should report what it's doing, see SearchHooks
+    hooks: Optional[SearchHooks] = None
+    # set when every goal expansion should be charged to a budget, see SearchBudget
+    budget: Optional[SearchBudget] = None
+    # whether fact tables can compare constants in bulk with the prover's own similarity,
+    # which isn't the case when similarity_func replaces it
+    bulk_fact_similarity: bool = True
+
+    def candidates(self, goal: Atom) -> list[CandidateGroup]:
+        """look up the candidate rules for the goal, reusing any earlier lookup for its predicate"""
+        key = (goal.predicate, len(goal.terms))
+        groups = self.candidate_cache.get(key)
+        if groups is None:
+            groups = self.rule_index.candidates(goal, self.min_similarity_threshold)
+            self.candidate_cache[key] = groups
+        return groups
+
+    def prefetch_candidates(self, goals: Iterable[Atom]) -> None:
+        """look up the candidate rules for many goals at once, so they can be scored in bulk"""
+        new_goals: dict[tuple[Predicate, int], Atom] = {}
+        for goal in goals:
+            key = (goal.predicate, len(goal.terms))
+            if key not in self.candidate_cache:
+                new_goals.setdefault(key, goal)
+        groups_list = self.rule_index.candidates_many(
+            list(new_goals.values()), self.min_similarity_threshold
+        )
+        self.candidate_cache.update(zip(new_goals.keys(), groups_list))
+
+    def report_unify_failure(
+        self, goal: Goal, rule: Rule, predicate_similarity: Optional[float]
+    ) -> None:
+        """tell the hooks why the rule failed to unify with the goal"""
+        assert self.hooks is not None
+        similarity_func = self.similarity_func
+        # working out the reason isn't part of the search, so it shouldn't be traced
+        if isinstance(similarity_func, TracedSimilarity):
+            similarity_func = similarity_func.similarity_func
+        self.hooks.on_unify_failure(
+            goal,
+            rule,
+            unify_failure_reason(
+                rule,
+                goal,
+                similarity_func,
+                self.min_similarity_threshold,
+                predicate_similarity,
+            ),
+        )
@@ -0,0 +1,554 @@
+from __future__ import annotations
+from threading import Lock
+from typing import (
+    Hashable,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+import numpy as np
+from numpy.typing import NDArray
+
+from fuzzy_reasoner.prover.EmbeddingMatrix import EmbeddingMatrix
+from fuzzy_reasoner.prover.FactTable import FactTable
+from fuzzy_reasoner.prover.LSHIndex import LSHConfig, LSHIndex
+from fuzzy_reasoner.prover.SymbolTable import SymbolTable
+from fuzzy_reasoner.similarity import SimilarityFunc, cosine_similarity, symbol_compare
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+
+# a group of candidate rules, along with their head predicate similarity if it's already known
+CandidateGroup = Tuple[Optional[float], Sequence[Rule]]
+
+BucketKey = TypeVar("BucketKey", bound=Hashable)
+
+
+class FuzzyPredicates(NamedTuple):
+    """the distinct embedded head predicates of one arity, ready for bulk scoring"""
+
+    # in the same storage as the index's embeddings
+    matrix: EmbeddingMatrix
+    rule_groups: list[list[Sequence[Rule]]]
+    ann_index: Optional[LSHIndex]
+
+
+class RuleIndex:
+    """
+    Indexes rules by the symbol and arity of their head predicate, so the prover only
+    needs to try unifying a goal against rules which could possibly match it.
+    Rules whose head predicate has an embedding are also kept in a fuzzy fallback bucket
+    per arity, since they can match goals with a different symbol under fuzzy unification.
+
+    If an EmbeddingMatrix is provided and the similarity func is cosine_similarity,
+    the fuzzy bucket is scored against the goal predicate with a single matrix-vector product,
+    and predicates below the similarity threshold are filtered out in bulk.
+    For very large numbers of predicates, an LSHConfig can be given to only score
+    the predicates an approximate nearest-neighbour index finds likely to pass the threshold.
+
+    With fact_store, ground facts are kept in a FactTable per head predicate and arity
+    instead of in the rule buckets, so goals can be matched against all of them at once.
+    This is only used with the built-in similarity funcs, which compare constants predictably.
+    The fact tables number their constants in the given SymbolTable, or a new one.
+    """
+
+    similarity_func: Optional[SimilarityFunc]
+    embeddings: Optional[EmbeddingMatrix]
+    ann_config: Optional[LSHConfig]
+    fact_store: bool
+    symbols: SymbolTable
+
+    def __init__(
+        self,
+        rules: Iterable[Rule],
+        similarity_func: Optional[SimilarityFunc] = None,
+        embeddings: Optional[EmbeddingMatrix] = None,
+        ann_config: Optional[LSHConfig] = None,
+        fact_store: bool = True,
+        symbols: Optional[SymbolTable] = None,
+    ) -> None:
+        self.similarity_func = similarity_func
+        self.embeddings = embeddings if similarity_func is cosine_similarity else None
+        self.ann_config = ann_config
+        self.fact_store = fact_store and similarity_func in (
+            None,
+            symbol_compare,
+            cosine_similarity,
+        )
+        self.symbols = symbols or SymbolTable()
+        # every rule added as an object, in order, which excludes facts loaded as columns
+        self._rules: list[Rule] = []
+        self._seen: set[Rule] = set()
+        self._by_symbol: dict[tuple[str, int], list[Rule]] = {}
+        self._plain_by_symbol: dict[tuple[str, int], list[Rule]] = {}
+        self._embedded_by_arity: dict[int, list[Rule]] = {}
+        self._by_arity: dict[int, list[Rule]] = {}
+        # distinct embedded head predicates per arity, for vectorized scoring
+        self._fuzzy_predicates: dict[int, dict[Predicate, list[Rule]]] = {}
+        self._fuzzy_matrices: dict[int, FuzzyPredicates] = {}
+        # fact tables by head symbol, and the tables of embedded predicates by arity
+        self._fact_tables: dict[tuple[str, int], dict[Predicate, FactTable]] = {}
+        self._embedded_fact_tables: dict[int, dict[Predicate, FactTable]] = {}
+        self._lock = Lock()
+        for rule in rules:
+            self._add_rule(rule)
+
+    def __len__(self) -> int:
+        return len(self._rules) + sum(
+            table.num_loaded for table in self._iter_fact_tables()
+        )
+
+    def __contains__(self, rule: object) -> bool:
+        if rule in self._seen:
+            return True
+        # loaded facts are only in their table
+        if not isinstance(rule, Rule) or not self._is_stored_fact(rule):
+            return False
+        key = (rule.head.predicate.symbol, len(rule.head.terms))
+        table = self._fact_tables.get(key, {}).get(rule.head.predicate)
+        return table is not None and rule in table
+
+    @property
+    def rules(self) -> list[Rule]:
+        """every indexed rule, which means building the rules of any facts loaded as columns"""
+        return [
+            *self._rules,
+            *(
+                fact
+                for table in self._iter_fact_tables()
+                for fact in table.loaded_facts()
+            ),
+        ]
+
+    def add_rules(self, rules: Iterable[Rule]) -> None:
+        """
+        Index more rules, updating only the buckets of their head predicates.
+        Proofs already running may or may not see rules added while they run.
+        """
+        with self._lock:
+            for rule in rules:
+                self._add_rule(rule)
+
+    def remove_rules(self, rules: Iterable[Rule]) -> list[Rule]:
+        """
+        Remove rules from the index, returning the ones which were actually indexed.
+        The affected buckets are replaced rather than modified in place, so proofs already
+        running keep seeing the rules they looked up before the removal.
+        """
+        with self._lock:
+            removed = [rule for rule in dict.fromkeys(rules) if rule in self]
+            if not removed:
+                return []
+            removed_set = set(removed)
+            self._seen -= removed_set
+            self._rules = [rule for rule in self._rules if rule not in removed_set]
+            removed_rules = [rule for rule in removed if not self._is_stored_fact(rule)]
+            symbol_keys = {
+                (rule.head.predicate.symbol, len(rule.head.terms))
+                for rule in removed_rules
+            }
+            arities = {len(rule.head.terms) for rule in removed_rules}
+            filter_buckets(self._by_symbol, symbol_keys, removed_set)
+            filter_buckets(self._plain_by_symbol, symbol_keys, removed_set)
+            filter_buckets(self._embedded_by_arity, arities, removed_set)
+            filter_buckets(self._by_arity, arities, removed_set)
+            for rule in removed_rules:
+                predicate = rule.head.predicate
+                arity = len(rule.head.terms)
+                predicate_rules = self._fuzzy_predicates.get(arity)
+                if predicate.embedding is None or not predicate_rules:
+                    continue
+                filter_buckets(predicate_rules, [predicate], removed_set)
+                self._fuzzy_matrices.pop(arity, None)
+            fact_tables = {
+                (rule.head.predicate, len(rule.head.terms))
+                for rule in removed
+                if self._is_stored_fact(rule)
+            }
+            for predicate, arity in fact_tables:
+                key = (predicate.symbol, arity)
+                old_table = self._fact_tables[key][predicate]
+                # the new table won't have any loaded facts, so the rest are kept as objects
+                for fact in old_table.loaded_facts():
+                    if fact not in removed_set:
+                        self._seen.add(fact)
+                        self._rules.append(fact)
+                table = old_table.without(removed_set)
+                replace_fact_table(self._fact_tables, key, predicate, table)
+                if predicate.embedding is not None:
+                    replace_fact_table(
+                        self._embedded_fact_tables, arity, predicate, table
+                    )
+                    self._fuzzy_matrices.pop(arity, None)
+            return removed
+
+    def rules_with_head(self, head: Atom) -> list[Rule]:
+        """return the indexed rules whose head is this exact atom"""
+        key = (head.predicate.symbol, len(head.terms))
+        fact_table: Sequence[Rule] = self._fact_tables.get(key, {}).get(
+            head.predicate, []
+        )
+        return [
+            rule
+            for rules in (self._by_symbol.get(key, []), fact_table)
+            for rule in rules
+            if rule.head is head
+        ]
+
+    def _is_stored_fact(self, rule: Rule) -> bool:
+        return self.fact_store and is_ground_fact(rule)
+
+    def add_fact_columns(
+        self,
+        predicate: Predicate,
+        columns: NDArray[np.int64],
+        embedded_positions: Optional[Sequence[bool]] = None,
+    ) -> None:
+        """
+        Index ground facts given as an (n, arity) array of constant ids from this index's SymbolTable,
+        e.g. loaded from a file, without building a rule for each fact until it's needed.
+        Without a fact store, or if the predicate already has facts, the rules are built up-front.
+        """
+        arity = columns.shape[1]
+        with self._lock:
+            if self.fact_store and predicate not in self._fact_tables.get(
+                (predicate.symbol, arity), {}
+            ):
+                self._add_fact_table(
+                    FactTable(
+                        predicate,
+                        arity,
+                        self.symbols,
+                        fuzzy_constants=self.similarity_func is cosine_similarity,
+                        loaded_columns=columns,
+                        embedded_positions=embedded_positions,
+                        embeddings=self.embeddings,
+                    )
+                )
+                return
+            loaded = FactTable(
+                predicate, arity, self.symbols, False, loaded_columns=columns
+            )
+            for fact in loaded:
+                self._add_rule(fact)
+
+    def rules_and_fact_tables(self) -> tuple[list[Rule], list[FactTable]]:
+        """the indexed rules which aren't stored as facts, and the fact tables storing the rest"""
+        with self._lock:
+            rules = [rule for rule in self._rules if not self._is_stored_fact(rule)]
+            return rules, list(self._iter_fact_tables())
+
+    def _iter_fact_tables(self) -> Iterator[FactTable]:
+        for tables in list(self._fact_tables.values()):
+            yield from list(tables.values())
+
+    def _add_rule(self, rule: Rule) -> None:
+        # rules have identity semantics, so the same rule object is only indexed once
+        if rule in self:
+            return
+        self._seen.add(rule)
+        self._rules.append(rule)
+        if self._is_stored_fact(rule):
+            self._add_fact(rule)
+            return
+        head = rule.head
+        arity = len(head.terms)
+        key = (head.predicate.symbol, arity)
+        self._by_symbol.setdefault(key, []).append(rule)
+        self._by_arity.setdefault(arity, []).append(rule)
+        if head.predicate.embedding is None:
+            self._plain_by_symbol.setdefault(key, []).append(rule)
+        else:
+            self._embedded_by_arity.setdefault(arity, []).append(rule)
+            predicate_rules = self._fuzzy_predicates.setdefault(arity, {})
+            predicate_group = predicate_rules.get(head.predicate)
+            if predicate_group is not None:
+                # the matrix shares this group, so it doesn't need rebuilding
+                predicate_group.append(rule)
+            else:
+                predicate_rules[head.predicate] = [rule]
+                self._fuzzy_matrices.pop(arity, None)
+
+    def _add_fact(self, fact: Rule) -> None:
+        predicate = fact.head.predicate
+        arity = len(fact.head.terms)
+        table = self._fact_tables.get((predicate.symbol, arity), {}).get(predicate)
+        if table is not None:
+            table.append(fact)
+            return
+        self._add_fact_table(
+            FactTable(
+                predicate,
+                arity,
+                self.symbols,
+                fuzzy_constants=self.similarity_func is cosine_similarity,
+                facts=[fact],
+                embeddings=self.embeddings,
+            )
+        )
+
+    def _add_fact_table(self, table: FactTable) -> None:
+        predicate = table.predicate
+        arity = table.arity
+        self._fact_tables.setdefault((predicate.symbol, arity), {})[predicate] = table
+        if predicate.embedding is not None:
+            self._embedded_fact_tables.setdefault(arity, {})[predicate] = table
+            self._fuzzy_matrices.pop(arity, None)
+
+    def _fact_groups(
+        self, key: tuple[str, int], plain_only: bool = False
+    ) -> list[CandidateGroup]:
+        """the fact tables with this head symbol, which always match it exactly"""
+        return [
+            (1.0, table)
+            for table in list(self._fact_tables.get(key, {}).values())
+            if not plain_only or table.predicate.embedding is None
+        ]
+
+    def _arity_groups(self, arity: int) -> list[CandidateGroup]:
+        """every rule and fact table of the arity, with their similarities still to compute"""
+        return [
+            (None, self._by_arity.get(arity, [])),
+            *(
+                (None, table)
+                for (_symbol, table_arity), tables in list(self._fact_tables.items())
+                if table_arity == arity
+                for table in list(tables.values())
+            ),
+        ]
+
+    def candidates(
+        self, goal: Atom, min_similarity_threshold: float = 0.5
+    ) -> list[CandidateGroup]:
+        """
+        Return groups of every rule which could unify with the goal under the similarity function.
+        Rules with the wrong arity can never unify, and for the built-in similarity functions
+        we know that predicates without embeddings are only ever compared by symbol.
+        A custom similarity function can match anything, so only arity is used then,
+        and so does a non-positive threshold, which lets mismatched predicates unify.
+        """
+        arity = len(goal.terms)
+        key = (goal.predicate.symbol, arity)
+        if min_similarity_threshold <= 0:
+            return self._arity_groups(arity)
+        if self.similarity_func is None or self.similarity_func is symbol_compare:
+            return [(1.0, self._by_symbol.get(key, [])), *self._fact_groups(key)]
+        if self.similarity_func is cosine_similarity:
+            if goal.predicate.embedding is None:
+                return [(1.0, self._by_symbol.get(key, [])), *self._fact_groups(key)]
+            plain_groups = [
+                (1.0, self._plain_by_symbol.get(key, [])),
+                *self._fact_groups(key, plain_only=True),
+            ]
+            if self.embeddings is not None:
+                return [
+                    *plain_groups,
+                    *self._score_fuzzy_predicates(
+                        goal.predicate, arity, min_similarity_threshold
+                    ),
+                ]
+            embedded_tables = list(self._embedded_fact_tables.get(arity, {}).values())
+            return [
+                *plain_groups,
+                (None, self._embedded_by_arity.get(arity, [])),
+                *((None, table) for table in embedded_tables),
+            ]
+        return self._arity_groups(arity)
+
+    def candidates_many(
+        self, goals: Sequence[Atom], min_similarity_threshold: float = 0.5
+    ) -> list[list[CandidateGroup]]:
+        """
+        Return the candidate groups for each of the goals, like calling candidates() on each one.
+        With vectorized scoring, the distinct goal predicates of each arity are scored against
+        every fuzzy head predicate in a single matrix-matrix product.
+        """
+        results: list[Optional[list[CandidateGroup]]] = [None] * len(goals)
+        if self.embeddings is not None and min_similarity_threshold > 0:
+            batches: dict[int, dict[Predicate, list[int]]] = {}
+            for position, goal in enumerate(goals):
+                if goal.predicate.embedding is not None:
+                    batch = batches.setdefault(len(goal.terms), {})
+                    batch.setdefault(goal.predicate, []).append(position)
+            for arity, batch in batches.items():
+                fuzzy_predicates = self._get_fuzzy_predicates(arity)
+                # the approximate index is per-query, so leave those goals to candidates()
+                if fuzzy_predicates is not None and fuzzy_predicates.ann_index:
+                    continue
+                scored = self._score_fuzzy_predicate_batch(
+                    list(batch), fuzzy_predicates, min_similarity_threshold
+                )
+                for (predicate, positions), fuzzy_groups in zip(batch.items(), scored):
+                    key = (predicate.symbol, arity)
+                    groups = [
+                        (1.0, self._plain_by_symbol.get(key, [])),
+                        *self._fact_groups(key, plain_only=True),
+                        *fuzzy_groups,
+                    ]
+                    for position in positions:
+                        results[position] = groups
+        return [
+            groups
+            if groups is not None
+            else self.candidates(goal, min_similarity_threshold)
+            for goal, groups in zip(goals, results)
+        ]
+
+    def _score_fuzzy_predicate_batch(
+        self,
+        predicates: list[Predicate],
+        fuzzy_predicates: Optional[FuzzyPredicates],
+        min_similarity_threshold: float,
+    ) -> list[list[CandidateGroup]]:
+        assert self.embeddings is not None
+        if fuzzy_predicates is None:
+            return [[] for _predicate in predicates]
+        queries = np.array([self.embeddings.vector(pred) for pred in predicates])
+        # (fuzzy predicates, goal predicates)
+        all_similarities = fuzzy_predicates.matrix.scores(queries.T)
+        scored: list[list[CandidateGroup]] = []
+        for column in range(len(predicates)):
+            similarities = all_similarities[:, column]
+            matches = np.flatnonzero(similarities >= min_similarity_threshold)
+            scored.append(
+                [
+                    (float(similarities[match]), rules)
+                    for match in matches
+                    for rules in fuzzy_predicates.rule_groups[match]
+                ]
+            )
+        return scored
+
+    def _get_fuzzy_predicates(self, arity: int) -> Optional[FuzzyPredicates]:
+        assert self.embeddings is not None
+        if not self._fuzzy_predicates.get(arity) and not self._embedded_fact_tables.get(
+            arity
+        ):
+            return None
+        fuzzy_predicates = self._fuzzy_matrices.get(arity)
+        if fuzzy_predicates is not None:
+            return fuzzy_predicates
+        # the matrix is built lazily, so concurrent proofs must not build it more than once
+        with self._lock:
+            fuzzy_predicates = self._fuzzy_matrices.get(arity)
+            # rules may have been removed since the check above
+            predicate_rules = self._fuzzy_predicates.get(arity, {})
+            fact_tables = self._embedded_fact_tables.get(arity, {})
+            predicates = list(dict.fromkeys([*predicate_rules, *fact_tables]))
+            if fuzzy_predicates is None and predicates:
+                matrix = self.embeddings.select(predicates)
+                ann_index = (
+                    LSHIndex(matrix, self.ann_config)
+                    if self.ann_config and len(matrix) >= self.ann_config.min_index_size
+                    else None
+                )
+                # share the buckets, so adding rules to a known predicate doesn't need a rebuild
+                rule_groups: list[list[Sequence[Rule]]] = [
+                    [
+                        rules
+                        for rules in (predicate_rules.get(pred), fact_tables.get(pred))
+                        if rules
+                    ]
+                    for pred in predicates
+                ]
+                fuzzy_predicates = FuzzyPredicates(matrix, rule_groups, ann_index)
+                self._fuzzy_matrices[arity] = fuzzy_predicates
+        return fuzzy_predicates
+
+    def _score_fuzzy_predicates(
+        self,
+        predicate: Predicate,
+        arity: int,
+        min_similarity_threshold: float,
+        use_ann: bool = True,
+    ) -> list[CandidateGroup]:
+        assert self.embeddings is not None
+        fuzzy_predicates = self._get_fuzzy_predicates(arity)
+        if fuzzy_predicates is None:
+            return []
+        query = self.embeddings.vector(predicate)
+        if use_ann and fuzzy_predicates.ann_index:
+            matches, similarities = fuzzy_predicates.ann_index.search(
+                query, min_similarity_threshold
+            )
+        else:
+            all_similarities = fuzzy_predicates.matrix.scores(query)
+            matches = np.flatnonzero(all_similarities >= min_similarity_threshold)
+            similarities = all_similarities[matches]
+        return [
+            (float(similarity), rules)
+            for match, similarity in zip(matches, similarities)
+            for rules in fuzzy_predicates.rule_groups[match]
+        ]
+
+    def measure_ann_recall(
+        self, goals: Iterable[Atom], min_similarity_threshold: float
+    ) -> float:
+        """
+        Measure the fraction of fuzzy-matching rules for these goals that are still found
+        when using the approximate nearest-neighbour index, compared to an exact scan
+        """
+        if self.embeddings is None:
+            return 1.0
+        found = 0
+        expected = 0
+        for goal in goals:
+            if goal.predicate.embedding is None:
+                continue
+            arity = len(goal.terms)
+            exact = self._score_fuzzy_predicates(
+                goal.predicate, arity, min_similarity_threshold, use_ann=False
+            )
+            approximate = self._score_fuzzy_predicates(
+                goal.predicate, arity, min_similarity_threshold
+            )
+            approximate_rules = {rule for _sim, group in approximate for rule in group}
+            for _similarity, group in exact:
+                expected += len(group)
+                found += sum(1 for rule in group if rule in approximate_rules)
+        return found / expected if expected else 1.0
+
+
+def filter_buckets(
+    buckets: dict[BucketKey, list[Rule]],
+    keys: Iterable[BucketKey],
+    removed: set[Rule],
+) -> None:
+    """replace each of these buckets with a copy without the removed rules, dropping empty buckets"""
+    for key in keys:
+        bucket = buckets.get(key)
+        if bucket is None:
+            continue
+        remaining = [rule for rule in bucket if rule not in removed]
+        if remaining:
+            buckets[key] = remaining
+        else:
+            del buckets[key]
+
+
+def replace_fact_table(
+    tables: dict[BucketKey, dict[Predicate, FactTable]],
+    key: BucketKey,
+    predicate: Predicate,
+    table: Optional[FactTable],
+) -> None:
+    """replace the predicate's table in a copy of its bucket, dropping empty tables and buckets"""
+    bucket = dict(tables[key])
+    if table is not None:
+        bucket[predicate] = table
+    else:
+        del bucket[predicate]
+    if bucket:
+        tables[key] = bucket
+    else:
+        del tables[key]
+
+
+def is_ground_fact(rule: Rule) -> bool:
+    """whether the rule has no body and only constants in its head"""
+    return not rule.body and all(isinstance(term, Constant) for term in rule.head.terms)
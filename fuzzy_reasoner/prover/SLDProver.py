@@ -1,21 +1,72 @@
 from __future__ import annotations
-from typing import Optional
+from functools import partial
+from itertools import islice
+from typing import Any, Generator, Iterable, Iterator, Optional, Sequence
+from immutables import Map
+from fuzzy_reasoner.prover.EmbeddingMatrix import (
+    EMBEDDING_STORAGES,
+    EmbeddingMatrix,
+    iter_rule_symbols,
+)
 from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.KnowledgeFile import load_knowledge, save_knowledge
+from fuzzy_reasoner.prover.LSHIndex import LSHConfig
+from fuzzy_reasoner.prover.OverlayRuleIndex import OverlayRuleIndex
+from fuzzy_reasoner.prover.ProofContext import ProofContext
 from fuzzy_reasoner.prover.ProofState import ProofState
-from fuzzy_reasoner.prover.operations.recurse import recurse
-from fuzzy_reasoner.prover.operations.substitution import generate_variable_scope
-from fuzzy_reasoner.similarity import SimilarityFunc, cosine_similarity
+from fuzzy_reasoner.prover.RuleIndex import RuleIndex
+from fuzzy_reasoner.prover.SearchBudget import (
+    BudgetExhausted,
+    SearchBudget,
+    stop_when_exhausted,
+)
+from fuzzy_reasoner.prover.SearchHooks import SearchHooks, TracedSimilarity
+from fuzzy_reasoner.prover.SimilarityGraph import SimilarityGraph
+from fuzzy_reasoner.prover.SimilarityPrefetcher import SimilarityPrefetcher
+from fuzzy_reasoner.prover.SymbolTable import SymbolTable
+from fuzzy_reasoner.prover.operations.best_first import (
+    best_first_search,
+    best_first_search_async,
+)
+from fuzzy_reasoner.prover.operations.iterative_deepening import (
+    FailureMemo,
+    iterative_deepening_search,
+    proof_depth,
+    proofs_at_depth,
+)
+from fuzzy_reasoner.prover.operations.recurse import recurse, recurse_with_store
+from fuzzy_reasoner.prover.operations.substitution import BindingStore
+from fuzzy_reasoner.prover.operations.tabling import TableStore
+from fuzzy_reasoner.similarity import (
+    AsyncSimilarityFunc,
+    SimilarityCache,
+    SimilarityFunc,
+    cosine_similarity,
+    symbol_compare,
+)
 
 from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Variable import Variable
 from fuzzy_reasoner.prover.Proof import Proof
 from fuzzy_reasoner.types.Knowledge import Knowledge
+from fuzzy_reasoner.types.Predicate import Predicate
 from fuzzy_reasoner.types.Rule import Rule
 
 
 class SLDProver:
     max_proof_depth: int
+    tabling: bool
+    binding_store: bool
+    iterative_deepening: bool
+    fact_store: bool
     min_similarity_threshold: float
-    rules: frozenset[Rule]
+    rule_index: RuleIndex
+    embeddings: Optional[EmbeddingMatrix]
+    embedding_storage: Optional[str]
+    similarity_graph: Optional[SimilarityGraph]
+    similarity_cache: Optional[SimilarityCache]
+    ann_config: Optional[LSHConfig]
     # MyPy freaks out if this isn't optional, see https://github.com/python/mypy/issues/708
     similarity_func: Optional[SimilarityFunc]
 
@@ -25,46 +76,548 @@ class SLDProver:
         max_proof_depth: int = 10,
         min_similarity_threshold: float = 0.5,
         similarity_func: Optional[SimilarityFunc] = cosine_similarity,
+        similarity_cache_size: Optional[int] = None,
+        ann_config: Optional[LSHConfig] = None,
+        tabling: bool = False,
+        binding_store: bool = False,
+        fact_store: bool = True,
+        symbols: Optional[SymbolTable] = None,
+        embeddings: Optional[EmbeddingMatrix] = None,
+        iterative_deepening: bool = False,
+        similarity_graph: bool | SimilarityGraph = False,
+        embedding_storage: Optional[str] = None,
     ) -> None:
+        if tabling and binding_store:
+            raise ValueError("tabling can't be combined with binding_store")
+        if iterative_deepening and (tabling or binding_store):
+            raise ValueError(
+                "iterative_deepening can't be combined with tabling or binding_store"
+            )
+        if (
+            embedding_storage is not None
+            and embedding_storage not in EMBEDDING_STORAGES
+        ):
+            raise ValueError(f"embedding_storage must be one of {EMBEDDING_STORAGES}")
         self.max_proof_depth = max_proof_depth
+        self.tabling = tabling
+        self.binding_store = binding_store
+        self.iterative_deepening = iterative_deepening
+        self.fact_store = fact_store
         self.min_similarity_threshold = min_similarity_threshold
         self.similarity_func = similarity_func
-        self.rules = process_knowledge(knowledge)
+        rules = knowledge_to_rules(knowledge)
+        self.embedding_storage = embedding_storage
+        # with the default cosine similarity, all embeddings are normalized once up-front,
+        # and stored in float64 unless another storage is asked for
+        self.embeddings = None
+        if similarity_func is cosine_similarity:
+            if embeddings is None:
+                embeddings = EmbeddingMatrix.from_rules(
+                    rules, embedding_storage or "float64"
+                )
+            elif embedding_storage and embeddings.storage != embedding_storage:
+                embeddings = embeddings.astype(embedding_storage)
+            self.embeddings = embeddings
+        # the symbols which can match each other are precomputed once for the threshold,
+        # reusing a saved graph if it was built for the same or a lower threshold
+        self.similarity_graph = None
+        if similarity_graph is not False and self.embeddings is not None:
+            self.similarity_graph = (
+                similarity_graph
+                if isinstance(similarity_graph, SimilarityGraph)
+                and similarity_graph.embeddings is self.embeddings
+                and similarity_graph.min_similarity <= min_similarity_threshold
+                else SimilarityGraph(self.embeddings, min_similarity_threshold)
+            )
+        self.ann_config = ann_config
+        self.rule_index = RuleIndex(
+            rules, similarity_func, self.embeddings, ann_config, fact_store, symbols
+        )
+        # opt-in LRU cache of similarity calls, shared across all queries to this prover
+        self.similarity_cache = (
+            SimilarityCache(self._base_similarity_func, similarity_cache_size)
+            if similarity_cache_size and self._base_similarity_func
+            else None
+        )
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, **settings: Any) -> SLDProver:
+        """
+        Create a prover from knowledge saved with save(), along with any other constructor arguments.
+        With mmap, the embeddings and ground facts are memory-mapped rather than read in,
+        and the rules for facts are only built when a proof needs them, so loading is fast
+        even for very large knowledge bases. With similarity_graph=True, a saved similarity graph
+        is reused if it was built for a threshold no higher than this prover's.
+        """
+        knowledge = load_knowledge(path, mmap)
+        if (
+            settings.get("similarity_graph") is True
+            and knowledge.similarity_graph is not None
+        ):
+            settings["similarity_graph"] = knowledge.similarity_graph
+        prover = cls(
+            knowledge.rules,
+            symbols=knowledge.symbols,
+            embeddings=knowledge.embeddings,
+            **settings,
+        )
+        for facts in knowledge.facts:
+            prover.rule_index.add_fact_columns(*facts)
+        return prover
+
+    def save(self, path: str) -> None:
+        """save the knowledge base to a directory, to be loaded again with SLDProver.load()"""
+        save_knowledge(
+            self.rule_index,
+            path,
+            self.similarity_graph,
+            self.embeddings.storage if self.embeddings else "float64",
+        )
+
+    @property
+    def rules(self) -> frozenset[Rule]:
+        """every rule currently in the knowledge base"""
+        return frozenset(self.rule_index.rules)
+
+    def add_knowledge(self, knowledge: Knowledge) -> None:
+        """
+        Add rules and facts to the knowledge base, only updating the index buckets they belong in.
+        With a similarity graph, only the similarities of the new symbols are computed.
+        """
+        rules = knowledge_to_rules(knowledge)
+        self.rule_index.add_rules(rules)
+        if self.similarity_graph is not None:
+            try:
+                self.similarity_graph.embeddings.add(iter_rule_symbols(rules))
+            except ValueError:
+                # symbols left out of the graph are compared directly instead
+                return
+            self.similarity_graph.extend()
+
+    def retract(self, knowledge: Knowledge) -> int:
+        """
+        Remove rules and facts from the knowledge base, returning how many rules were removed.
+        Rules are matched by identity, and a bare atom removes the facts which were added for it.
+        """
+        rules: list[Rule] = []
+        for item in knowledge:
+            if isinstance(item, Rule):
+                rules.append(item)
+            else:
+                rules.extend(
+                    rule
+                    for rule in self.rule_index.rules_with_head(item)
+                    if not rule.body
+                )
+        return len(self.rule_index.remove_rules(rules))
+
+    @property
+    def _base_similarity_func(self) -> Optional[SimilarityFunc]:
+        if self.similarity_graph is not None:
+            return self.similarity_graph.similarity
+        return self.embeddings.similarity if self.embeddings else self.similarity_func
+
+    @property
+    def _unify_similarity_func(self) -> Optional[SimilarityFunc]:
+        """the similarity func to use during unification, after any caching and precomputation"""
+        return self.similarity_cache or self._base_similarity_func
 
     def prove(
-        self, goal: Goal | Atom, extra_knowledge: Optional[Knowledge] = None
+        self,
+        goal: Goal | Atom,
+        extra_knowledge: Optional[Knowledge] = None,
+        hooks: Optional[SearchHooks] = None,
+        budget: Optional[SearchBudget] = None,
     ) -> Proof | None:
-        result_graphs = self.prove_all(goal, extra_knowledge)
+        """
+        Find the proof of the goal with the highest similarity, or None if there isn't one.
+        With a budget, this returns None if the budget ran out before a proof was found.
+        With iterative_deepening, this is the most similar of the shallowest proofs instead.
+        """
+        result_graphs = self.prove_top_k(goal, 1, extra_knowledge, hooks, budget)
         return result_graphs[0] if len(result_graphs) > 0 else None
 
     def prove_all(
-        self, goal: Goal | Atom, extra_knowledge: Optional[Knowledge] = None
+        self,
+        goal: Goal | Atom,
+        extra_knowledge: Optional[Knowledge] = None,
+        hooks: Optional[SearchHooks] = None,
+        budget: Optional[SearchBudget] = None,
+        distinct: bool = False,
     ) -> list[Proof]:
-        adjusted_goal = (
-            goal
-            if isinstance(goal, Goal)
-            else Goal(goal, scope=generate_variable_scope())
+        """
+        Find every proof of the goal, in descending order of similarity.
+        With a budget, only the proofs found before the budget ran out are returned.
+        With distinct, only the proof with the highest similarity is kept for each set of
+        variable bindings. Without tabling or iterative_deepening, this uses a best-first search
+        which prunes branches as soon as they settle on bindings which were already found.
+        With iterative_deepening, proofs with the same similarity are ordered shallowest first.
+        Every depth is needed anyway, so the search only goes depth by depth with a budget,
+        which could run out before the deeper proofs are found.
+        """
+        if distinct and not self.tabling and not self.iterative_deepening:
+            return self.prove_top_k(
+                goal, None, extra_knowledge, hooks, budget, distinct=True
+            )
+        graphs = self._search_proofs(
+            goal, extra_knowledge, hooks, budget, deepen=budget is not None
         )
-        rules = (
-            self.rules.union(process_knowledge(extra_knowledge))
-            if extra_knowledge
-            else self.rules
+        proofs = sort_proofs(graphs, self.iterative_deepening)
+        return best_per_answer(proofs) if distinct else proofs
+
+    def prove_top_k(
+        self,
+        goal: Goal | Atom,
+        k: Optional[int],
+        extra_knowledge: Optional[Knowledge] = None,
+        hooks: Optional[SearchHooks] = None,
+        budget: Optional[SearchBudget] = None,
+        distinct: bool = False,
+    ) -> list[Proof]:
+        """
+        Find the k proofs with the highest similarity, in descending order of similarity.
+        This uses a best-first search which stops as soon as no unexplored branch
+        can beat the k-th best proof, rather than enumerating every proof.
+        With tabling, the tables are evaluated in full and the best answers are returned.
+        If the budget runs out, the best proofs found so far are returned, which are still
+        the best overall, but there may be fewer than k of them.
+        With iterative_deepening, the shallowest proofs are returned instead, see _find_shallowest.
+        With distinct, each set of variable bindings is only returned once, by its best proof.
+        A k of None returns every proof.
+        """
+        if self.tabling:
+            return self.prove_all(goal, extra_knowledge, hooks, budget, distinct)[:k]
+        ctx = self._build_context(extra_knowledge, hooks, budget)
+        adjusted_goal = self._adjust_goal(goal, ctx)
+        if hooks is not None:
+            hooks.on_search_start(adjusted_goal, self.max_proof_depth)
+        try:
+            if self.iterative_deepening:
+                return self._find_shallowest(adjusted_goal, k, ctx, distinct)
+            proofs = best_first_search(
+                adjusted_goal, self.max_proof_depth, ctx, distinct
+            )
+            return list(islice(stop_when_exhausted(proofs), k))
+        finally:
+            if hooks is not None:
+                hooks.on_search_end(adjusted_goal)
+
+    def prove_many(
+        self,
+        goals: Sequence[Goal | Atom],
+        extra_knowledge: Optional[Knowledge] = None,
+        hooks: Optional[SearchHooks] = None,
+        budget: Optional[SearchBudget] = None,
+    ) -> list[Proof | None]:
+        """
+        Find the best proof of each goal, like calling prove() on each one, returning them in
+        the same order as the goals. The goals share a single proof run, so the similarities of
+        all the goal predicates are scored in bulk, goals with the same predicate are proven
+        together, and candidate rule lookups (and subgoal tables, with tabling) are shared.
+        The budget is shared by all the goals, so once it runs out, the rest get None.
+        """
+        ctx = self._build_context(extra_knowledge, hooks, budget)
+        adjusted_goals = self._adjust_goals(goals, ctx)
+        ctx.prefetch_candidates(goal.statement for goal in adjusted_goals)
+        goal_groups: dict[tuple[Predicate, int], list[int]] = {}
+        for position, goal in enumerate(adjusted_goals):
+            key = (goal.statement.predicate, len(goal.statement.terms))
+            goal_groups.setdefault(key, []).append(position)
+        results: list[Proof | None] = [None] * len(adjusted_goals)
+        for positions in goal_groups.values():
+            for position in positions:
+                results[position] = self._prove_best(adjusted_goals[position], ctx)
+        return results
+
+    def _prove_best(self, goal: Goal, ctx: ProofContext) -> Proof | None:
+        if ctx.hooks is not None:
+            ctx.hooks.on_search_start(goal, self.max_proof_depth)
+        try:
+            return self._find_best(goal, ctx)
+        finally:
+            if ctx.hooks is not None:
+                ctx.hooks.on_search_end(goal)
+
+    def _find_best(self, goal: Goal, ctx: ProofContext) -> Proof | None:
+        if self.tabling:
+            proofs = [
+                Proof(step, proof_state.substitutions)
+                for proof_state, step in stop_when_exhausted(
+                    recurse(goal, self.max_proof_depth, ProofState(), ctx)
+                )
+            ]
+            return (
+                max(proofs, key=lambda proof: proof.similarity_score)
+                if proofs
+                else None
+            )
+        if self.iterative_deepening:
+            shallowest = self._find_shallowest(goal, 1, ctx)
+            return shallowest[0] if len(shallowest) > 0 else None
+        return next(
+            stop_when_exhausted(best_first_search(goal, self.max_proof_depth, ctx)),
+            None,
+        )
+
+    def _find_shallowest(
+        self, goal: Goal, k: Optional[int], ctx: ProofContext, distinct: bool = False
+    ) -> list[Proof]:
+        """
+        Find the k proofs which need the smallest max proof depth, searching with each depth
+        in turn and stopping after the first depth which brings the total up to k.
+        Proofs needing the same depth are ordered by descending similarity.
+        """
+        proofs: list[Proof] = []
+        for depth in range(self.max_proof_depth + 1):
+            depth_proofs = list(stop_when_exhausted(proofs_at_depth(goal, depth, ctx)))
+            depth_proofs.sort(key=lambda proof: proof.similarity_score, reverse=True)
+            proofs.extend(depth_proofs)
+            if distinct:
+                proofs = best_per_answer(proofs)
+            if (k is not None and len(proofs) >= k) or (
+                ctx.budget is not None and ctx.budget.truncated
+            ):
+                break
+        return proofs[:k]
+
+    def iter_proofs(
+        self,
+        goal: Goal | Atom,
+        extra_knowledge: Optional[Knowledge] = None,
+        hooks: Optional[SearchHooks] = None,
+        budget: Optional[SearchBudget] = None,
+    ) -> Generator[Proof, None, None]:
+        """
+        Lazily yield proofs of the goal in the order they're found, rather than sorted by similarity.
+        The search only runs as far as needed to find the next proof, so stopping iteration early
+        avoids exploring the rest of the search space.
+        With tabling, the goal's table is fully evaluated before the first proof is yielded.
+        With binding_store, the search binds variables in a mutable BindingStore which is undone
+        on backtrack, and each proof takes a snapshot of the bindings once it's found.
+        With iterative_deepening, proofs are yielded in order of the max proof depth they need.
+        Any hooks are told the search has ended once the iterator is exhausted or closed.
+        If the budget runs out, the iterator just stops, and budget.truncated is set.
+        """
+        yield from self._search_proofs(goal, extra_knowledge, hooks, budget)
+
+    def _search_proofs(
+        self,
+        goal: Goal | Atom,
+        extra_knowledge: Optional[Knowledge],
+        hooks: Optional[SearchHooks],
+        budget: Optional[SearchBudget],
+        deepen: bool = True,
+    ) -> Iterator[Proof]:
+        """
+        iter_proofs, except that with iterative_deepening and not deepen, the proofs are found
+        with the same single search at the max proof depth as without iterative_deepening
+        """
+        ctx = self._build_context(extra_knowledge, hooks, budget, deepen=deepen)
+        adjusted_goal = self._adjust_goal(goal, ctx)
+        if hooks is not None:
+            hooks.on_search_start(adjusted_goal, self.max_proof_depth)
+        try:
+            yield from stop_when_exhausted(
+                self._iter_proofs(adjusted_goal, ctx, deepen)
+            )
+        finally:
+            if hooks is not None:
+                hooks.on_search_end(adjusted_goal)
+
+    def _iter_proofs(
+        self, adjusted_goal: Goal, ctx: ProofContext, deepen: bool = True
+    ) -> Iterator[Proof]:
+        if self.binding_store:
+            store = BindingStore()
+            for _similarity, step in recurse_with_store(
+                adjusted_goal, self.max_proof_depth, 1.0, store, ctx
+            ):
+                yield Proof(step, store.snapshot())
+            return
+        if self.iterative_deepening and deepen:
+            yield from iterative_deepening_search(
+                adjusted_goal, self.max_proof_depth, ctx
+            )
+            return
+        for proof_state, step in recurse(
+            adjusted_goal, self.max_proof_depth, ProofState(), ctx
+        ):
+            yield Proof(step, proof_state.substitutions)
+
+    async def aprove(
+        self,
+        goal: Goal | Atom,
+        extra_knowledge: Optional[Knowledge] = None,
+        hooks: Optional[SearchHooks] = None,
+        budget: Optional[SearchBudget] = None,
+        similarity_func: Optional[AsyncSimilarityFunc] = None,
+        yield_every: int = 100,
+    ) -> Proof | None:
+        """
+        Coroutine version of prove(), for use inside an asyncio event loop, see aprove_all()
+        """
+        proofs = await self._aprove_top_k(
+            goal, 1, extra_knowledge, hooks, budget, similarity_func, yield_every
+        )
+        return proofs[0] if len(proofs) > 0 else None
+
+    async def aprove_all(
+        self,
+        goal: Goal | Atom,
+        extra_knowledge: Optional[Knowledge] = None,
+        hooks: Optional[SearchHooks] = None,
+        budget: Optional[SearchBudget] = None,
+        similarity_func: Optional[AsyncSimilarityFunc] = None,
+        yield_every: int = 100,
+    ) -> list[Proof]:
+        """
+        Coroutine version of prove_all(), for use inside an asyncio event loop.
+        The search runs in the event loop's thread, but hands control back to the loop every
+        yield_every goal expansions, so other tasks keep running, and cancelling the task
+        stops the search there. This always uses the best-first search, even with tabling
+        or iterative_deepening.
+
+        similarity_func is an optional async func which scores a list of (item1, item2) pairs,
+        and is used for every similarity computed during unification in place of the prover's
+        own. Each goal expansion needs at most one awaited call, with all its unscored pairs.
+        Candidate rules are still picked by the rule index with the prover's similarity func,
+        so to have every predicate comparison go through the async func as well, create the
+        prover with a custom similarity_func, which disables the index's predicate filtering.
+        """
+        return await self._aprove_top_k(
+            goal, None, extra_knowledge, hooks, budget, similarity_func, yield_every
         )
-        _successful_proof_states, successful_graph_nodes = recurse(
+
+    async def _aprove_top_k(
+        self,
+        goal: Goal | Atom,
+        k: Optional[int],
+        extra_knowledge: Optional[Knowledge],
+        hooks: Optional[SearchHooks],
+        budget: Optional[SearchBudget],
+        similarity_func: Optional[AsyncSimilarityFunc],
+        yield_every: int,
+    ) -> list[Proof]:
+        if yield_every <= 0:
+            raise ValueError("yield_every must be a positive integer")
+        prefetcher = (
+            SimilarityPrefetcher(similarity_func, self._unify_similarity_func)
+            if similarity_func is not None
+            else None
+        )
+        ctx = self._build_context(
+            extra_knowledge,
+            hooks,
+            budget,
+            prefetcher.similarity if prefetcher is not None else None,
+        )
+        adjusted_goal = self._adjust_goal(goal, ctx)
+        found_proofs = best_first_search_async(
             adjusted_goal,
             self.max_proof_depth,
-            ProofState(),
-            rules,
-            self.similarity_func,
-            self.min_similarity_threshold,
+            ctx,
+            yield_every,
+            partial(prefetcher.prefetch, ctx=ctx) if prefetcher is not None else None,
         )
-        if not successful_graph_nodes:
-            return []
-        graphs = [Proof(node) for node in successful_graph_nodes]
-        return sorted(graphs, key=lambda graph: graph.similarity_score, reverse=True)
+        if hooks is not None:
+            hooks.on_search_start(adjusted_goal, self.max_proof_depth)
+        proofs: list[Proof] = []
+        try:
+            async for proof in found_proofs:
+                proofs.append(proof)
+                if k is not None and len(proofs) >= k:
+                    break
+        except BudgetExhausted:
+            pass
+        finally:
+            await found_proofs.aclose()
+            if hooks is not None:
+                hooks.on_search_end(adjusted_goal)
+        return proofs
+
+    def _adjust_goal(self, goal: Goal | Atom, ctx: ProofContext) -> Goal:
+        return self._adjust_goals([goal], ctx)[0]
+
+    def _adjust_goals(
+        self, goals: Sequence[Goal | Atom], ctx: ProofContext
+    ) -> list[Goal]:
+        # scopes of goals passed in by the caller must be reserved before allocating any new ones
+        for goal in goals:
+            if isinstance(goal, Goal):
+                ctx.scopes.reserve(goal.scope)
+        return [
+            goal if isinstance(goal, Goal) else Goal(goal, scope=ctx.scopes.allocate())
+            for goal in goals
+        ]
+
+    def _build_context(
+        self,
+        extra_knowledge: Optional[Knowledge],
+        hooks: Optional[SearchHooks] = None,
+        budget: Optional[SearchBudget] = None,
+        similarity_func: Optional[SimilarityFunc] = None,
+        deepen: bool = True,
+    ) -> ProofContext:
+        # extra knowledge is layered over the prover's own index, rather than copying it
+        rule_index: RuleIndex | OverlayRuleIndex = (
+            OverlayRuleIndex(self.rule_index, knowledge_to_rules(extra_knowledge))
+            if extra_knowledge
+            else self.rule_index
+        )
+        bulk_fact_similarity = similarity_func is None
+        if similarity_func is None:
+            similarity_func = self._unify_similarity_func
+        if hooks is not None:
+            similarity_func = TracedSimilarity(similarity_func or symbol_compare, hooks)
+        return ProofContext(
+            rule_index=rule_index,
+            similarity_func=similarity_func,
+            min_similarity_threshold=self.min_similarity_threshold,
+            tables=TableStore(self.max_proof_depth) if self.tabling else None,
+            failures=FailureMemo() if self.iterative_deepening and deepen else None,
+            hooks=hooks,
+            budget=budget,
+            bulk_fact_similarity=bulk_fact_similarity,
+        )
+
+
+def sort_proofs(proofs: Iterable[Proof], iterative_deepening: bool) -> list[Proof]:
+    """
+    Sort proofs by descending similarity, the way prove_all returns them.
+    With iterative_deepening, proofs with the same similarity are ordered shallowest first,
+    which is the order the iterations would find them in, since sorting is stable.
+    """
+    if iterative_deepening:
+        return sorted(
+            proofs,
+            key=lambda proof: (proof.similarity_score, -proof_step_depth(proof)),
+            reverse=True,
+        )
+    return sorted(proofs, key=lambda proof: proof.similarity_score, reverse=True)
+
+
+def best_per_answer(proofs: Sequence[Proof]) -> list[Proof]:
+    """keep only the first proof of each set of variable bindings"""
+    answers: set[Map[Variable, Constant | Variable]] = set()
+    best_proofs = []
+    for proof in proofs:
+        answer = proof.variable_bindings
+        if answer not in answers:
+            answers.add(answer)
+            best_proofs.append(proof)
+    return best_proofs
+
+
+def proof_step_depth(proof: Proof) -> int:
+    """the smallest max proof depth a proof found by the search can be found with"""
+    assert proof.step is not None
+    return proof_depth(proof.step)
 
 
 def process_knowledge(knowledge: Knowledge) -> frozenset[Rule]:
-    return frozenset(
-        [item if isinstance(item, Rule) else Rule(item) for item in knowledge]
-    )
+    return frozenset(knowledge_to_rules(knowledge))
+
+
+def knowledge_to_rules(knowledge: Knowledge) -> list[Rule]:
+    """wrap any bare atoms in the knowledge as rules, preserving the original order"""
+    return [item if isinstance(item, Rule) else Rule(item) for item in knowledge]
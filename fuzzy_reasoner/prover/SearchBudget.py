@@ -0,0 +1,107 @@
+from __future__ import annotations
+from enum import Enum
+from threading import Event
+from time import monotonic
+from typing import Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CancellationToken:
+    """
+    Lets another thread stop a search which is using it in its SearchBudget.
+    The search notices at its next goal expansion.
+    """
+
+    def __init__(self) -> None:
+        self._event = Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class BudgetLimit(Enum):
+    """which part of a SearchBudget ran out"""
+
+    EXPANSIONS = "expansions"
+    DEADLINE = "deadline"
+    CANCELLED = "cancelled"
+
+
+class BudgetExhausted(Exception):
+    """raised from inside a search when its budget runs out, and caught by the prover"""
+
+
+class SearchBudget:
+    """
+    Limits on how much work searches can do, on top of the max proof depth.
+    Each goal expansion is charged to the budget, and once it runs out, the prover stops
+    searching and returns the proofs found so far, with truncated set on the budget.
+
+    max_expansions caps the number of goal expansions, timeout is a number of seconds from when
+    the budget is created, and deadline is an absolute time.monotonic() value.
+    A budget can be shared by several searches to limit them all together, e.g. every query
+    for one request, but only by one thread at a time.
+    """
+
+    max_expansions: Optional[int]
+    deadline: Optional[float]
+    cancellation: Optional[CancellationToken]
+    expansions: int
+    # the limit which ran out, if any
+    exhausted_limit: Optional[BudgetLimit]
+
+    def __init__(
+        self,
+        max_expansions: Optional[int] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> None:
+        if timeout is not None:
+            timeout_deadline = monotonic() + timeout
+            deadline = (
+                timeout_deadline
+                if deadline is None
+                else min(deadline, timeout_deadline)
+            )
+        self.max_expansions = max_expansions
+        self.deadline = deadline
+        self.cancellation = cancellation
+        self.expansions = 0
+        self.exhausted_limit = None
+
+    @property
+    def truncated(self) -> bool:
+        """whether a search had to stop early because the budget ran out"""
+        return self.exhausted_limit is not None
+
+    def charge_expansion(self) -> None:
+        """count a goal expansion, raising BudgetExhausted if the budget has run out"""
+        limit = self.exhausted_limit
+        if limit is None:
+            if (
+                self.max_expansions is not None
+                and self.expansions >= self.max_expansions
+            ):
+                limit = BudgetLimit.EXPANSIONS
+            elif self.deadline is not None and monotonic() >= self.deadline:
+                limit = BudgetLimit.DEADLINE
+            elif self.cancellation is not None and self.cancellation.cancelled:
+                limit = BudgetLimit.CANCELLED
+        if limit is not None:
+            self.exhausted_limit = limit
+            raise BudgetExhausted(limit)
+        self.expansions += 1
+
+
+def stop_when_exhausted(items: Iterator[T]) -> Iterator[T]:
+    """yield the items of a search until it finishes or its budget runs out"""
+    try:
+        yield from items
+    except BudgetExhausted:
+        return
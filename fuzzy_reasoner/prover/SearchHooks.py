@@ -0,0 +1,90 @@
+from __future__ import annotations
+from enum import Enum
+
+from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.similarity import SimilarityFunc
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+
+
+class UnifyFailure(Enum):
+    """why a rule failed to unify with a goal"""
+
+    # the rule head and the goal have a different number of terms
+    ARITY = "arity"
+    # the predicates aren't similar enough
+    PREDICATE = "predicate"
+    # the predicates match, but a pair of terms which are bound to constants aren't similar enough
+    TERMS = "terms"
+
+
+class PruneReason(Enum):
+    """why part of the search space was skipped without being explored"""
+
+    # there was no proof depth left to prove the goal or the rule body
+    DEPTH = "depth"
+    # with tabling or distinct answers, an answer which was already found with
+    # at least the same similarity
+    DOMINATED_ANSWER = "dominated_answer"
+    # with iterative deepening, a goal which already failed with at least the same depth left
+    KNOWN_FAILURE = "known_failure"
+
+
+class SearchHooks:
+    """
+    Callbacks fired during a proof search, for tracing and collecting statistics.
+    Every method does nothing by default, so subclasses only need to override the events they want.
+    Pass an instance to any of the SLDProver prove methods with hooks=. Without hooks,
+    the search only pays for a None check at each event.
+
+    Depths are the remaining proof depth at that point in the search, which counts down
+    from the max proof depth at the top-level goal. With tabling, each subgoal table is evaluated
+    with the whole max proof depth. Ground facts in the fact store are matched in bulk,
+    so facts skipped by the fact store's argument indexes, or by a predicate mismatch,
+    don't fire on_unify_failure.
+    """
+
+    def on_search_start(self, goal: Goal, max_depth: int) -> None:
+        """a search for proofs of a top-level goal is starting"""
+
+    def on_search_end(self, goal: Goal) -> None:
+        """the search for the goal finished, or its caller stopped asking for more proofs"""
+
+    def on_goal_expanded(self, goal: Goal, depth: int) -> None:
+        """the goal is about to be resolved against its candidate rules"""
+
+    def on_unify_success(self, goal: Goal, rule: Rule, similarity: float) -> None:
+        """the rule unified with the goal"""
+
+    def on_unify_failure(self, goal: Goal, rule: Rule, reason: UnifyFailure) -> None:
+        """the rule failed to unify with the goal"""
+
+    def on_prune(self, goal: Goal, reason: PruneReason) -> None:
+        """part of the search for the goal was skipped"""
+
+    def on_similarity(
+        self,
+        item1: Constant | Predicate,
+        item2: Constant | Predicate,
+        similarity: float,
+    ) -> None:
+        """the similarity func was called during unification"""
+
+
+class TracedSimilarity:
+    """wraps a similarity func so every call fires on_similarity"""
+
+    similarity_func: SimilarityFunc
+    hooks: SearchHooks
+
+    def __init__(self, similarity_func: SimilarityFunc, hooks: SearchHooks) -> None:
+        self.similarity_func = similarity_func
+        self.hooks = hooks
+
+    def __call__(
+        self, item1: Constant | Predicate, item2: Constant | Predicate
+    ) -> float:
+        similarity = self.similarity_func(item1, item2)
+        self.hooks.on_similarity(item1, item2, similarity)
+        return similarity
@@ -0,0 +1,123 @@
+from __future__ import annotations
+from time import perf_counter
+from typing import Any, Optional
+
+from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.SearchHooks import PruneReason, SearchHooks, UnifyFailure
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+
+
+class SearchStats(SearchHooks):
+    """
+    Search hooks which count what the search did, e.g.
+
+        stats = SearchStats()
+        proofs = prover.prove_all(goal, hooks=stats)
+        print(stats.as_dict())
+
+    The same stats can be passed to several searches to add them all up.
+    Time is attributed to the proof depth of the most recently expanded goal,
+    so time_by_depth shows roughly where in the proof tree the search spent its time.
+    Predicate similarities which the rule index scores in bulk, and constants which the fact store
+    compares in bulk, aren't counted as similarity calls.
+    Stats aren't thread-safe, so each thread should use its own.
+    """
+
+    searches: int
+    goals_expanded: int
+    unify_successes: int
+    unify_failures: dict[UnifyFailure, int]
+    pruned: dict[PruneReason, int]
+    similarity_calls: int
+    # goals expanded and seconds spent at each proof depth, where the top-level goal is depth 0
+    expansions_by_depth: dict[int, int]
+    time_by_depth: dict[int, float]
+    elapsed_time: float
+
+    def __init__(self) -> None:
+        self.searches = 0
+        self.goals_expanded = 0
+        self.unify_successes = 0
+        self.unify_failures = {reason: 0 for reason in UnifyFailure}
+        self.pruned = {reason: 0 for reason in PruneReason}
+        self.similarity_calls = 0
+        self.expansions_by_depth = {}
+        self.time_by_depth = {}
+        self.elapsed_time = 0.0
+        self._max_depth = 0
+        self._depth = 0
+        self._last_event: Optional[float] = None
+
+    @property
+    def unify_attempts(self) -> int:
+        return self.unify_successes + sum(self.unify_failures.values())
+
+    @property
+    def max_depth_reached(self) -> int:
+        return max(self.expansions_by_depth, default=0)
+
+    def as_dict(self) -> dict[str, Any]:
+        """the stats as plain JSON-serializable values"""
+        return {
+            "searches": self.searches,
+            "goals_expanded": self.goals_expanded,
+            "unify_attempts": self.unify_attempts,
+            "unify_successes": self.unify_successes,
+            "unify_failures": {
+                reason.value: count for reason, count in self.unify_failures.items()
+            },
+            "pruned": {reason.value: count for reason, count in self.pruned.items()},
+            "similarity_calls": self.similarity_calls,
+            "max_depth_reached": self.max_depth_reached,
+            "expansions_by_depth": dict(sorted(self.expansions_by_depth.items())),
+            "time_by_depth": dict(sorted(self.time_by_depth.items())),
+            "elapsed_time": self.elapsed_time,
+        }
+
+    def _record_time(self) -> float:
+        now = perf_counter()
+        if self._last_event is not None:
+            elapsed = now - self._last_event
+            self.elapsed_time += elapsed
+            self.time_by_depth[self._depth] = (
+                self.time_by_depth.get(self._depth, 0.0) + elapsed
+            )
+        self._last_event = now
+        return now
+
+    def on_search_start(self, goal: Goal, max_depth: int) -> None:
+        self.searches += 1
+        self._max_depth = max_depth
+        self._depth = 0
+        self._last_event = perf_counter()
+
+    def on_search_end(self, goal: Goal) -> None:
+        self._record_time()
+        self._last_event = None
+
+    def on_goal_expanded(self, goal: Goal, depth: int) -> None:
+        self._record_time()
+        self.goals_expanded += 1
+        self._depth = self._max_depth - depth
+        self.expansions_by_depth[self._depth] = (
+            self.expansions_by_depth.get(self._depth, 0) + 1
+        )
+
+    def on_unify_success(self, goal: Goal, rule: Rule, similarity: float) -> None:
+        self.unify_successes += 1
+
+    def on_unify_failure(self, goal: Goal, rule: Rule, reason: UnifyFailure) -> None:
+        self.unify_failures[reason] += 1
+
+    def on_prune(self, goal: Goal, reason: PruneReason) -> None:
+        self.pruned[reason] += 1
+
+    def on_similarity(
+        self,
+        item1: Constant | Predicate,
+        item2: Constant | Predicate,
+        similarity: float,
+    ) -> None:
+        self.similarity_calls += 1
@@ -0,0 +1,225 @@
+from __future__ import annotations
+from threading import Lock
+from typing import Any, NamedTuple
+import numpy as np
+from numpy.typing import NDArray
+
+from fuzzy_reasoner.prover.EmbeddingMatrix import EmbeddingMatrix, Symbol
+from fuzzy_reasoner.similarity import symbol_compare
+
+# how many similarities to compute at once while building the graph, to bound its memory use
+BLOCK_SIZE = 1 << 22
+
+# returned for pairs which aren't neighbours, which is the lowest possible cosine similarity
+NOT_NEIGHBOURS = -1.0
+
+
+class NeighbourArrays(NamedTuple):
+    """
+    The neighbours of each row in compressed sparse row form: the neighbours of row r are
+    indices[indptr[r]:indptr[r + 1]], in ascending order, with their similarities alongside
+    """
+
+    indptr: NDArray[np.int64]
+    indices: NDArray[np.int64]
+    similarities: NDArray[np.float64]
+
+
+class SimilarityGraph:
+    """
+    The sparse graph of which rows of an EmbeddingMatrix have a cosine similarity of at least
+    min_similarity, precomputed so that unification only needs to look up whether two symbols
+    are neighbours rather than computing their similarity. A pair which isn't in the graph
+    is below min_similarity, so it gets NOT_NEIGHBOURS instead of its real similarity, which
+    makes the same unification decisions for any threshold of at least min_similarity.
+
+    Only similarity() uses the graph, so it serves comparisons of single pairs of symbols.
+    Bulk scoring, of the candidate predicates for a goal in a RuleIndex or of a fact table
+    column, still uses the embedding matrix.
+
+    Symbols without a row in the graph, e.g. ones only used in a query, fall back to the
+    embedding matrix's similarity. Rows appended to the matrix later on are added with extend(),
+    which only computes the similarities of the new rows.
+    """
+
+    embeddings: EmbeddingMatrix
+    min_similarity: float
+
+    def __init__(
+        self,
+        embeddings: EmbeddingMatrix,
+        min_similarity: float,
+        neighbours: NeighbourArrays | None = None,
+    ) -> None:
+        """
+        Build the graph of the embedding matrix, or use already-built neighbour arrays
+        for its rows, e.g. memory-mapped ones loaded from a file
+        """
+        self.embeddings = embeddings
+        self.min_similarity = min_similarity
+        # the arrays along with python dicts of the neighbours of the rows looked up so far,
+        # which are faster to look up again, replaced together so lookups never mix them up
+        self._state: tuple[NeighbourArrays, dict[int, dict[int, float]]] = (
+            neighbours or empty_neighbours(0),
+            {},
+        )
+        self._lock = Lock()
+        if neighbours is None:
+            self.extend()
+
+    def __len__(self) -> int:
+        """the number of rows in the graph"""
+        return len(self.neighbours.indptr) - 1
+
+    @property
+    def neighbours(self) -> NeighbourArrays:
+        return self._state[0]
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.neighbours.indices)
+
+    def row_neighbours(self, row: int) -> dict[int, float]:
+        """the neighbours of the row, and their similarities"""
+        return self._row_neighbours(row, self._state)
+
+    def _row_neighbours(
+        self,
+        row: int,
+        state: tuple[NeighbourArrays, dict[int, dict[int, float]]],
+    ) -> dict[int, float]:
+        neighbours, row_cache = state
+        row_neighbours = row_cache.get(row)
+        if row_neighbours is None:
+            indptr, indices, similarities = neighbours
+            start, end = indptr[row], indptr[row + 1]
+            row_neighbours = dict(
+                zip(indices[start:end].tolist(), similarities[start:end].tolist())
+            )
+            row_cache[row] = row_neighbours
+        return row_neighbours
+
+    def similarity(self, item1: Symbol, item2: Symbol) -> float:
+        """
+        Equivalent to the embedding matrix's similarity for pairs with a similarity of at least
+        min_similarity, and NOT_NEIGHBOURS for the rest
+        """
+        if item1.embedding is None or item2.embedding is None:
+            return symbol_compare(item1, item2)
+        row1 = self.embeddings.row(item1)
+        row2 = self.embeddings.row(item2)
+        state = self._state
+        num_rows = len(state[0].indptr) - 1
+        if row1 is None or row2 is None or row1 >= num_rows or row2 >= num_rows:
+            return self.embeddings.similarity(item1, item2)
+        return self._row_neighbours(row1, state).get(row2, NOT_NEIGHBOURS)
+
+    def extend(self) -> None:
+        """add any rows appended to the embedding matrix since the graph was built"""
+        with self._lock:
+            num_rows = len(self)
+            num_embeddings = len(self.embeddings)
+            if num_embeddings > num_rows:
+                neighbours = add_rows(
+                    self.neighbours,
+                    self.embeddings,
+                    np.arange(num_rows, num_embeddings),
+                    self.min_similarity,
+                )
+                self._state = (neighbours, {})
+
+    def renumber(
+        self, rows: NDArray[np.int64], embeddings: EmbeddingMatrix
+    ) -> NeighbourArrays:
+        """
+        The neighbour arrays for another embedding matrix, holding the same embeddings
+        in a different order, where rows gives the new row of each graph row, or -1 to leave it
+        out. The neighbours of new rows which no graph row maps to are computed.
+        """
+        indptr, indices, similarities = self.neighbours
+        sources = np.repeat(rows, np.diff(indptr))
+        targets = rows[indices]
+        kept = (sources >= 0) & (targets >= 0)
+        neighbours = neighbours_from_edges(
+            len(embeddings), sources[kept], targets[kept], similarities[kept]
+        )
+        missing = np.setdiff1d(np.arange(len(embeddings)), rows)
+        if len(missing):
+            neighbours = add_rows(neighbours, embeddings, missing, self.min_similarity)
+        return neighbours
+
+
+def add_rows(
+    neighbours: NeighbourArrays,
+    embeddings: EmbeddingMatrix,
+    rows: NDArray[np.int64],
+    min_similarity: float,
+) -> NeighbourArrays:
+    """
+    Compute the neighbours of rows of the embedding matrix which don't have any yet,
+    and add them as neighbours of the rows which do
+    """
+    sources, targets, similarities = find_neighbours(embeddings, rows, min_similarity)
+    # the graph is symmetric, so the rows are also neighbours of their existing neighbours
+    existing_targets = ~np.isin(targets, rows)
+    indptr, indices, existing_similarities = neighbours
+    existing_sources = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    return neighbours_from_edges(
+        len(embeddings),
+        np.concatenate([existing_sources, sources, targets[existing_targets]]),
+        np.concatenate([indices, targets, sources[existing_targets]]),
+        np.concatenate(
+            [existing_similarities, similarities, similarities[existing_targets]]
+        ),
+    )
+
+
+def find_neighbours(
+    embeddings: EmbeddingMatrix, rows: NDArray[np.int64], min_similarity: float
+) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.floating[Any]]]:
+    """
+    Find every pair of one of the rows and any row of the embedding matrix with a similarity
+    of at least min_similarity, as arrays of sources, targets and similarities
+    """
+    block_rows = max(1, BLOCK_SIZE // max(1, len(embeddings)))
+    found_sources = [np.zeros(0, dtype=np.int64)]
+    found_targets = [np.zeros(0, dtype=np.int64)]
+    found_similarities = [np.zeros(0)]
+    for start in range(0, len(rows), block_rows):
+        block = rows[start : start + block_rows]
+        similarities = embeddings.scores(
+            embeddings.vectors(block, embeddings.compute_dtype).T
+        ).T
+        sources, targets = np.nonzero(similarities >= min_similarity)
+        found_sources.append(block[sources])
+        found_targets.append(targets)
+        found_similarities.append(similarities[sources, targets])
+    return (
+        np.concatenate(found_sources),
+        np.concatenate(found_targets),
+        np.concatenate(found_similarities),
+    )
+
+
+def neighbours_from_edges(
+    num_rows: int,
+    sources: NDArray[np.int64],
+    targets: NDArray[np.int64],
+    similarities: NDArray[np.floating[Any]],
+) -> NeighbourArrays:
+    order = np.lexsort((targets, sources))
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_rows), out=indptr[1:])
+    return NeighbourArrays(
+        indptr,
+        targets[order].astype(np.int64),
+        similarities[order].astype(np.float64),
+    )
+
+
+def empty_neighbours(num_rows: int) -> NeighbourArrays:
+    return NeighbourArrays(
+        np.zeros(num_rows + 1, dtype=np.int64),
+        np.zeros(0, dtype=np.int64),
+        np.zeros(0, dtype=np.float64),
+    )
@@ -0,0 +1,81 @@
+from __future__ import annotations
+from dataclasses import replace
+from typing import Optional
+
+from fuzzy_reasoner.prover.ProofContext import ProofContext
+from fuzzy_reasoner.prover.operations.best_first import PartialProof, expand
+from fuzzy_reasoner.similarity import (
+    AsyncSimilarityFunc,
+    SimilarityFunc,
+    symbol_compare,
+)
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+
+
+class SimilarityPrefetcher:
+    """
+    Lets the best-first search unify with an async batch similarity func.
+    Before each goal expansion, the expansion is dry-run with a similarity func which records
+    every pair it hasn't scored yet and pretends they match perfectly. Since no unification can
+    fail on those pairs, the dry run compares a superset of the pairs the real expansion will,
+    so a single awaited batch call scores everything the real expansion needs.
+    The scores are kept for the rest of the search, and similarity() serves them to unification.
+    """
+
+    batch_similarity_func: AsyncSimilarityFunc
+    # used for any pair which somehow wasn't prefetched
+    fallback_similarity_func: Optional[SimilarityFunc]
+
+    def __init__(
+        self,
+        batch_similarity_func: AsyncSimilarityFunc,
+        fallback_similarity_func: Optional[SimilarityFunc] = None,
+    ) -> None:
+        self.batch_similarity_func = batch_similarity_func
+        self.fallback_similarity_func = fallback_similarity_func
+        self._similarities: dict[
+            tuple[Constant | Predicate, Constant | Predicate], float
+        ] = {}
+        # pairs seen by the dry run which still need scoring, in the order they were seen
+        self._missing: dict[
+            tuple[Constant | Predicate, Constant | Predicate], None
+        ] = {}
+
+    def similarity(
+        self, item1: Constant | Predicate, item2: Constant | Predicate
+    ) -> float:
+        similarity = self._similarities.get((item1, item2))
+        if similarity is None:
+            similarity = (self.fallback_similarity_func or symbol_compare)(item1, item2)
+        return similarity
+
+    def _record(
+        self, item1: Constant | Predicate, item2: Constant | Predicate
+    ) -> float:
+        key = (item1, item2)
+        similarity = self._similarities.get(key)
+        if similarity is None:
+            self._missing[key] = None
+            return 1.0
+        return similarity
+
+    async def prefetch(self, partial_proof: PartialProof, ctx: ProofContext) -> None:
+        """score every pair the expansion of the partial proof could compare"""
+        # the dry run isn't part of the search, so it isn't traced or charged to the budget
+        dry_run_ctx = replace(
+            ctx, similarity_func=self._record, hooks=None, budget=None
+        )
+        for _partial_proof in expand(partial_proof, dry_run_ctx):
+            pass
+        if not self._missing:
+            return
+        pairs = list(self._missing)
+        self._missing.clear()
+        similarities = await self.batch_similarity_func(pairs)
+        if len(similarities) != len(pairs):
+            raise ValueError(
+                f"batch similarity func returned {len(similarities)} similarities "
+                f"for {len(pairs)} pairs"
+            )
+        self._similarities.update(zip(pairs, map(float, similarities)))
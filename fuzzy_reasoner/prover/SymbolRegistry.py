@@ -0,0 +1,102 @@
+from __future__ import annotations
+import io
+import pickle
+from typing import Any, Iterable, Optional
+
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+REGISTERED_TYPES = (Rule, Atom, Predicate, Constant, Variable)
+
+
+class SymbolRegistry:
+    """
+    Deterministic numbering of the rules, atoms and symbols in some knowledge.
+    Rules and symbols compare by identity, so a copy made by pickling them across processes
+    would never match the original. Two registries built by walking the same knowledge in
+    the same order agree on every id, so objects pickled against one registry by id are
+    unpickled as the corresponding original objects of the other.
+
+    A registry can extend a parent registry, numbering only the objects the parent doesn't know,
+    so per-query goals and extra knowledge can be registered without copying the parent.
+    """
+
+    parent: Optional[SymbolRegistry]
+    objects: list[Any]
+
+    def __init__(
+        self, rules: Iterable[Rule] = (), parent: Optional[SymbolRegistry] = None
+    ) -> None:
+        self.parent = parent
+        self.objects = []
+        self._ids: dict[Any, int] = {}
+        self._offset = len(parent) if parent else 0
+        self.add_rules(rules)
+
+    def __len__(self) -> int:
+        return self._offset + len(self.objects)
+
+    def get_id(self, obj: Any) -> Optional[int]:
+        if self.parent:
+            parent_id = self.parent.get_id(obj)
+            if parent_id is not None:
+                return parent_id
+        local_id = self._ids.get(obj)
+        return None if local_id is None else self._offset + local_id
+
+    def get_object(self, obj_id: int) -> Any:
+        if obj_id < self._offset:
+            assert self.parent is not None
+            return self.parent.get_object(obj_id)
+        return self.objects[obj_id - self._offset]
+
+    def add(self, obj: Any) -> None:
+        if self.get_id(obj) is None:
+            self._ids[obj] = len(self.objects)
+            self.objects.append(obj)
+
+    def add_atom(self, atom: Atom) -> None:
+        self.add(atom)
+        self.add(atom.predicate)
+        for term in atom.terms:
+            self.add(term)
+
+    def add_rules(self, rules: Iterable[Rule]) -> None:
+        for rule in rules:
+            self.add(rule)
+            self.add_atom(rule.head)
+            for atom in rule.body or ():
+                self.add_atom(atom)
+
+    def dumps(self, obj: Any) -> bytes:
+        """pickle the object, referring to every registered object by its id"""
+        buffer = io.BytesIO()
+        RegistryPickler(buffer, self).dump(obj)
+        return buffer.getvalue()
+
+    def loads(self, data: bytes) -> Any:
+        """unpickle an object pickled against an equivalent registry"""
+        return RegistryUnpickler(io.BytesIO(data), self).load()
+
+
+class RegistryPickler(pickle.Pickler):
+    def __init__(self, file: io.BytesIO, registry: SymbolRegistry) -> None:
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.registry = registry
+
+    def persistent_id(self, obj: Any) -> Optional[int]:
+        if isinstance(obj, REGISTERED_TYPES):
+            return self.registry.get_id(obj)
+        return None
+
+
+class RegistryUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, registry: SymbolRegistry) -> None:
+        super().__init__(file)
+        self.registry = registry
+
+    def persistent_load(self, pid: Any) -> Any:
+        return self.registry.get_object(pid)
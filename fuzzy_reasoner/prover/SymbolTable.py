@@ -0,0 +1,203 @@
+from __future__ import annotations
+from threading import Lock
+from typing import Any, Generic, Iterable, Optional, Sequence, TypeVar, Union
+import numpy as np
+from numpy.typing import NDArray
+
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+SymbolT = TypeVar("SymbolT", Constant, Predicate)
+
+
+class SymbolNamespace(Generic[SymbolT]):
+    """
+    Dense integer ids for the distinct symbol strings of one kind of symbol,
+    along with the object each id was first added with
+    """
+
+    objects: list[SymbolT]
+    # the row of each symbol's embedding in its SymbolTable's embedding blocks, or -1
+    rows: list[int]
+
+    def __init__(self) -> None:
+        self.objects = []
+        self.rows = []
+        self._ids: dict[str, int] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __getitem__(self, symbol_id: int) -> SymbolT:
+        return self.objects[symbol_id]
+
+    def get_id(self, symbol: str) -> Optional[int]:
+        return self._ids.get(symbol)
+
+    def add(self, item: SymbolT, row: int = -1) -> int:
+        """return the id of the item's symbol, adding the item if the symbol is new"""
+        symbol_id = self._ids.get(item.symbol)
+        if symbol_id is None:
+            with self._lock:
+                symbol_id = self._ids.get(item.symbol)
+                if symbol_id is None:
+                    symbol_id = len(self.objects)
+                    self.objects.append(item)
+                    self.rows.append(row)
+                    # only publish the id once its object can be looked up
+                    self._ids[item.symbol] = symbol_id
+        return symbol_id
+
+
+class SymbolTable:
+    """
+    Interns constants and predicates, so each distinct symbol string has a dense integer id
+    and a single shared object, no matter how many facts it appears in.
+    NumPy embeddings of interned symbols are copied into rows of large shared blocks,
+    and each interned symbol's embedding is a view of its row rather than a separate array.
+
+    Constants and predicates are numbered separately. Symbols compare by identity, so intern()
+    only swaps a symbol for the interned one if it has the same embedding, and leaves it as it is
+    otherwise. Fact tables use the ids to store constants compactly, which only relies on
+    the symbol strings, so symbols can be given ids with add() without being interned.
+    """
+
+    constants: SymbolNamespace[Constant]
+    predicates: SymbolNamespace[Predicate]
+    embedding_block_size: int
+
+    def __init__(self, embedding_block_size: int = 1024) -> None:
+        self.constants = SymbolNamespace()
+        self.predicates = SymbolNamespace()
+        self.embedding_block_size = embedding_block_size
+        self._blocks: list[NDArray[Any]] = []
+        # the next free row of the last block
+        self._block_row = 0
+        self._num_embeddings = 0
+        self._lock = Lock()
+
+    @classmethod
+    def from_arrays(
+        cls,
+        constants: Sequence[str],
+        constant_rows: Sequence[int],
+        predicates: Sequence[str],
+        predicate_rows: Sequence[int],
+        embeddings: NDArray[Any],
+        embedding_block_size: int = 1024,
+    ) -> SymbolTable:
+        """
+        Build a table of interned symbols whose embeddings are the given rows of a matrix,
+        or -1 for no embedding. The matrix is used as it is, so it can be memory-mapped.
+        """
+        symbols = cls(embedding_block_size)
+        if len(embeddings):
+            symbols._blocks.append(embeddings)
+            symbols._block_row = len(embeddings)
+            symbols._num_embeddings = len(embeddings)
+        for symbol, row in zip(constants, constant_rows):
+            symbols.constants.add(
+                Constant(symbol, embeddings[row] if row >= 0 else None), row
+            )
+        for symbol, row in zip(predicates, predicate_rows):
+            symbols.predicates.add(
+                Predicate(symbol, embeddings[row] if row >= 0 else None), row
+            )
+        return symbols
+
+    @property
+    def num_embeddings(self) -> int:
+        return self._num_embeddings
+
+    def embedding_matrix(self) -> NDArray[Any]:
+        """a copy of every stored embedding as one matrix, indexed by the symbols' rows"""
+        if not self._blocks:
+            return np.zeros((0, 0))
+        return np.concatenate([*self._blocks[:-1], self._blocks[-1][: self._block_row]])
+
+    def constant(self, symbol: str, embedding: Optional[Any] = None) -> Constant:
+        """return the interned constant for this symbol, creating it if it doesn't exist yet"""
+        return self.intern(Constant(symbol, embedding))
+
+    def predicate(self, symbol: str, embedding: Optional[Any] = None) -> Predicate:
+        """return the interned predicate for this symbol, creating it if it doesn't exist yet"""
+        return self.intern(Predicate(symbol, embedding))
+
+    def intern(self, item: SymbolT) -> SymbolT:
+        """return the shared object for the item's symbol, or the item itself if it doesn't match"""
+        namespace: SymbolNamespace[Any]
+        if isinstance(item, Constant):
+            namespace = self.constants
+        else:
+            namespace = self.predicates
+        symbol_id = namespace.get_id(item.symbol)
+        if symbol_id is None:
+            with self._lock:
+                symbol_id = namespace.get_id(item.symbol)
+                if symbol_id is None:
+                    embedding, row = self._store_embedding(item.embedding)
+                    new_item = type(item)(item.symbol, embedding)
+                    # a fact table may have added the symbol without interning it meanwhile
+                    symbol_id = namespace.add(new_item, row)
+        interned = namespace[symbol_id]
+        return interned if same_embedding(interned.embedding, item.embedding) else item
+
+    def intern_atom(self, atom: Atom) -> Atom:
+        return Atom(
+            self.intern(atom.predicate),
+            tuple(
+                term if isinstance(term, Variable) else self.intern(term)
+                for term in atom.terms
+            ),
+        )
+
+    def intern_rule(self, rule: Rule) -> Rule:
+        return Rule(
+            self.intern_atom(rule.head),
+            tuple(self.intern_atom(atom) for atom in rule.body)
+            if rule.body is not None
+            else None,
+        )
+
+    def intern_knowledge(
+        self, knowledge: Iterable[Union[Atom, Rule]]
+    ) -> list[Union[Atom, Rule]]:
+        """return a copy of the knowledge built from interned symbols"""
+        return [
+            self.intern_rule(item) if isinstance(item, Rule) else self.intern_atom(item)
+            for item in knowledge
+        ]
+
+    def _store_embedding(self, embedding: Optional[Any]) -> tuple[Optional[Any], int]:
+        # other types of embeddings, like tensors, are kept as they are for custom similarity funcs,
+        # as are embeddings which don't fit in the blocks
+        if (
+            not isinstance(embedding, np.ndarray)
+            or embedding.ndim != 1
+            or (self._blocks and self._blocks[0].shape[1] != len(embedding))
+        ):
+            return embedding, -1
+        if not self._blocks or self._block_row == len(self._blocks[-1]):
+            # every block has the dtype of the first embedding, so the blocks can be stacked
+            dtype = self._blocks[0].dtype if self._blocks else embedding.dtype
+            self._blocks.append(
+                np.empty((self.embedding_block_size, len(embedding)), dtype=dtype)
+            )
+            self._block_row = 0
+        block_row = self._block_row
+        block = self._blocks[-1]
+        block[block_row] = embedding
+        row = self._num_embeddings
+        self._block_row += 1
+        self._num_embeddings += 1
+        return block[block_row], row
+
+
+def same_embedding(embedding1: Optional[Any], embedding2: Optional[Any]) -> bool:
+    if embedding1 is None or embedding2 is None:
+        return embedding1 is embedding2
+    return embedding1 is embedding2 or bool(np.array_equal(embedding1, embedding2))
@@ -0,0 +1,312 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from asyncio import sleep
+from heapq import heappop, heappush
+from itertools import count
+from typing import AsyncGenerator, Awaitable, Callable, Iterable, Iterator, Optional
+from immutables import Map
+
+from fuzzy_reasoner.prover.FactTable import FactTable
+from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.Proof import Proof, ProofStep, StepChain
+from fuzzy_reasoner.prover.ProofContext import ProofContext
+from fuzzy_reasoner.prover.SearchHooks import PruneReason
+from fuzzy_reasoner.prover.operations.facts import (
+    bind_facts,
+    deref_substitutions,
+    match_facts,
+)
+from fuzzy_reasoner.prover.operations.substitution import (
+    SubstitutionsMap,
+    resolve_term,
+)
+from fuzzy_reasoner.prover.operations.unify import unify
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+@dataclass(frozen=True, eq=False)
+class OpenRule:
+    """
+    A rule application in a partial proof whose body hasn't been fully proven yet.
+    The root of every partial proof is an OpenRule with no rule, whose body is the original goal.
+    """
+
+    goal: Optional[Goal]
+    rule: Optional[Rule]
+    body_scope: int
+    body_depth: int
+    unification_similarity: float
+    remaining_body: tuple[Atom, ...]
+    # the proof steps of the body goals proven so far
+    last_child: Optional[StepChain]
+    parent: Optional[OpenRule]
+
+
+@dataclass(frozen=True, eq=False)
+class PartialProof:
+    """
+    A node in the best-first search frontier. Either open_rule is set and there's more to prove,
+    or the proof is complete and head is set.
+    """
+
+    similarity: float
+    substitutions: SubstitutionsMap
+    open_rule: Optional[OpenRule]
+    head: Optional[ProofStep] = None
+
+
+def best_first_search(
+    goal: Goal, max_depth: int, ctx: ProofContext, distinct: bool = False
+) -> Iterator[Proof]:
+    """
+    Branch-and-bound alternative to recurse, yielding proofs in descending order of similarity.
+    The overall similarity of a proof is the min of all its unifications, so it can only decrease
+    as a partial proof is extended. This means it's an upper bound on the similarity of any
+    proof completing it, and expanding the partial proofs with the highest bound first guarantees
+    that every complete proof popped off the frontier is at least as good as anything left to find.
+
+    With distinct, only the first, and so the best, proof of each set of variable bindings
+    is yielded. Once a partial proof has bound every goal variable to a constant, its bindings
+    can't change, so if a proof with those bindings has already been found, it's pruned.
+    """
+    frontier = Frontier(goal, max_depth)
+    variables = tuple(
+        dict.fromkeys(
+            term for term in goal.statement.terms if isinstance(term, Variable)
+        )
+    )
+    found_answers: Optional[set[tuple[Constant | Variable, ...]]] = (
+        set() if distinct else None
+    )
+    while frontier:
+        partial_proof = frontier.pop()
+        if found_answers is not None:
+            answer = tuple(
+                resolve_term(variable, goal.scope, partial_proof.substitutions)
+                for variable in variables
+            )
+            if partial_proof.head or all(isinstance(term, Constant) for term in answer):
+                if answer in found_answers:
+                    if ctx.hooks is not None:
+                        ctx.hooks.on_prune(goal, PruneReason.DOMINATED_ANSWER)
+                    continue
+                if partial_proof.head:
+                    found_answers.add(answer)
+        if partial_proof.head:
+            yield Proof(partial_proof.head, partial_proof.substitutions)
+            continue
+        frontier.push_all(expand(partial_proof, ctx))
+
+
+async def best_first_search_async(
+    goal: Goal,
+    max_depth: int,
+    ctx: ProofContext,
+    yield_every: int,
+    before_expand: Optional[Callable[[PartialProof], Awaitable[None]]] = None,
+) -> AsyncGenerator[Proof, None]:
+    """
+    best_first_search for asyncio, which hands control back to the event loop every yield_every
+    goal expansions, so other tasks keep running while it searches, and cancelling the task
+    stops the search at that point. If before_expand is given, it's awaited before each expansion,
+    e.g. to fetch the similarities the expansion will need.
+    """
+    frontier = Frontier(goal, max_depth)
+    expansions = 0
+    while frontier:
+        partial_proof = frontier.pop()
+        if partial_proof.head:
+            yield Proof(partial_proof.head, partial_proof.substitutions)
+            continue
+        if before_expand is not None:
+            await before_expand(partial_proof)
+        frontier.push_all(expand(partial_proof, ctx))
+        expansions += 1
+        if expansions % yield_every == 0:
+            await sleep(0)
+
+
+class Frontier:
+    """the partial proofs left to explore, highest similarity first"""
+
+    def __init__(self, goal: Goal, max_depth: int) -> None:
+        root = OpenRule(
+            goal=None,
+            rule=None,
+            body_scope=goal.scope,
+            body_depth=max_depth,
+            unification_similarity=1.0,
+            remaining_body=(goal.statement,),
+            last_child=None,
+            parent=None,
+        )
+        self._tie_breaker = count()
+        self._heap: list[tuple[float, int, PartialProof]] = [
+            (-1.0, next(self._tie_breaker), PartialProof(1.0, Map(), root))
+        ]
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def pop(self) -> PartialProof:
+        return heappop(self._heap)[2]
+
+    def push_all(self, partial_proofs: Iterable[PartialProof]) -> None:
+        heap = self._heap
+        tie_breaker = self._tie_breaker
+        for partial_proof in partial_proofs:
+            # break ties in favor of the newest partial proof, so the search dives towards completions
+            heappush(
+                heap, (-partial_proof.similarity, -next(tie_breaker), partial_proof)
+            )
+
+
+def expand(partial_proof: PartialProof, ctx: ProofContext) -> Iterator[PartialProof]:
+    """
+    Resolve the next unproven goal of the partial proof against every candidate rule,
+    corresponding to a single step of recurse
+    """
+    open_rule = partial_proof.open_rule
+    assert open_rule is not None
+    goal = Goal(open_rule.remaining_body[0], scope=open_rule.body_scope)
+    depth = open_rule.body_depth
+    if ctx.budget is not None:
+        ctx.budget.charge_expansion()
+    hooks = ctx.hooks
+    if hooks is not None:
+        hooks.on_goal_expanded(goal, depth)
+    candidate_groups = ctx.candidates(goal.statement)
+    for predicate_similarity, candidate_rules in candidate_groups:
+        if isinstance(candidate_rules, FactTable):
+            yield from expand_facts(
+                partial_proof, goal, candidate_rules, predicate_similarity, ctx
+            )
+            continue
+        for rule in candidate_rules:
+            # rules with a body need depth left to prove it, just like join
+            if rule.body and depth <= 0:
+                if hooks is not None:
+                    hooks.on_prune(goal, PruneReason.DEPTH)
+                continue
+            scope = ctx.scopes.allocate()
+            unify_result = unify(
+                rule,
+                goal,
+                scope,
+                partial_proof.substitutions,
+                similarity_func=ctx.similarity_func,
+                min_similarity_threshold=ctx.min_similarity_threshold,
+                predicate_similarity=predicate_similarity,
+            )
+            if not unify_result:
+                if hooks is not None:
+                    ctx.report_unify_failure(goal, rule, predicate_similarity)
+                continue
+            substitutions, similarity = unify_result
+            if hooks is not None:
+                hooks.on_unify_success(goal, rule, similarity)
+            overall_similarity = min(similarity, partial_proof.similarity)
+            if rule.body:
+                yield PartialProof(
+                    overall_similarity,
+                    substitutions,
+                    OpenRule(
+                        goal=goal,
+                        rule=rule,
+                        body_scope=scope,
+                        body_depth=depth - 1,
+                        unification_similarity=similarity,
+                        remaining_body=rule.body,
+                        last_child=None,
+                        parent=open_rule,
+                    ),
+                )
+            else:
+                step = ProofStep(
+                    goal.statement,
+                    rule,
+                    goal.scope,
+                    scope,
+                    similarity,
+                    overall_similarity,
+                    substitutions=substitutions,
+                )
+                yield complete_goal(open_rule, step, overall_similarity, substitutions)
+
+
+def expand_facts(
+    partial_proof: PartialProof,
+    goal: Goal,
+    table: FactTable,
+    predicate_similarity: Optional[float],
+    ctx: ProofContext,
+) -> Iterator[PartialProof]:
+    """resolve the goal against a whole table of ground facts at once, like resolve_facts"""
+    open_rule = partial_proof.open_rule
+    assert open_rule is not None
+    hooks = ctx.hooks
+    scope = ctx.scopes.allocate()
+    deref = deref_substitutions(partial_proof.substitutions)
+    for fact, similarity, bindings in match_facts(
+        goal, table, predicate_similarity, deref, ctx
+    ):
+        if hooks is not None:
+            hooks.on_unify_success(goal, fact, similarity)
+        substitutions = bind_facts(bindings, partial_proof.substitutions)
+        overall_similarity = min(similarity, partial_proof.similarity)
+        step = ProofStep(
+            goal.statement,
+            fact,
+            goal.scope,
+            scope,
+            similarity,
+            overall_similarity,
+            substitutions=substitutions,
+        )
+        yield complete_goal(open_rule, step, overall_similarity, substitutions)
+
+
+def complete_goal(
+    open_rule: OpenRule,
+    step: ProofStep,
+    similarity: float,
+    substitutions: SubstitutionsMap,
+) -> PartialProof:
+    """
+    Record the proof step of the open rule's next body goal, closing any rules this finishes
+    """
+    while True:
+        remaining_body = open_rule.remaining_body[1:]
+        last_child = StepChain(step, open_rule.last_child)
+        if remaining_body:
+            return PartialProof(
+                similarity,
+                substitutions,
+                OpenRule(
+                    goal=open_rule.goal,
+                    rule=open_rule.rule,
+                    body_scope=open_rule.body_scope,
+                    body_depth=open_rule.body_depth,
+                    unification_similarity=open_rule.unification_similarity,
+                    remaining_body=remaining_body,
+                    last_child=last_child,
+                    parent=open_rule.parent,
+                ),
+            )
+        # the root has no rule, so its only child is the head of the finished proof
+        if open_rule.parent is None or not open_rule.goal or not open_rule.rule:
+            return PartialProof(similarity, substitutions, None, head=step)
+        step = ProofStep(
+            open_rule.goal.statement,
+            open_rule.rule,
+            open_rule.goal.scope,
+            open_rule.body_scope,
+            open_rule.unification_similarity,
+            similarity,
+            last_child,
+            substitutions,
+        )
+        open_rule = open_rule.parent
@@ -0,0 +1,235 @@
+from __future__ import annotations
+from typing import Callable, Iterator, List, Optional, Tuple, Union, cast
+import numpy as np
+from numpy.typing import NDArray
+
+from fuzzy_reasoner.prover.EmbeddingMatrix import normalize_rows
+from fuzzy_reasoner.prover.FactTable import FactColumns, FactTable, SymbolColumn
+from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.ProofContext import ProofContext
+from fuzzy_reasoner.prover.SearchHooks import UnifyFailure
+from fuzzy_reasoner.prover.operations.substitution import (
+    Binding,
+    SubstitutionsMap,
+    resolve_variable,
+    set_var_binding,
+)
+from fuzzy_reasoner.similarity import symbol_compare
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+# follows a term's chain of bindings, like BindingStore.deref
+Deref = Callable[[Union[Variable, Constant], int], Binding]
+
+# the unbound goal variables a fact match binds, as (scope, variable), and the constants they're bound to
+FactBindings = List[Tuple[Tuple[int, Variable], Constant]]
+
+# positions to compare against each fact, along with either the goal constant to compare with,
+# or another position of the fact which must match, for goal variables repeated within the goal
+ComparedPositions = List[Tuple[int, Union[Constant, int]]]
+
+# with fewer candidate facts than this, comparing them one at a time is faster than in bulk
+MIN_BULK_ROWS = 8
+
+
+def deref_substitutions(substitutions: SubstitutionsMap) -> Deref:
+    def deref(term: Variable | Constant, scope: int) -> Binding:
+        if isinstance(term, Constant):
+            return term
+        return resolve_variable(term, scope, substitutions)
+
+    return deref
+
+
+def bind_facts(
+    bindings: FactBindings, substitutions: SubstitutionsMap
+) -> SubstitutionsMap:
+    """add the bindings of a fact match to the substitutions"""
+    for (scope, variable), constant in bindings:
+        substitutions = set_var_binding(variable, scope, constant, substitutions)
+    return substitutions
+
+
+def match_facts(
+    goal: Goal,
+    table: FactTable,
+    predicate_similarity: Optional[float],
+    deref: Deref,
+    ctx: ProofContext,
+    row_range: Optional[tuple[int, int]] = None,
+) -> Iterator[tuple[Rule, float, FactBindings]]:
+    """
+    Unify the goal against every fact in the table at once, yielding each fact that unifies
+    along with the unification similarity and the bindings it makes, in table order.
+    If row_range is given, only the facts in that (start, stop) range of rows are matched,
+    but they're compared the same way as when matching the whole table.
+    This gives the same results as calling unify on each fact, but goal arguments bound to
+    constants are matched with the table's argument indexes rather than fact by fact,
+    and the remaining arguments of many facts are compared in bulk, see compare_in_bulk.
+    Similarities compared in bulk are only equal to similarity_func's up to floating point
+    rounding, so a fact scored right at the threshold may be kept by one and not the other.
+    """
+    similarity_func = ctx.similarity_func or symbol_compare
+    min_similarity_threshold = ctx.min_similarity_threshold
+    similarity = (
+        predicate_similarity
+        if predicate_similarity is not None
+        else similarity_func(table.predicate, goal.statement.predicate)
+    )
+    if similarity < min_similarity_threshold:
+        return
+    columns = table.columns()
+    rows: Optional[NDArray[np.int64]] = None
+    compared_positions: ComparedPositions = []
+    binding_positions: list[tuple[int, tuple[int, Variable]]] = []
+    first_positions: dict[tuple[int, Variable], int] = {}
+    for position, term in enumerate(goal.statement.terms):
+        value = deref(term, goal.scope)
+        if isinstance(value, tuple):
+            first_position = first_positions.get(value)
+            if first_position is None:
+                first_positions[value] = position
+                binding_positions.append((position, value))
+            else:
+                compared_positions.append((position, first_position))
+        # a non-positive threshold lets mismatched constants unify, so they can't be skipped
+        elif min_similarity_threshold > 0 and table.can_index(position, value):
+            matches = table.lookup(columns, position, value)
+            rows = (
+                matches
+                if rows is None
+                else np.intersect1d(rows, matches, assume_unique=True)
+            )
+            if len(rows) == 0:
+                return
+        else:
+            compared_positions.append((position, value))
+    num_rows = len(columns.columns) if rows is None else len(rows)
+    # decided before restricting the rows to the range, so it's the same for every range
+    use_bulk = (
+        compared_positions and ctx.bulk_fact_similarity and num_rows >= MIN_BULK_ROWS
+    )
+    if row_range is not None:
+        start, stop = row_range
+        rows = (
+            np.arange(start, min(stop, len(columns.columns)))
+            if rows is None
+            else rows[(rows >= start) & (rows < stop)]
+        )
+    if use_bulk:
+        bulk_result = compare_in_bulk(
+            table, columns, rows, compared_positions, similarity
+        )
+        if bulk_result is not None:
+            bulk_rows, fact_similarities = bulk_result
+            matched = fact_similarities >= min_similarity_threshold
+            if ctx.hooks is not None:
+                for row in bulk_rows[~matched].tolist():
+                    ctx.hooks.on_unify_failure(
+                        goal, table.fact(row), UnifyFailure.TERMS
+                    )
+            for row, fact_similarity in zip(
+                bulk_rows[matched].tolist(), fact_similarities[matched].tolist()
+            ):
+                fact = table.fact(row)
+                terms = cast(Tuple[Constant, ...], fact.head.terms)
+                yield fact, fact_similarity, [
+                    (variable, terms[position])
+                    for position, variable in binding_positions
+                ]
+            return
+    for row in range(len(columns.columns)) if rows is None else rows.tolist():
+        fact = table.fact(row)
+        terms = cast(Tuple[Constant, ...], fact.head.terms)
+        fact_similarity = similarity
+        for position, other in compared_positions:
+            other_constant = terms[other] if isinstance(other, int) else other
+            fact_similarity = min(
+                fact_similarity, similarity_func(terms[position], other_constant)
+            )
+            if fact_similarity < min_similarity_threshold:
+                if ctx.hooks is not None:
+                    ctx.hooks.on_unify_failure(goal, fact, UnifyFailure.TERMS)
+                break
+        else:
+            yield fact, fact_similarity, [
+                (variable, terms[position]) for position, variable in binding_positions
+            ]
+
+
+def compare_in_bulk(
+    table: FactTable,
+    columns: FactColumns,
+    rows: Optional[NDArray[np.int64]],
+    compared_positions: ComparedPositions,
+    predicate_similarity: float,
+) -> tuple[NDArray[np.int64], NDArray[np.float64]] | None:
+    """
+    Vectorized unification of the goal's compared positions against many facts at once.
+    Each goal constant is compared with every distinct constant in its position once,
+    with a single matrix-vector product for fuzzy constants, or by symbol id for exact ones,
+    and the similarities are then spread out to the facts and combined with a row-wise min.
+    Dot products of normalized embeddings can differ from cosine_similarity in the last bit.
+    Returns the rows, or every row if rows is None, along with their unification similarities,
+    or None if the table's constants can't be compared in bulk.
+    """
+    if rows is None:
+        rows = np.arange(len(columns.columns))
+    similarities = np.full(len(rows), predicate_similarity, dtype=np.float64)
+    for position, other in compared_positions:
+        symbol_column = table.symbol_column(columns, position)
+        if symbol_column is None:
+            return None
+        indices = symbol_column.inverse[rows]
+        if isinstance(other, int):
+            other_column = table.symbol_column(columns, other)
+            if other_column is None:
+                return None
+            position_similarities = pairwise_similarities(
+                symbol_column, indices, other_column, other_column.inverse[rows]
+            )
+        else:
+            position_similarities = constant_similarities(table, symbol_column, other)[
+                indices
+            ]
+        np.minimum(similarities, position_similarities, out=similarities)
+    return rows, similarities
+
+
+def constant_similarities(
+    table: FactTable, symbol_column: SymbolColumn, constant: Constant
+) -> NDArray[np.float64]:
+    """the similarity of the constant to each distinct constant in the column"""
+    symbol_id = table.symbols.constants.get_id(constant.symbol)
+    similarities = (symbol_column.ids == symbol_id).astype(np.float64)
+    if symbol_column.vectors is not None and constant.embedding is not None:
+        vector = (
+            table.embeddings.vector(constant)
+            if table.embeddings is not None
+            else normalize_rows(np.asarray(constant.embedding, dtype=np.float64))
+        )
+        similarities = np.where(
+            symbol_column.embedded, symbol_column.vectors.scores(vector), similarities
+        )
+    return similarities
+
+
+def pairwise_similarities(
+    column1: SymbolColumn,
+    indices1: NDArray[np.int64],
+    column2: SymbolColumn,
+    indices2: NDArray[np.int64],
+) -> NDArray[np.float64]:
+    """the similarity between the constants of two columns, row by row"""
+    similarities = (column1.ids[indices1] == column2.ids[indices2]).astype(np.float64)
+    if column1.vectors is not None and column2.vectors is not None:
+        embedded = column1.embedded[indices1] & column2.embedded[indices2]
+        dtype = column1.vectors.compute_dtype
+        dots = np.einsum(
+            "ij,ij->i",
+            column1.vectors.vectors(indices1, dtype),
+            column2.vectors.vectors(indices2, dtype),
+        )
+        similarities = np.where(embedded, dots, similarities)
+    return similarities
@@ -0,0 +1,78 @@
+from __future__ import annotations
+from typing import Iterator
+
+from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.Proof import Proof, ProofStep
+from fuzzy_reasoner.prover.ProofContext import ProofContext
+from fuzzy_reasoner.prover.ProofState import ProofState
+from fuzzy_reasoner.prover.SearchHooks import PruneReason
+from fuzzy_reasoner.prover.operations.recurse import recurse, resolve_rules
+from fuzzy_reasoner.prover.operations.tabling import VariantKey, canonicalize_goal
+
+
+class FailureMemo:
+    """
+    Remembers subgoal variants which have no proofs at all within some proof depth,
+    so later calls to the same variant with no more depth left can skip them straight away.
+    Whether a goal can be proven doesn't depend on the proof it's part of, only on its variant
+    and the depth left, so a failure at one depth is a failure at every smaller depth too.
+    This is what stops iterative deepening from re-exploring the dead ends of the shallower
+    iterations, and it also catches repeated dead ends within a single iteration.
+    """
+
+    # the largest depth each variant has failed with
+    failed_depths: dict[VariantKey, int]
+
+    def __init__(self) -> None:
+        self.failed_depths = {}
+
+    def resolve(
+        self,
+        goal: Goal,
+        max_depth: int,
+        proof_state: ProofState,
+        ctx: ProofContext,
+    ) -> Iterator[tuple[ProofState, ProofStep]]:
+        """resolve the goal like recurse, unless it's already known to fail with this depth"""
+        key, _atom = canonicalize_goal(goal, proof_state.substitutions)
+        failed_depth = self.failed_depths.get(key, -1)
+        if failed_depth >= max_depth:
+            if ctx.hooks is not None:
+                ctx.hooks.on_prune(goal, PruneReason.KNOWN_FAILURE)
+            return
+        found_proof = False
+        for result in resolve_rules(goal, max_depth, proof_state, ctx):
+            found_proof = True
+            yield result
+        # only a search which ran to completion, rather than being closed early, proves failure
+        if not found_proof:
+            self.failed_depths[key] = max_depth
+
+
+def proof_depth(step: ProofStep) -> int:
+    """the smallest max proof depth the proof of the step can be found with"""
+    if step.last_child is None:
+        return 0
+    return 1 + max(proof_depth(child) for child in step.children())
+
+
+def proofs_at_depth(goal: Goal, depth: int, ctx: ProofContext) -> Iterator[Proof]:
+    """
+    Run one iteration of iterative deepening, yielding only the proofs which need
+    exactly this max proof depth, since the shallower ones were found by earlier iterations
+    """
+    for proof_state, step in recurse(goal, depth, ProofState(), ctx):
+        if proof_depth(step) == depth:
+            yield Proof(step, proof_state.substitutions)
+
+
+def iterative_deepening_search(
+    goal: Goal, max_depth: int, ctx: ProofContext
+) -> Iterator[Proof]:
+    """
+    Search with max proof depths of 0, 1, 2... up to max_depth in turn, yielding every proof once,
+    shallowest first. Use a ProofContext with a FailureMemo, so each iteration skips the
+    subgoals the previous ones found to be dead ends.
+    """
+    for depth in range(max_depth + 1):
+        yield from proofs_at_depth(goal, depth, ctx)
@@ -1,147 +1,330 @@
 from __future__ import annotations
-from typing import Optional
+from typing import Iterator, Optional
 
+from fuzzy_reasoner.prover.FactTable import FactTable, FactTableRows
 from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.ProofContext import ProofContext
+from fuzzy_reasoner.prover.RuleIndex import CandidateGroup
 from fuzzy_reasoner.prover.ProofState import ProofState
-from fuzzy_reasoner.prover.operations.substitution import generate_variable_scope
-from fuzzy_reasoner.prover.operations.unify import unify
-from fuzzy_reasoner.prover.Proof import (
-    ProofNode,
+from fuzzy_reasoner.prover.SearchHooks import PruneReason
+from fuzzy_reasoner.prover.operations.facts import (
+    bind_facts,
+    deref_substitutions,
+    match_facts,
 )
-from fuzzy_reasoner.similarity import SimilarityFunc
-from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.prover.operations.substitution import BindingStore
+from fuzzy_reasoner.prover.operations.unify import unify, unify_in_store
+from fuzzy_reasoner.prover.Proof import ProofStep, StepChain
 
 
 def recurse(
     goal: Goal,
     max_depth: int,
     proof_state: ProofState,
-    rules: frozenset[Rule],
-    similarity_func: Optional[SimilarityFunc],
-    min_similarity_threshold: float,
-) -> tuple[list[ProofState], list[ProofNode]]:
+    ctx: ProofContext,
+) -> Iterator[tuple[ProofState, ProofStep]]:
     """
     Operation corresponding to OR from "end-to-end differentiable proving"
-    This will try to unify every available rule against the current goal
-    and will return the resulting ProofStates
+    This will try to unify every candidate rule from the index against the current goal
+    and will lazily yield the resulting ProofStates along with their proof steps
     """
-    next_proof_states: list[ProofState] = []
-    proof_nodes: list[ProofNode] = []
-    for rule in rules:
-        scope = generate_variable_scope()
-        unify_result = unify(
-            rule,
-            goal,
-            scope,
-            proof_state.substitutions,
-            similarity_func=similarity_func,
-            min_similarity_threshold=min_similarity_threshold,
-        )
-        # if unification failed, just skip this rule
-        if not unify_result:
+    if ctx.tables is not None:
+        yield from ctx.tables.resolve(goal, proof_state, ctx)
+        return
+    if ctx.failures is not None:
+        yield from ctx.failures.resolve(goal, max_depth, proof_state, ctx)
+        return
+    yield from resolve_rules(goal, max_depth, proof_state, ctx)
+
+
+def resolve_rules(
+    goal: Goal,
+    max_depth: int,
+    proof_state: ProofState,
+    ctx: ProofContext,
+    candidate_groups: Optional[list[CandidateGroup]] = None,
+) -> Iterator[tuple[ProofState, ProofStep]]:
+    """
+    Resolve the goal against every candidate rule, without consulting any tables.
+    If candidate_groups is given, only those rules are tried, rather than all the candidates.
+    """
+    if ctx.budget is not None:
+        ctx.budget.charge_expansion()
+    hooks = ctx.hooks
+    if hooks is not None:
+        hooks.on_goal_expanded(goal, max_depth)
+    if candidate_groups is None:
+        candidate_groups = ctx.candidates(goal.statement)
+    for predicate_similarity, candidate_rules in candidate_groups:
+        if isinstance(candidate_rules, FactTable):
+            yield from resolve_facts(
+                goal, candidate_rules, predicate_similarity, proof_state, ctx
+            )
             continue
-        substitutions, similarity = unify_result
-        overall_similarity = min(similarity, proof_state.similarity)
-        next_proof_state = ProofState(
-            similarity=overall_similarity,
-            substitutions=substitutions,
-        )
-        # if there's more atoms in the body of the rule, we'll need to AND them to continue the proof
-        if rule.body:
-            subgoals = tuple(Goal(atom, scope=scope) for atom in rule.body)
-            child_proof_states, child_proof_nodes_lists = join(
-                subgoals,
-                max_depth,
-                next_proof_state,
-                rules,
-                similarity_func,
-                min_similarity_threshold,
+        if isinstance(candidate_rules, FactTableRows):
+            yield from resolve_facts(
+                goal,
+                candidate_rules.table,
+                predicate_similarity,
+                proof_state,
+                ctx,
+                (candidate_rules.start, candidate_rules.stop),
+            )
+            continue
+        for rule in candidate_rules:
+            scope = ctx.scopes.allocate()
+            unify_result = unify(
+                rule,
+                goal,
+                scope,
+                proof_state.substitutions,
+                similarity_func=ctx.similarity_func,
+                min_similarity_threshold=ctx.min_similarity_threshold,
+                predicate_similarity=predicate_similarity,
             )
-            if not child_proof_states:
+            # if unification failed, just skip this rule
+            if not unify_result:
+                if hooks is not None:
+                    ctx.report_unify_failure(goal, rule, predicate_similarity)
                 continue
-            next_proof_states += child_proof_states
-            for child_node_list, child_proof_state in zip(
-                child_proof_nodes_lists, child_proof_states
-            ):
-                proof_nodes.append(
-                    ProofNode(
+            substitutions, similarity = unify_result
+            if hooks is not None:
+                hooks.on_unify_success(goal, rule, similarity)
+            overall_similarity = min(similarity, proof_state.similarity)
+            next_proof_state = ProofState(
+                similarity=overall_similarity,
+                substitutions=substitutions,
+            )
+            # if there's more atoms in the body of the rule, we'll need to AND them to continue the proof
+            if rule.body:
+                subgoals = tuple(Goal(atom, scope=scope) for atom in rule.body)
+                for child_proof_state, children in join(
+                    subgoals, max_depth, next_proof_state, ctx
+                ):
+                    yield child_proof_state, ProofStep(
                         goal.statement,
                         rule,
-                        goal_scope=goal.scope,
-                        rule_scope=scope,
-                        unification_similarity=similarity,
-                        overall_similarity=child_proof_state.similarity,
-                        substitutions=child_proof_state.substitutions,
-                        children=child_node_list,
+                        goal.scope,
+                        scope,
+                        similarity,
+                        child_proof_state.similarity,
+                        children,
+                        child_proof_state.substitutions,
                     )
-                )
-        else:
-            next_proof_states.append(next_proof_state)
-            proof_nodes.append(
-                ProofNode(
+            else:
+                yield next_proof_state, ProofStep(
                     goal.statement,
                     rule,
-                    goal_scope=goal.scope,
-                    rule_scope=scope,
-                    unification_similarity=similarity,
-                    overall_similarity=overall_similarity,
+                    goal.scope,
+                    scope,
+                    similarity,
+                    overall_similarity,
                     substitutions=substitutions,
                 )
-            )
-    return next_proof_states, proof_nodes
+
+
+def resolve_facts(
+    goal: Goal,
+    table: FactTable,
+    predicate_similarity: Optional[float],
+    proof_state: ProofState,
+    ctx: ProofContext,
+    row_range: Optional[tuple[int, int]] = None,
+) -> Iterator[tuple[ProofState, ProofStep]]:
+    """
+    Resolve the goal against a whole table of ground facts at once, or a range of its rows.
+    Facts have no variables of their own, so they can all share a single rule scope.
+    """
+    hooks = ctx.hooks
+    scope = ctx.scopes.allocate()
+    deref = deref_substitutions(proof_state.substitutions)
+    for fact, similarity, bindings in match_facts(
+        goal, table, predicate_similarity, deref, ctx, row_range
+    ):
+        if hooks is not None:
+            hooks.on_unify_success(goal, fact, similarity)
+        substitutions = bind_facts(bindings, proof_state.substitutions)
+        overall_similarity = min(similarity, proof_state.similarity)
+        yield ProofState(
+            similarity=overall_similarity, substitutions=substitutions
+        ), ProofStep(
+            goal.statement,
+            fact,
+            goal.scope,
+            scope,
+            similarity,
+            overall_similarity,
+            substitutions=substitutions,
+        )
 
 
 def join(
     goals: tuple[Goal, ...],
     max_depth: int,
     proof_state: ProofState,
-    rules: frozenset[Rule],
-    similarity_func: Optional[SimilarityFunc],
-    min_similarity_threshold: float,
-) -> tuple[list[ProofState], list[list[ProofNode]]]:
+    ctx: ProofContext,
+    previous: Optional[StepChain] = None,
+) -> Iterator[tuple[ProofState, StepChain]]:
     """
     Operation corresponding to AND from "end-to-end differentiable proving"
 
-    This will attempt to prove all the subgoals and return the resulting proofstates
+    This will attempt to prove all the subgoals and lazily yield the resulting proofstates,
+    along with the chain of their proof steps, which continues on from previous
     """
 
     if max_depth <= 0:
-        return [], []
-
-    proof_states: list[ProofState] = []
-    conjunction_nodes: list[list[ProofNode]] = []
+        if ctx.hooks is not None:
+            ctx.hooks.on_prune(goals[0], PruneReason.DEPTH)
+        return
     first_goal = goals[0]
     remaining_goals = goals[1:]
-    recursed_proof_states, recursed_proof_nodes = recurse(
-        first_goal,
-        max_depth - 1,
-        proof_state,
-        rules,
-        similarity_func,
-        min_similarity_threshold,
-    )
-    # if we can't prove the first step of AND, the whole thing fails
-    if not recursed_proof_states:
-        return [], []
-    # no more goals to prove, so every successful proof of the main goal is sufficient
-    if len(remaining_goals) == 0:
-        conjunction_nodes = [[n] for n in recursed_proof_nodes]
-        return recursed_proof_states, conjunction_nodes
-    for recursed_proof_state, recursed_proof_node in zip(
-        recursed_proof_states, recursed_proof_nodes
+    for recursed_proof_state, recursed_proof_step in recurse(
+        first_goal, max_depth - 1, proof_state, ctx
     ):
-        joined_proof_states, joined_proof_nodes_lists = join(
-            remaining_goals,
-            max_depth,
-            recursed_proof_state,
-            rules,
-            similarity_func,
-            min_similarity_threshold,
-        )
-        if not joined_proof_states:
+        chain = StepChain(recursed_proof_step, previous)
+        # no more goals to prove, so every successful proof of the main goal is sufficient
+        if len(remaining_goals) == 0:
+            yield recursed_proof_state, chain
+            continue
+        yield from join(remaining_goals, max_depth, recursed_proof_state, ctx, chain)
+
+
+def recurse_with_store(
+    goal: Goal,
+    max_depth: int,
+    similarity: float,
+    store: BindingStore,
+    ctx: ProofContext,
+) -> Iterator[tuple[float, ProofStep]]:
+    """
+    Same as recurse, but binding variables in place in a BindingStore, which is undone on backtrack.
+    The store holds the bindings of each result only until the next result is requested.
+    """
+    if ctx.budget is not None:
+        ctx.budget.charge_expansion()
+    hooks = ctx.hooks
+    if hooks is not None:
+        hooks.on_goal_expanded(goal, max_depth)
+    for predicate_similarity, candidate_rules in ctx.candidates(goal.statement):
+        if isinstance(candidate_rules, FactTable):
+            yield from resolve_facts_with_store(
+                goal, candidate_rules, predicate_similarity, similarity, store, ctx
+            )
+            continue
+        if isinstance(candidate_rules, FactTableRows):
+            yield from resolve_facts_with_store(
+                goal,
+                candidate_rules.table,
+                predicate_similarity,
+                similarity,
+                store,
+                ctx,
+                (candidate_rules.start, candidate_rules.stop),
+            )
             continue
-        proof_states += joined_proof_states
-        for joined_proof_nodes in joined_proof_nodes_lists:
-            conjunction_nodes.append([recursed_proof_node, *joined_proof_nodes])
+        for rule in candidate_rules:
+            scope = ctx.scopes.allocate()
+            mark = store.mark()
+            unify_similarity = unify_in_store(
+                rule,
+                goal,
+                scope,
+                store,
+                similarity_func=ctx.similarity_func,
+                min_similarity_threshold=ctx.min_similarity_threshold,
+                predicate_similarity=predicate_similarity,
+            )
+            if hooks is not None:
+                if unify_similarity is None:
+                    ctx.report_unify_failure(goal, rule, predicate_similarity)
+                else:
+                    hooks.on_unify_success(goal, rule, unify_similarity)
+            if unify_similarity is not None:
+                overall_similarity = min(unify_similarity, similarity)
+                if rule.body:
+                    subgoals = tuple(Goal(atom, scope=scope) for atom in rule.body)
+                    for child_similarity, children in join_with_store(
+                        subgoals, max_depth, overall_similarity, store, ctx
+                    ):
+                        yield child_similarity, ProofStep(
+                            goal.statement,
+                            rule,
+                            goal.scope,
+                            scope,
+                            unify_similarity,
+                            child_similarity,
+                            children,
+                        )
+                else:
+                    yield overall_similarity, ProofStep(
+                        goal.statement,
+                        rule,
+                        goal.scope,
+                        scope,
+                        unify_similarity,
+                        overall_similarity,
+                    )
+            store.undo(mark)
+
+
+def resolve_facts_with_store(
+    goal: Goal,
+    table: FactTable,
+    predicate_similarity: Optional[float],
+    similarity: float,
+    store: BindingStore,
+    ctx: ProofContext,
+    row_range: Optional[tuple[int, int]] = None,
+) -> Iterator[tuple[float, ProofStep]]:
+    """
+    Same as resolve_facts, but binding variables in place in a BindingStore
+    """
+    hooks = ctx.hooks
+    scope = ctx.scopes.allocate()
+    for fact, unify_similarity, bindings in match_facts(
+        goal, table, predicate_similarity, store.deref, ctx, row_range
+    ):
+        if hooks is not None:
+            hooks.on_unify_success(goal, fact, unify_similarity)
+        mark = store.mark()
+        for (var_scope, variable), constant in bindings:
+            store.bind(variable, var_scope, constant)
+        overall_similarity = min(unify_similarity, similarity)
+        yield overall_similarity, ProofStep(
+            goal.statement,
+            fact,
+            goal.scope,
+            scope,
+            unify_similarity,
+            overall_similarity,
+        )
+        store.undo(mark)
+
 
-    return proof_states, conjunction_nodes
+def join_with_store(
+    goals: tuple[Goal, ...],
+    max_depth: int,
+    similarity: float,
+    store: BindingStore,
+    ctx: ProofContext,
+    previous: Optional[StepChain] = None,
+) -> Iterator[tuple[float, StepChain]]:
+    """
+    Same as join, but binding variables in place in a BindingStore
+    """
+    if max_depth <= 0:
+        if ctx.hooks is not None:
+            ctx.hooks.on_prune(goals[0], PruneReason.DEPTH)
+        return
+    first_goal = goals[0]
+    remaining_goals = goals[1:]
+    for recursed_similarity, recursed_step in recurse_with_store(
+        first_goal, max_depth - 1, similarity, store, ctx
+    ):
+        chain = StepChain(recursed_step, previous)
+        if len(remaining_goals) == 0:
+            yield recursed_similarity, chain
+            continue
+        yield from join_with_store(
+            remaining_goals, max_depth, recursed_similarity, store, ctx, chain
+        )
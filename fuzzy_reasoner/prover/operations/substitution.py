@@ -1,11 +1,11 @@
 from __future__ import annotations
-from typing import Tuple, Union
+from threading import Lock
+from typing import Optional, Tuple, Union
 from immutables import Map
 
 from fuzzy_reasoner.types.Constant import Constant
 from fuzzy_reasoner.types.Variable import Variable
 
-
 # using from __future__ import annotations with | doesn't work here
 # I think because this is declaring a type as a variable
 SubstitutionsMap = Map[int, Map[Variable, Union[Constant, Tuple[int, Variable]]]]
@@ -16,13 +16,40 @@ class VariableBindingError(Exception):
 
 
 _count = 0
+_count_lock = Lock()
 
 
 def generate_variable_scope() -> int:
-    """simple helper to output different int each time its called to use as a scope for variable binding"""
+    """
+    simple helper to output different int each time its called to use as a scope for variable binding
+    Proof runs allocate their own scopes with a ScopeAllocator, so this is only needed for building Goals by hand
+    """
     global _count
-    _count += 1
-    return _count
+    with _count_lock:
+        _count += 1
+        return _count
+
+
+class ScopeAllocator:
+    """
+    Hands out the variable scopes for a single proof run, as small dense ints counting up from 0.
+    Scopes only need to be unique within a run, so each run owns its allocator,
+    and the same query always gets the same scopes.
+    """
+
+    num_scopes: int
+
+    def __init__(self) -> None:
+        self.num_scopes = 0
+
+    def allocate(self) -> int:
+        scope = self.num_scopes
+        self.num_scopes += 1
+        return scope
+
+    def reserve(self, scope: int) -> None:
+        """make sure a scope which is already in use, e.g. by a user-provided Goal, is never allocated"""
+        self.num_scopes = max(self.num_scopes, scope + 1)
 
 
 def resolve_term(
@@ -38,6 +65,29 @@ def resolve_term(
     return var_binding if var_binding else term
 
 
+def resolve_variable(
+    variable: Variable, scope: int, substitutions: SubstitutionsMap
+) -> Constant | tuple[int, Variable]:
+    """
+    Follow the chain of bindings for this variable, returning either the constant it's bound to,
+    or the (scope, variable) at the end of the chain if it's still unbound.
+    A chain which loops back on itself never reaches a constant, so it ends at the variable
+    where the loop closes.
+    """
+    seen: set[tuple[int, Variable]] = set()
+    while True:
+        scope_bindings = substitutions.get(scope)
+        var_binding = scope_bindings.get(variable) if scope_bindings else None
+        if var_binding is None:
+            return (scope, variable)
+        if not isinstance(var_binding, tuple):
+            return var_binding
+        seen.add((scope, variable))
+        if var_binding in seen:
+            return (scope, variable)
+        scope, variable = var_binding
+
+
 def is_var_bound(
     variable: Variable, scope: int, substitutions: SubstitutionsMap
 ) -> bool:
@@ -48,14 +98,9 @@ def get_var_binding(
     variable: Variable, scope: int, substitutions: SubstitutionsMap
 ) -> Constant | None:
     """Return the currently bound constant for this variable if already bound, or None if not bound yet"""
-    scope_bindings = substitutions.get(scope)
-    if not scope_bindings:
-        return None
-    var_binding = scope_bindings.get(variable)
-    # if this is bound to another variable, recursively look up that variable
-    if isinstance(var_binding, tuple):
-        return get_var_binding(var_binding[1], var_binding[0], substitutions)
-    return var_binding
+    # follow the chain with resolve_variable, which stops at a loop of bindings rather than recursing forever
+    var_binding = resolve_variable(variable, scope, substitutions)
+    return None if isinstance(var_binding, tuple) else var_binding
 
 
 def set_var_binding(
@@ -77,3 +122,84 @@ def set_var_binding(
             f"Tried to bind an already-bound variable {variable} in scope {scope}"
         )
     return substitutions.set(scope, scope_bindings.set(variable, value))
+
+
+# the value a variable is bound to in a BindingStore, same as in a SubstitutionsMap
+Binding = Union[Constant, Tuple[int, Variable]]
+
+
+class BindingStore:
+    """
+    Mutable alternative to SubstitutionsMap, in the style of the WAM.
+    Bindings live in per-scope cells, stored in a list indexed by scope, and every binding
+    is pushed onto a trail. Backtracking pops the trail back to an earlier mark and clears
+    those cells, rather than building a new immutable map for every binding.
+
+    Because bindings are undone on backtrack, a snapshot() needs to be taken of anything
+    which should outlive the current branch of the search, such as a finished proof.
+    """
+
+    def __init__(self) -> None:
+        self._cells: list[Optional[dict[Variable, Binding]]] = []
+        self._trail: list[tuple[int, Variable]] = []
+
+    def __len__(self) -> int:
+        """the number of bindings currently in the store"""
+        return len(self._trail)
+
+    def mark(self) -> int:
+        """return a point on the trail which the store can later be undone back to"""
+        return len(self._trail)
+
+    def undo(self, mark: int) -> None:
+        """remove every binding made since the mark was taken"""
+        trail = self._trail
+        cells = self._cells
+        while len(trail) > mark:
+            scope, variable = trail.pop()
+            scope_cells = cells[scope]
+            assert scope_cells is not None
+            del scope_cells[variable]
+
+    def deref(self, term: Variable | Constant, scope: int) -> Binding:
+        """
+        Follow the chain of bindings for this term, returning either the constant it's bound to,
+        or the (scope, variable) at the end of the chain if it's still unbound
+        """
+        if isinstance(term, Constant):
+            return term
+        cells = self._cells
+        while True:
+            scope_cells = cells[scope] if scope < len(cells) else None
+            value = scope_cells.get(term) if scope_cells else None
+            if value is None:
+                return (scope, term)
+            if not isinstance(value, tuple):
+                return value
+            scope, term = value
+
+    def bind(self, variable: Variable, scope: int, value: Binding) -> None:
+        """bind an unbound variable, which must already be at the end of its chain of bindings"""
+        cells = self._cells
+        if scope >= len(cells):
+            cells.extend([None] * (scope + 1 - len(cells)))
+        scope_cells = cells[scope]
+        if scope_cells is None:
+            scope_cells = {}
+            cells[scope] = scope_cells
+        if variable in scope_cells:
+            raise VariableBindingError(
+                f"Tried to bind an already-bound variable {variable} in scope {scope}"
+            )
+        scope_cells[variable] = value
+        self._trail.append((scope, variable))
+
+    def snapshot(self) -> SubstitutionsMap:
+        """copy the current bindings into an immutable SubstitutionsMap"""
+        scopes: dict[int, dict[Variable, Binding]] = {}
+        cells = self._cells
+        for scope, variable in self._trail:
+            scope_cells = cells[scope]
+            assert scope_cells is not None
+            scopes.setdefault(scope, {})[variable] = scope_cells[variable]
+        return Map({scope: Map(bindings) for scope, bindings in scopes.items()})
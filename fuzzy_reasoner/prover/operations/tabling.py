@@ -0,0 +1,237 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from threading import Lock
+from typing import Hashable, Iterator, Optional, Tuple
+
+from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.Proof import ProofStep
+from fuzzy_reasoner.prover.ProofContext import ProofContext
+from fuzzy_reasoner.prover.ProofState import ProofState
+from fuzzy_reasoner.prover.SearchHooks import PruneReason
+from fuzzy_reasoner.prover.operations.recurse import resolve_rules
+from fuzzy_reasoner.prover.operations.substitution import (
+    SubstitutionsMap,
+    resolve_variable,
+)
+from fuzzy_reasoner.prover.operations.unify import unify
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+# a subgoal variant: its predicate, and each term as either a constant or the index of its variable
+VariantKey = Tuple[Hashable, ...]
+
+
+@dataclass(frozen=True, eq=False)
+class TabledAnswer:
+    similarity: float
+    step: ProofStep
+    # the substitutions the answer's proof finished with
+    substitutions: SubstitutionsMap
+    # a fact to unify callers of the subgoal against to pick up this answer's bindings
+    rule: Rule
+
+
+class SubgoalTable:
+    """
+    The answers found so far for one subgoal variant, along with its evaluation status
+    """
+
+    goal: Goal
+    answers: dict[VariantKey, TabledAnswer]
+    complete: bool
+    # position on the evaluation stack while this subgoal is being evaluated
+    stack_index: Optional[int]
+    # lowest stack position of any in-progress subgoal this subgoal's answers depend on
+    lowlink: int
+    # whether this subgoal has already been evaluated in the current fixpoint iteration
+    fresh: bool
+
+    def __init__(self, goal: Goal) -> None:
+        self.goal = goal
+        self.answers = {}
+        self.complete = False
+        self.stack_index = None
+        self.lowlink = 0
+        self.fresh = False
+
+
+class TableStore:
+    """
+    Tabled resolution of subgoals, in the spirit of SLG resolution.
+    Each subgoal variant (the same goal up to variable renaming, after applying substitutions)
+    is evaluated once, and its answers are reused by every later call to the same variant.
+    Answers keep only the best similarity derivation for each set of bindings.
+
+    Recursive calls to a variant which is still being evaluated consume the answers found so far.
+    The outermost subgoal of a group of mutually dependent subgoals (its leader) then re-evaluates
+    until no new answers are found, after which the whole group is marked complete.
+    This means left-recursive rules terminate without needing to hit the max proof depth.
+    """
+
+    tables: dict[VariantKey, SubgoalTable]
+    max_depth: int
+
+    def __init__(self, max_depth: int) -> None:
+        self.tables = {}
+        self.max_depth = max_depth
+        self._stack: list[SubgoalTable] = []
+        self._incomplete: list[SubgoalTable] = []
+        self._num_changes = 0
+
+    def resolve(
+        self, goal: Goal, proof_state: ProofState, ctx: ProofContext
+    ) -> Iterator[tuple[ProofState, ProofStep]]:
+        key, call_atom = canonicalize_goal(goal, proof_state.substitutions)
+        table = self.tables.get(key)
+        if table is None:
+            table = SubgoalTable(Goal(call_atom, scope=ctx.scopes.allocate()))
+            self.tables[key] = table
+        if table.stack_index is not None:
+            # a recursive call to a subgoal still being evaluated only sees the answers so far
+            self._add_dependency(table.stack_index)
+        elif table.fresh:
+            self._add_dependency(table.lowlink)
+        elif not table.complete:
+            self._evaluate(table, ctx)
+        for answer in list(table.answers.values()):
+            result = consume_answer(answer, goal, proof_state, ctx)
+            if result:
+                yield result
+
+    def _add_dependency(self, stack_index: int) -> None:
+        if self._stack:
+            caller = self._stack[-1]
+            caller.lowlink = min(caller.lowlink, stack_index)
+
+    def _evaluate(self, table: SubgoalTable, ctx: ProofContext) -> None:
+        stack_index = len(self._stack)
+        incomplete_mark = len(self._incomplete)
+        table.stack_index = stack_index
+        self._stack.append(table)
+        while True:
+            # anything evaluated in the last iteration needs re-evaluating in this one
+            for stale_table in self._incomplete[incomplete_mark:]:
+                stale_table.fresh = False
+            del self._incomplete[incomplete_mark:]
+            table.lowlink = stack_index
+            num_changes = self._num_changes
+            for proof_state, step in resolve_rules(
+                table.goal, self.max_depth, ProofState(), ctx
+            ):
+                self._add_answer(table, proof_state, step, ctx)
+            is_leader = table.lowlink >= stack_index
+            if not is_leader or self._num_changes == num_changes:
+                break
+        self._stack.pop()
+        table.stack_index = None
+        if is_leader:
+            table.complete = True
+            for dependent_table in self._incomplete[incomplete_mark:]:
+                dependent_table.complete = True
+                dependent_table.fresh = False
+            del self._incomplete[incomplete_mark:]
+        else:
+            table.fresh = True
+            self._incomplete.append(table)
+            self._add_dependency(table.lowlink)
+
+    def _add_answer(
+        self,
+        table: SubgoalTable,
+        proof_state: ProofState,
+        step: ProofStep,
+        ctx: ProofContext,
+    ) -> None:
+        answer_key, answer_atom = canonicalize_goal(
+            table.goal, proof_state.substitutions, for_answer=True
+        )
+        existing_answer = table.answers.get(answer_key)
+        if existing_answer and existing_answer.similarity >= proof_state.similarity:
+            if ctx.hooks is not None:
+                ctx.hooks.on_prune(table.goal, PruneReason.DOMINATED_ANSWER)
+            return
+        table.answers[answer_key] = TabledAnswer(
+            proof_state.similarity, step, proof_state.substitutions, Rule(answer_atom)
+        )
+        self._num_changes += 1
+
+
+_canonical_vars: list[Variable] = []
+_placeholder_vars: list[Variable] = []
+_canonical_vars_lock = Lock()
+
+
+def get_canonical_var(index: int, placeholder: bool = False) -> Variable:
+    variables = _placeholder_vars if placeholder else _canonical_vars
+    if index < len(variables):
+        return variables[index]
+    with _canonical_vars_lock:
+        while len(variables) <= index:
+            variables.append(
+                Variable(f"{'_' if placeholder else '_T'}{len(variables)}")
+            )
+    return variables[index]
+
+
+def canonicalize_goal(
+    goal: Goal, substitutions: SubstitutionsMap, for_answer: bool = False
+) -> tuple[VariantKey, Atom]:
+    """
+    Build the variant key of the goal under the substitutions, along with a canonical atom for it.
+    Unbound variables are numbered in order of first appearance, so variants share the same key.
+    With for_answer, terms which were already constants in the goal are replaced by placeholder
+    variables in the atom, so it only carries the new bindings of an answer.
+    """
+    key: list[Hashable] = [goal.statement.predicate]
+    terms: list[Constant | Variable] = []
+    variable_indices: dict[tuple[int, Variable], int] = {}
+    for position, term in enumerate(goal.statement.terms):
+        if isinstance(term, Constant):
+            key.append(term)
+            terms.append(get_canonical_var(position, True) if for_answer else term)
+            continue
+        resolved = resolve_variable(term, goal.scope, substitutions)
+        if isinstance(resolved, Constant):
+            key.append(resolved)
+            terms.append(resolved)
+        else:
+            index = variable_indices.setdefault(resolved, len(variable_indices))
+            key.append(index)
+            terms.append(get_canonical_var(index))
+    return tuple(key), Atom(goal.statement.predicate, tuple(terms))
+
+
+def consume_answer(
+    answer: TabledAnswer, goal: Goal, proof_state: ProofState, ctx: ProofContext
+) -> tuple[ProofState, ProofStep] | None:
+    """
+    Bind the goal's variables to a tabled answer, and build a proof step reusing the answer's proof
+    """
+    unify_result = unify(
+        answer.rule,
+        goal,
+        ctx.scopes.allocate(),
+        proof_state.substitutions,
+        similarity_func=ctx.similarity_func,
+        min_similarity_threshold=ctx.min_similarity_threshold,
+        predicate_similarity=1.0,
+    )
+    if not unify_result:
+        return None
+    substitutions, _similarity = unify_result
+    similarity = min(answer.similarity, proof_state.similarity)
+    step = answer.step
+    return ProofState(similarity, substitutions), ProofStep(
+        goal.statement,
+        step.rule,
+        goal.scope,
+        step.rule_scope,
+        step.unification_similarity,
+        similarity,
+        step.last_child,
+        substitutions,
+        # include the scopes of the answer's own proof, so the step's rule can be resolved
+        step.resolve_substitutions(answer.substitutions),
+    )
@@ -1,15 +1,15 @@
 from __future__ import annotations
 from typing import Optional
 from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.SearchHooks import UnifyFailure
 
 from fuzzy_reasoner.prover.operations.substitution import (
-    is_var_bound,
-    resolve_term,
+    BindingStore,
+    resolve_variable,
     set_var_binding,
     SubstitutionsMap,
 )
 from fuzzy_reasoner.similarity import SimilarityFunc, symbol_compare
-from fuzzy_reasoner.types.Constant import Constant
 from fuzzy_reasoner.types.Rule import Rule
 from fuzzy_reasoner.types.Variable import Variable
 
@@ -21,6 +21,7 @@ def unify(
     substitutions: SubstitutionsMap,
     similarity_func: Optional[SimilarityFunc] = None,
     min_similarity_threshold: float = 0.5,
+    predicate_similarity: Optional[float] = None,
 ) -> tuple[SubstitutionsMap, float] | None:
     """
     Fuzzy-optional implementation of prolog's unify
@@ -30,6 +31,9 @@ def unify(
     Based on unification module from "End-to-End Differentiable Proving" by Rocktäschel et al.
     https://arxiv.org/abs/1705.11040
 
+    If the similarity between the predicates has already been calculated, e.g. in bulk by a RuleIndex,
+    it can be passed in as predicate_similarity to avoid recalculating it
+
     Returns a tuple with new substitutions and new similariy if successful or None if the unification fails
     """
     head = rule.head
@@ -39,44 +43,119 @@ def unify(
 
     # if there is no comparison function provided, just use symbol compare (non-fuzzy comparisons)
     adjusted_similarity_func = similarity_func or symbol_compare
-    similarity = adjusted_similarity_func(head.predicate, goal.statement.predicate)
+    similarity = (
+        predicate_similarity
+        if predicate_similarity is not None
+        else adjusted_similarity_func(head.predicate, goal.statement.predicate)
+    )
 
     # abort early if the predicate similarity is too low
     if similarity < min_similarity_threshold:
         return None
 
     for head_term, goal_term in zip(head.terms, goal.statement.terms):
-        head_term_resolution = resolve_term(head_term, scope, next_substitutions)
-        goal_term_resolution = resolve_term(goal_term, goal.scope, next_substitutions)
-        if isinstance(head_term_resolution, Variable):
-            # fail unification if it requires rebinding an already bound variable
-            if is_var_bound(head_term_resolution, scope, next_substitutions):
-                return None
-            target_value: Constant | tuple[int, Variable] = (
-                goal_term_resolution
-                if isinstance(goal_term_resolution, Constant)
-                else (goal.scope, goal_term_resolution)
-            )
-            next_substitutions = set_var_binding(
-                head_term_resolution, scope, target_value, next_substitutions
-            )
-        elif isinstance(goal_term_resolution, Variable):
-            # fail unification if it requires rebinding an already bound variable
-            if is_var_bound(goal_term_resolution, goal.scope, next_substitutions):
-                return None
+        # follow both terms to the end of their chains of bindings, so a variable is only
+        # ever bound once it's unbound, and never to itself
+        head_value = (
+            resolve_variable(head_term, scope, next_substitutions)
+            if isinstance(head_term, Variable)
+            else head_term
+        )
+        goal_value = (
+            resolve_variable(goal_term, goal.scope, next_substitutions)
+            if isinstance(goal_term, Variable)
+            else goal_term
+        )
+        if isinstance(head_value, tuple):
+            # both sides may already be bound to the same unbound variable
+            if head_value != goal_value:
+                next_substitutions = set_var_binding(
+                    head_value[1], head_value[0], goal_value, next_substitutions
+                )
+        elif isinstance(goal_value, tuple):
             next_substitutions = set_var_binding(
-                goal_term_resolution,
-                goal.scope,
-                head_term_resolution,
-                next_substitutions,
+                goal_value[1], goal_value[0], head_value, next_substitutions
             )
         else:
             similarity = min(
                 similarity,
-                adjusted_similarity_func(head_term_resolution, goal_term_resolution),
+                adjusted_similarity_func(head_value, goal_value),
             )
             # abort early if the predicate similarity is too low
             if similarity < min_similarity_threshold:
                 return None
 
     return (next_substitutions, similarity)
+
+
+def unify_in_store(
+    rule: Rule,
+    goal: Goal,
+    scope: int,
+    store: BindingStore,
+    similarity_func: Optional[SimilarityFunc] = None,
+    min_similarity_threshold: float = 0.5,
+    predicate_similarity: Optional[float] = None,
+) -> float | None:
+    """
+    Same as unify, but binds variables in place in a BindingStore rather than building new substitutions.
+    Returns the similarity if successful or None if the unification fails.
+    This can leave partial bindings behind when it fails, so callers should always undo the store
+    back to a mark taken before calling this once they're done with the result.
+    """
+    head = rule.head
+    if len(head.terms) != len(goal.statement.terms):
+        return None
+
+    adjusted_similarity_func = similarity_func or symbol_compare
+    similarity = (
+        predicate_similarity
+        if predicate_similarity is not None
+        else adjusted_similarity_func(head.predicate, goal.statement.predicate)
+    )
+    if similarity < min_similarity_threshold:
+        return None
+
+    for head_term, goal_term in zip(head.terms, goal.statement.terms):
+        head_value = store.deref(head_term, scope)
+        goal_value = store.deref(goal_term, goal.scope)
+        if isinstance(head_value, tuple):
+            # both sides may already be bound to the same unbound variable
+            if head_value != goal_value:
+                store.bind(head_value[1], head_value[0], goal_value)
+        elif isinstance(goal_value, tuple):
+            store.bind(goal_value[1], goal_value[0], head_value)
+        else:
+            similarity = min(
+                similarity, adjusted_similarity_func(head_value, goal_value)
+            )
+            if similarity < min_similarity_threshold:
+                return None
+
+    return similarity
+
+
+def unify_failure_reason(
+    rule: Rule,
+    goal: Goal,
+    similarity_func: Optional[SimilarityFunc] = None,
+    min_similarity_threshold: float = 0.5,
+    predicate_similarity: Optional[float] = None,
+) -> UnifyFailure:
+    """
+    Work out why unify or unify_in_store failed for the rule and goal, for reporting to search hooks.
+    This only needs to check the arity and the predicates, since if they match,
+    the failure must have come from the terms.
+    """
+    if len(rule.head.terms) != len(goal.statement.terms):
+        return UnifyFailure.ARITY
+    similarity = (
+        predicate_similarity
+        if predicate_similarity is not None
+        else (similarity_func or symbol_compare)(
+            rule.head.predicate, goal.statement.predicate
+        )
+    )
+    if similarity < min_similarity_threshold:
+        return UnifyFailure.PREDICATE
+    return UnifyFailure.TERMS
@@ -1,5 +1,7 @@
 from __future__ import annotations
-from typing import Callable, Union
+from collections import OrderedDict
+from threading import Lock
+from typing import Awaitable, Callable, List, NamedTuple, Sequence, Tuple, Union
 import numpy as np
 from numpy.linalg import norm
 
@@ -11,6 +13,12 @@ SimilarityFunc = Callable[
     [Union[Constant, Predicate], Union[Constant, Predicate]], float
 ]
 
+# scores a whole batch of (item1, item2) pairs at once, e.g. by calling a remote embedding service
+AsyncSimilarityFunc = Callable[
+    [List[Tuple[Union[Constant, Predicate], Union[Constant, Predicate]]]],
+    Awaitable[Sequence[float]],
+]
+
 
 def symbol_compare(item1: Constant | Predicate, item2: Constant | Predicate) -> float:
     """
@@ -31,3 +39,64 @@ def cosine_similarity(
     return np.dot(item1.embedding, item2.embedding) / (
         norm(item1.embedding) * norm(item2.embedding)
     )
+
+
+class SimilarityCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class SimilarityCache:
+    """
+    Size-bounded LRU memo around a SimilarityFunc, for when the similarity function is expensive.
+    Constants and Predicates compare by identity, so the cache is keyed on the symbol objects
+    themselves. Holding a reference to each symbol in the key means its id can never be
+    reused by a different object while the entry is cached.
+    """
+
+    similarity_func: SimilarityFunc
+    maxsize: int
+
+    def __init__(self, similarity_func: SimilarityFunc, maxsize: int = 100_000) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer")
+        self.similarity_func = similarity_func
+        self.maxsize = maxsize
+        self._cache: OrderedDict[
+            tuple[Constant | Predicate, Constant | Predicate], float
+        ] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = Lock()
+
+    def __call__(
+        self, item1: Constant | Predicate, item2: Constant | Predicate
+    ) -> float:
+        key = (item1, item2)
+        with self._lock:
+            similarity = self._cache.get(key)
+            if similarity is not None:
+                self._hits += 1
+                self._cache.move_to_end(key)
+                return similarity
+            self._misses += 1
+        similarity = self.similarity_func(item1, item2)
+        with self._lock:
+            self._cache[key] = similarity
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return similarity
+
+    def cache_info(self) -> SimilarityCacheInfo:
+        with self._lock:
+            return SimilarityCacheInfo(
+                self._hits, self._misses, self.maxsize, len(self._cache)
+            )
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._hits = 0
+            self._misses = 0
@@ -4,8 +4,10 @@ from dataclasses import dataclass
 from .Variable import Variable
 from .Constant import Constant
 from .Predicate import Predicate
+from .slots import add_slots
 
 
+@add_slots
 @dataclass(frozen=True, eq=False)
 class Atom:
     predicate: Predicate
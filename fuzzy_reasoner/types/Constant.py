@@ -1,7 +1,9 @@
 from dataclasses import dataclass
 from typing import Optional, Any
+from .slots import add_slots
 
 
+@add_slots
 @dataclass(frozen=True, eq=False)
 class Constant:
     symbol: str
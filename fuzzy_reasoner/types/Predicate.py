@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING, Optional, Any
 
 from .Constant import Constant
 from .Variable import Variable
+from .slots import add_slots
 
 # hacky solution to solving circular import for type-checking only
 # from https://stackoverflow.com/a/39757388/245362
@@ -11,6 +12,7 @@ if TYPE_CHECKING:
     from .Atom import Atom
 
 
+@add_slots
 @dataclass(frozen=True, eq=False)
 class Predicate:
     symbol: str
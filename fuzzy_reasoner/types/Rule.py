@@ -3,8 +3,10 @@ from dataclasses import dataclass
 from typing import Optional
 
 from .Atom import Atom
+from .slots import add_slots
 
 
+@add_slots
 @dataclass(frozen=True, eq=False)
 class Rule:
     head: Atom
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
+from .slots import add_slots
 
 
+@add_slots
 @dataclass(frozen=True, eq=False)
 class Variable:
     name: str
@@ -0,0 +1,38 @@
+from __future__ import annotations
+from dataclasses import fields
+from typing import Any, Type, TypeVar
+
+T = TypeVar("T")
+
+
+def add_slots(cls: Type[T]) -> Type[T]:
+    """
+    Recreate a frozen dataclass with __slots__ for its fields, so instances don't need a __dict__.
+    A __weakref__ slot is kept, so instances can still be weakly referenced.
+    This is the same as dataclass(slots=True), which is only available from python 3.10.
+    Must be applied on top of the @dataclass decorator.
+    """
+    dataclass_cls: Any = cls
+    field_names = tuple(field.name for field in fields(dataclass_cls))
+    cls_dict = dict(cls.__dict__)
+    # field defaults are already baked into __init__, and would conflict with the slots
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    cls_dict["__slots__"] = (*field_names, "__weakref__")
+    # frozen dataclasses can't be unpickled with setattr, so slots need explicit state handling
+    cls_dict["__getstate__"] = _getstate
+    cls_dict["__setstate__"] = _setstate
+    slotted_cls: Type[T] = type(dataclass_cls)(cls.__name__, cls.__bases__, cls_dict)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
+
+
+def _getstate(self: Any) -> tuple[Any, ...]:
+    return tuple(getattr(self, field.name) for field in fields(self))
+
+
+def _setstate(self: Any, state: tuple[Any, ...]) -> None:
+    for field, value in zip(fields(self), state):
+        object.__setattr__(self, field.name, value)
@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+from benchmarks.compare import compare_reports
+from benchmarks.run import main, run_benchmarks
+from benchmarks.workloads import GENERATORS, QUICK_PARAMS
+from fuzzy_reasoner.prover.SLDProver import SLDProver
+
+
+def test_workloads_are_reproducible_and_provable() -> None:
+    for name, generator in GENERATORS.items():
+        workload = generator(**QUICK_PARAMS[name])
+        assert [str(goal) for goal in generator(**QUICK_PARAMS[name]).goals] == [
+            str(goal) for goal in workload.goals
+        ]
+        prover = SLDProver(knowledge=workload.knowledge, **workload.prover_settings)
+        assert any(prover.prove(goal) for goal in workload.goals)
+
+
+def test_run_benchmarks_reports_every_workload_and_mode() -> None:
+    report = run_benchmarks(
+        ["fan_out", "transitive_chain"],
+        ["default", "binding_store"],
+        ["prove", "prove_all"],
+        repeat=1,
+        quick=True,
+        param_overrides={"fan_out": {"width": 2}},
+    )
+    results = report["results"]
+    assert [(result["workload"], result["mode"]) for result in results] == [
+        ("fan_out", "default"),
+        ("fan_out", "binding_store"),
+        ("transitive_chain", "default"),
+        ("transitive_chain", "binding_store"),
+    ]
+    assert results[0]["params"]["width"] == 2
+    for result in results:
+        for stats in result["operations"].values():
+            assert stats["nodes_expanded"] > 0
+            assert stats["peak_memory_bytes"] > 0
+            assert stats["num_proofs"] > 0
+    # both search modes expand the same goals
+    assert (
+        results[0]["operations"]["prove_all"]["nodes_expanded"]
+        == results[1]["operations"]["prove_all"]["nodes_expanded"]
+    )
+    _lines, regressed = compare_reports(report, report, threshold=0.1)
+    assert not regressed
+
+
+def test_main_writes_json_results(tmp_path: Path) -> None:
+    output = tmp_path / "results.json"
+    main(
+        [
+            "--quick",
+            "--workloads",
+            "fan_out",
+            "--repeat",
+            "1",
+            "--set",
+            "fan_out.depth=2",
+            "--output",
+            str(output),
+        ]
+    )
+    report = json.loads(output.read_text())
+    assert report["version"] == 1
+    assert report["results"][0]["params"]["depth"] == 2
+    assert "python_version" in report["environment"]
@@ -0,0 +1,127 @@
+from itertools import product
+from typing import Any, Union
+from immutables import Map
+import numpy as np
+import pytest
+from fuzzy_reasoner.prover.FactTable import FactTable, FactTableRows
+from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.ProofContext import ProofContext
+from fuzzy_reasoner.prover.RuleIndex import RuleIndex
+from fuzzy_reasoner.prover.SymbolTable import SymbolTable
+from fuzzy_reasoner.prover.operations.facts import (
+    bind_facts,
+    deref_substitutions,
+    match_facts,
+)
+from fuzzy_reasoner.prover.operations.recurse import recurse_with_store
+from fuzzy_reasoner.prover.operations.substitution import BindingStore
+from fuzzy_reasoner.prover.operations.unify import unify
+from fuzzy_reasoner.similarity import cosine_similarity, symbol_compare
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+X = Variable("X")
+Y = Variable("Y")
+rel = Predicate("rel", np.array([1.0, 0.0, 1.0]))
+fuzzy_rel = Predicate("fuzzy_rel", np.array([1.0, 0.2, 0.9]))
+a = Constant("a")
+b = Constant("b")
+c = Constant("c", np.array([1.0, 0.0]))
+d = Constant("d", np.array([0.8, 0.6]))
+constants = [a, b, c, d]
+
+facts = [Rule(rel(first, second)) for first, second in product(constants, repeat=2)]
+goal_terms: list[Union[Constant, Variable]] = [X, Y, *constants]
+
+
+def test_match_facts_agrees_with_unifying_each_fact() -> None:
+    for similarity_func in [cosine_similarity, symbol_compare, None]:
+        fuzzy_constants = similarity_func is cosine_similarity
+        table = FactTable(rel, 2, SymbolTable(), fuzzy_constants, facts)
+        for threshold, predicate in product([0.0, 0.5, 0.9], [rel, fuzzy_rel]):
+            ctx = ProofContext(RuleIndex([]), similarity_func, threshold)
+            for first, second in product(goal_terms, repeat=2):
+                goal = Goal(predicate(first, second), 1)
+                expected = []
+                for fact in facts:
+                    result = unify(fact, goal, 2, Map(), similarity_func, threshold)
+                    if result:
+                        expected.append((fact, result[1], result[0]))
+                deref = deref_substitutions(Map())
+                matched = [
+                    (fact, similarity, bind_facts(bindings, Map()))
+                    for fact, similarity, bindings in match_facts(
+                        goal, table, None, deref, ctx
+                    )
+                ]
+                # bulk similarities are only equal up to floating point rounding
+                assert [(fact, subs) for fact, _sim, subs in matched] == [
+                    (fact, subs) for fact, _sim, subs in expected
+                ]
+                assert [sim for _fact, sim, _subs in matched] == pytest.approx(
+                    [sim for _fact, sim, _subs in expected]
+                )
+
+
+def test_comparing_facts_in_bulk_agrees_with_comparing_them_one_by_one() -> None:
+    rng = np.random.default_rng(0)
+    fuzzy_constants = [Constant(f"c{i}", rng.normal(size=2)) for i in range(6)]
+    all_constants = [*constants, *fuzzy_constants]
+    table_facts = [
+        Rule(rel(first, second)) for first, second in product(all_constants, repeat=2)
+    ]
+    table = FactTable(rel, 2, SymbolTable(), True, table_facts)
+    first_terms: list[Union[Constant, Variable]] = [X, a, c, *fuzzy_constants[:2]]
+    second_terms: list[Union[Constant, Variable]] = [X, Y, d, fuzzy_constants[2]]
+    for threshold, first, second in product([0.0, 0.3, 0.9], first_terms, second_terms):
+        goal = Goal(rel(first, second), 1)
+        deref = deref_substitutions(Map())
+        results = []
+        for bulk in [True, False]:
+            ctx = ProofContext(
+                RuleIndex([]), cosine_similarity, threshold, bulk_fact_similarity=bulk
+            )
+            results.append(list(match_facts(goal, table, None, deref, ctx)))
+        bulk_results, expected = results
+        assert [fact for fact, _sim, _bindings in bulk_results] == [
+            fact for fact, _sim, _bindings in expected
+        ]
+        assert [sim for _fact, sim, _bindings in bulk_results] == pytest.approx(
+            [sim for _fact, sim, _bindings in expected]
+        )
+        assert [bindings for _fact, _sim, bindings in bulk_results] == [
+            bindings for _fact, _sim, bindings in expected
+        ]
+
+
+def test_match_facts_follows_existing_bindings() -> None:
+    table = FactTable(rel, 2, SymbolTable(), False, facts)
+    ctx = ProofContext(RuleIndex([]), symbol_compare, 0.5)
+    store = BindingStore()
+    # X in scope 1 is bound to Y in scope 0, which is bound to a
+    store.bind(X, 1, (0, Y))
+    store.bind(Y, 0, a)
+    matches = list(match_facts(Goal(rel(X, Y), 1), table, None, store.deref, ctx))
+    assert [fact.head.terms for fact, _sim, _bindings in matches] == [
+        (a, constant) for constant in constants
+    ]
+    assert matches[1][2] == [((1, Y), b)]
+
+
+def test_recurse_with_store_matches_a_range_of_table_rows_with_its_indexes() -> None:
+    table = FactTable(rel, 2, SymbolTable(), False, facts)
+    calls = []
+
+    def counting_compare(item1: Any, item2: Any) -> float:
+        calls.append((item1, item2))
+        return symbol_compare(item1, item2)
+
+    ctx = ProofContext(RuleIndex([]), counting_compare, 0.5)
+    ctx.candidate_cache[(rel, 2)] = [(None, FactTableRows(table, 2, 10))]
+    results = list(recurse_with_store(Goal(rel(b, X), 1), 1, 1.0, BindingStore(), ctx))
+    assert [step.rule for _similarity, step in results] == facts[4:8]
+    # only the predicate is compared, since the bound argument is looked up in the index
+    assert len(calls) == 1
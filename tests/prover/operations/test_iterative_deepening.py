@@ -0,0 +1,107 @@
+from fuzzy_reasoner.prover.Proof import Proof
+from fuzzy_reasoner.prover.SLDProver import SLDProver
+from fuzzy_reasoner.prover.SearchHooks import PruneReason
+from fuzzy_reasoner.prover.SearchStats import SearchStats
+from fuzzy_reasoner.prover.operations.iterative_deepening import proof_depth
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+X = Variable("X")
+Y = Variable("Y")
+Z = Variable("Z")
+edge = Predicate("edge")
+path = Predicate("path")
+nodes = [Constant(f"node_{i}") for i in range(8)]
+
+# a chain of edges plus a shortcut from the start to the end
+knowledge = [
+    Rule(path(X, Y), (edge(X, Z), path(Z, Y))),
+    Rule(path(X, Y), (edge(X, Y),)),
+    *(Rule(edge(node1, node2)) for node1, node2 in zip(nodes, nodes[1:])),
+    Rule(edge(nodes[0], nodes[-1])),
+]
+
+
+def depth_of(proof: Proof) -> int:
+    assert proof.step is not None
+    return proof_depth(proof.step)
+
+
+def test_iterative_deepening_finds_the_same_proofs_shallowest_first() -> None:
+    prover = SLDProver(knowledge=knowledge)
+    deepening_prover = SLDProver(knowledge=knowledge, iterative_deepening=True)
+    for goal in [path(nodes[0], nodes[-1]), path(nodes[2], X), path(X, Y)]:
+        proofs = prover.prove_all(goal)
+        deepening_proofs = list(deepening_prover.iter_proofs(goal))
+        assert sorted(map(str, deepening_proofs)) == sorted(map(str, proofs))
+        depths = [depth_of(proof) for proof in deepening_proofs]
+        assert depths == sorted(depths)
+
+
+def test_iterative_deepening_returns_the_shallowest_proof() -> None:
+    prover = SLDProver(knowledge=knowledge, iterative_deepening=True)
+    proof = prover.prove(path(nodes[0], nodes[-1]))
+    assert proof is not None
+    assert depth_of(proof) == 1
+
+    proofs = prover.prove_top_k(path(nodes[0], X), 3)
+    assert [proof.variable_bindings[X] for proof in proofs] == [
+        nodes[1],
+        nodes[-1],
+        nodes[2],
+    ]
+    assert prover.prove(path(nodes[-1], X)) is None
+
+
+def test_iterative_deepening_skips_goals_which_already_failed() -> None:
+    # each subgoal is a dead end, which later iterations shouldn't explore again
+    dead_end = Predicate("dead_end")
+    prover = SLDProver(
+        knowledge=[*knowledge, Rule(path(X, Y), (dead_end(X),))],
+        iterative_deepening=True,
+    )
+    stats = SearchStats()
+    proofs = list(prover.iter_proofs(path(nodes[0], X), hooks=stats))
+    assert len(proofs) == len(nodes)
+    assert stats.pruned[PruneReason.KNOWN_FAILURE] > 0
+
+
+def test_prove_all_searches_once_but_orders_proofs_like_the_iterations() -> None:
+    prover = SLDProver(knowledge=knowledge)
+    deepening_prover = SLDProver(knowledge=knowledge, iterative_deepening=True)
+    for goal in [path(nodes[0], nodes[-1]), path(nodes[2], X), path(X, Y)]:
+        iterated_proofs = sorted(
+            deepening_prover.iter_proofs(goal),
+            key=lambda proof: proof.similarity_score,
+            reverse=True,
+        )
+        stats = SearchStats()
+        proofs = deepening_prover.prove_all(goal, hooks=stats)
+        assert list(map(str, proofs)) == list(map(str, iterated_proofs))
+        # every depth is needed, so no shallower iterations are searched first
+        default_stats = SearchStats()
+        prover.prove_all(goal, hooks=default_stats)
+        assert stats.goals_expanded == default_stats.goals_expanded
+
+
+def test_iterative_deepening_proves_goals_with_repeated_variables() -> None:
+    q = Predicate("q")
+    r = Predicate("r")
+    b = Constant("b")
+    # the failure memo canonicalizes every subgoal, which used to loop forever once
+    # unifying q(X, X) with q(X, X) had bound the goal's X to itself
+    prover = SLDProver(
+        knowledge=[Rule(q(b, b)), Rule(q(X, X), (r(X),))],
+        iterative_deepening=True,
+    )
+    proof = prover.prove(q(X, X))
+    assert proof is not None
+    assert proof.variable_bindings[X] == b
+    assert [proof.variable_bindings[X] for proof in prover.prove_top_k(q(X, X), 2)] == [
+        b
+    ]
+    assert [proof.variable_bindings[X] for proof in prover.iter_proofs(q(X, X))] == [b]
+    assert [proof.variable_bindings[X] for proof in prover.prove_all(q(X, X))] == [b]
@@ -4,9 +4,12 @@
 from immutables import Map
 import pytest  # type: ignore
 from fuzzy_reasoner.prover.operations.substitution import (
+    BindingStore,
+    ScopeAllocator,
     SubstitutionsMap,
     VariableBindingError,
     get_var_binding,
+    resolve_variable,
     set_var_binding,
 )
 from fuzzy_reasoner.types.Constant import Constant
@@ -28,6 +31,21 @@ def test_get_var_binding_recursively_resolves_dependencies() -> None:
     assert get_var_binding(var2, 7, subs) == const1
 
 
+def test_resolve_variable_stops_at_a_loop_of_bindings() -> None:
+    var1 = Variable("X")
+    var2 = Variable("Y")
+    subs: SubstitutionsMap = Map(
+        {
+            3: Map({var1: (3, var1), var2: (7, var1)}),
+            7: Map({var1: (3, var2)}),
+        }
+    )
+    assert resolve_variable(var1, 3, subs) == (3, var1)
+    assert resolve_variable(var2, 3, subs) == (7, var1)
+    assert get_var_binding(var1, 3, subs) is None
+    assert get_var_binding(var2, 3, subs) is None
+
+
 # -- set_var_binding helper --
 
 
@@ -69,3 +87,43 @@ def test_set_var_binding_raises_exception_when_binding_already_bound_var() -> No
 
     with pytest.raises(VariableBindingError):
         set_var_binding(var1, 3, (3, var2), subs)
+
+
+def test_scope_allocator_hands_out_dense_scopes_skipping_reserved_ones() -> None:
+    scopes = ScopeAllocator()
+    assert [scopes.allocate() for _ in range(3)] == [0, 1, 2]
+    scopes.reserve(5)
+    scopes.reserve(1)
+    assert scopes.allocate() == 6
+
+
+def test_binding_store_undoes_bindings_back_to_a_mark() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    bart = Constant("bart")
+    store = BindingStore()
+    store.bind(X, 0, (3, Y))
+    mark = store.mark()
+    store.bind(Y, 3, bart)
+    assert store.deref(X, 0) == bart
+    assert len(store) == 2
+    with pytest.raises(VariableBindingError):
+        store.bind(Y, 3, bart)
+    store.undo(mark)
+    assert store.deref(X, 0) == (3, Y)
+    assert store.deref(Y, 1) == (1, Y)
+    assert len(store) == 1
+
+
+def test_binding_store_snapshot_matches_set_var_binding() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    bart = Constant("bart")
+    store = BindingStore()
+    store.bind(X, 0, (3, Y))
+    store.bind(Y, 3, bart)
+    subs: SubstitutionsMap = Map()
+    subs = set_var_binding(X, 0, (3, Y), subs)
+    subs = set_var_binding(Y, 3, bart, subs)
+    assert store.snapshot() == subs
+    assert get_var_binding(X, 0, store.snapshot()) == bart
@@ -0,0 +1,127 @@
+import numpy as np
+from fuzzy_reasoner.prover.SLDProver import SLDProver
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+X = Variable("X")
+Y = Variable("Y")
+Z = Variable("Z")
+edge = Predicate("edge")
+path = Predicate("path")
+
+
+def test_tabling_terminates_on_left_recursive_rules() -> None:
+    nodes = [Constant(f"node_{i}") for i in range(30)]
+    knowledge = [
+        *[Rule(edge(n1, n2)) for n1, n2 in zip(nodes, nodes[1:])],
+        Rule(path(X, Y), (path(X, Z), edge(Z, Y))),
+        Rule(path(X, Y), (edge(X, Y),)),
+    ]
+    prover = SLDProver(knowledge=knowledge, max_proof_depth=1000, tabling=True)
+
+    proofs = prover.prove_all(path(nodes[0], X))
+    assert {proof.variable_bindings[X] for proof in proofs} == set(nodes[1:])
+    assert prover.prove(path(nodes[0], nodes[-1])) is not None
+    assert prover.prove(path(nodes[-1], nodes[0])) is None
+
+
+def test_tabling_handles_cycles() -> None:
+    a, b, c, d = [Constant(name) for name in "abcd"]
+    knowledge = [
+        Rule(edge(a, b)),
+        Rule(edge(b, c)),
+        Rule(edge(c, a)),
+        Rule(edge(c, d)),
+        Rule(path(X, Y), (edge(X, Z), path(Z, Y))),
+        Rule(path(X, Y), (edge(X, Y),)),
+    ]
+    prover = SLDProver(knowledge=knowledge, max_proof_depth=100, tabling=True)
+
+    proofs = prover.prove_all(path(b, X))
+    assert {proof.variable_bindings[X] for proof in proofs} == {a, b, c, d}
+    all_pairs = prover.prove_all(path(X, Y))
+    assert len(all_pairs) == 12
+    assert prover.prove(path(d, X)) is None
+
+
+def test_tabling_finds_the_same_answers_as_plain_search() -> None:
+    grandpa_of = Predicate("grandpa_of")
+    parent_of = Predicate("parent_of")
+    father_of = Predicate("father_of")
+    bart = Constant("bart")
+    lisa = Constant("lisa")
+    homer = Constant("homer")
+    marge = Constant("marge")
+    clancy = Constant("clancy")
+    abe = Constant("abe")
+    knowledge = [
+        Rule(parent_of(homer, bart)),
+        Rule(parent_of(homer, lisa)),
+        Rule(parent_of(marge, bart)),
+        Rule(parent_of(marge, lisa)),
+        Rule(father_of(abe, homer)),
+        Rule(father_of(clancy, marge)),
+        Rule(grandpa_of(X, Y), (father_of(X, Z), parent_of(Z, Y))),
+    ]
+    plain_prover = SLDProver(knowledge=knowledge)
+    tabled_prover = SLDProver(knowledge=knowledge, tabling=True)
+
+    def bindings(prover: SLDProver) -> set[tuple[object, object]]:
+        return {
+            (proof.variable_bindings[X], proof.variable_bindings[Y])
+            for proof in prover.prove_all(grandpa_of(X, Y))
+        }
+
+    assert bindings(tabled_prover) == bindings(plain_prover)
+    assert len(bindings(tabled_prover)) == 4
+
+
+def test_tabled_proofs_keep_the_best_derivation_for_each_answer() -> None:
+    grandpa_of = Predicate("grandpa_of")
+    father_of = Predicate("father_of", np.array([0.99, 0.05, 1.07]))
+    dad_of = Predicate("dad_of", np.array([1.0, 0.0, 1.0]))
+    bart = Constant("bart")
+    homer = Constant("homer")
+    abe = Constant("abe")
+    grandpa_of_def = Rule(grandpa_of(X, Y), (father_of(X, Z), father_of(Z, Y)))
+    knowledge = [
+        Rule(father_of(homer, bart)),
+        Rule(dad_of(homer, bart)),
+        Rule(father_of(abe, homer)),
+        Rule(dad_of(abe, homer)),
+        grandpa_of_def,
+    ]
+    prover = SLDProver(knowledge=knowledge, tabling=True)
+
+    proofs = prover.prove_all(grandpa_of(X, bart))
+    assert len(proofs) == 1
+    assert proofs[0].similarity_score == 1.0
+    assert proofs[0].variable_bindings[X] == abe
+    assert proofs[0].head.rule == grandpa_of_def
+    assert proofs[0].head.children is not None
+    assert [child.rule.head.predicate for child in proofs[0].head.children] == [
+        father_of,
+        father_of,
+    ]
+    plain_proof = SLDProver(knowledge=knowledge).prove(grandpa_of(X, bart))
+    assert plain_proof is not None
+    assert proofs[0].pretty_print() == plain_proof.pretty_print()
+
+
+def test_tabling_resolves_goals_with_repeated_variables() -> None:
+    q = Predicate("q")
+    r = Predicate("r")
+    b = Constant("b")
+    c = Constant("c")
+    knowledge = [Rule(q(b, b)), Rule(q(X, X), (r(X),))]
+    prover = SLDProver(knowledge=knowledge, tabling=True)
+
+    proofs = prover.prove_all(q(X, X))
+    assert [proof.variable_bindings[X] for proof in proofs] == [b]
+    prover.add_knowledge([Rule(r(c))])
+    proofs = prover.prove_all(q(X, X))
+    assert {proof.variable_bindings[X] for proof in proofs} == {b, c}
+    assert prover.prove(q(Y, c)) is not None
@@ -2,9 +2,16 @@ from immutables import Map
 import numpy as np
 import pytest  # type: ignore
 from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.SearchHooks import UnifyFailure
 
+from fuzzy_reasoner.prover.operations.substitution import (
+    BindingStore,
+    resolve_variable,
+)
 from fuzzy_reasoner.prover.operations.unify import (
     unify,
+    unify_failure_reason,
+    unify_in_store,
 )
 from fuzzy_reasoner.similarity import cosine_similarity
 from fuzzy_reasoner.types.Constant import Constant
@@ -110,3 +117,59 @@ def test_unify_uses_the_min_similarity_of_all_unified_items() -> None:
     assert result is not None
     assert result[0] == Map()
     assert result[1] == pytest.approx(0.5)
+
+
+def test_unify_in_store_binds_the_same_variables_as_unify() -> None:
+    is_parent = Predicate("is_parent")
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    bart = Constant("bart")
+
+    rule = Rule(is_parent(X, bart, X))
+    goal = Goal(is_parent(Y, Z, Y), 3)
+    result = unify(rule, goal, scope, Map())
+    assert result is not None
+
+    store = BindingStore()
+    similarity = unify_in_store(rule, goal, scope, store)
+    assert similarity == result[1]
+    assert store.deref(Z, 3) == bart
+    assert store.deref(Y, 3) == store.deref(X, scope)
+    assert len(store) == 2
+
+
+def test_unify_never_binds_a_variable_to_itself() -> None:
+    q = Predicate("q")
+    X = Variable("X")
+
+    result = unify(Rule(q(X, X)), Goal(q(X, X), 3), scope, Map())
+    assert result is not None
+    substitutions, _similarity = result
+    # the goal's X is bound to the rule's X once, and the second pair already matches
+    assert substitutions == Map({scope: Map({X: (3, X)})})
+    assert resolve_variable(X, 3, substitutions) == (3, X)
+
+
+def test_unify_in_store_fails_on_mismatched_constants() -> None:
+    is_dog = Predicate("is_dog")
+    store = BindingStore()
+    rule = Rule(is_dog(Constant("fluffy")))
+    goal = Goal(is_dog(Constant("rex")), 3)
+    assert unify_in_store(rule, goal, scope, store) is None
+
+
+def test_unify_failure_reason_explains_why_unify_failed() -> None:
+    is_dog = Predicate("is_dog", np.array([1.0, 0.0]))
+    is_cat = Predicate("is_cat", np.array([0.0, 1.0]))
+    X = Variable("X")
+    fluffy = Constant("fluffy")
+    goal = Goal(is_dog(fluffy), scope + 1)
+    cases = [
+        (Rule(is_dog(X, X)), UnifyFailure.ARITY),
+        (Rule(is_cat(X)), UnifyFailure.PREDICATE),
+        (Rule(is_dog(Constant("rex"))), UnifyFailure.TERMS),
+    ]
+    for rule, reason in cases:
+        assert unify(rule, goal, scope, Map(), cosine_similarity) is None
+        assert unify_failure_reason(rule, goal, cosine_similarity) == reason
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest  # type: ignore
+from fuzzy_reasoner.prover.EmbeddingMatrix import EmbeddingMatrix
+from fuzzy_reasoner.similarity import cosine_similarity
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+
+
+def test_embedding_matrix_stores_normalized_rows_for_each_symbol() -> None:
+    is_dog = Predicate("is_dog", np.array([3.0, 4.0]))
+    fluffy = Constant("fluffy", np.array([0.0, 2.0]))
+    furball = Constant("furball")
+
+    matrix = EmbeddingMatrix.from_rules([Rule(is_dog(fluffy)), Rule(is_dog(furball))])
+
+    assert matrix is not None
+    assert len(matrix) == 2
+    assert matrix.matrix.flags["C_CONTIGUOUS"]
+    assert matrix.vector(is_dog) == pytest.approx(np.array([0.6, 0.8]))
+    assert matrix.vector(fluffy) == pytest.approx(np.array([0.0, 1.0]))
+    assert matrix.row(furball) is None
+
+
+def test_embedding_matrix_similarity_matches_cosine_similarity() -> None:
+    fluffy = Constant("fluffy", np.array([1, 0, 1]))
+    furball = Constant("furball", np.array([0, 1, 1]))
+    # constants outside the matrix are normalized on the fly
+    fuzzball = Constant("fuzzball", np.array([1, 1, 1]))
+    matrix = EmbeddingMatrix([fluffy, furball])
+
+    assert matrix.similarity(fluffy, furball) == pytest.approx(
+        cosine_similarity(fluffy, furball)
+    )
+    assert matrix.similarity(fluffy, fuzzball) == pytest.approx(
+        cosine_similarity(fluffy, fuzzball)
+    )
+    assert matrix.similarity(Constant("a"), Constant("a")) == 1.0
+
+
+def test_from_rules_returns_none_if_embeddings_cannot_be_stacked() -> None:
+    is_dog = Predicate("is_dog", np.array([1.0, 0.0]))
+    fluffy = Constant("fluffy", np.array([0.0, 1.0, 1.0]))
+    assert EmbeddingMatrix.from_rules([Rule(is_dog(fluffy))]) is None
+
+
+def test_add_appends_rows_for_new_embedded_symbols() -> None:
+    fluffy = Constant("fluffy", np.array([3.0, 4.0]))
+    furball = Constant("furball", np.array([0.0, 2.0]))
+    matrix = EmbeddingMatrix([fluffy])
+
+    assert matrix.add([fluffy, furball, Constant("rex"), furball]) == [1]
+    assert len(matrix) == 2
+    assert matrix.row(furball) == 1
+    assert matrix.vector(furball) == pytest.approx(np.array([0.0, 1.0]))
+    with pytest.raises(ValueError):
+        matrix.add([Constant("fuzzball", np.array([1.0, 1.0, 1.0]))])
+
+
+def test_select_copies_rows_in_the_same_storage() -> None:
+    fluffy = Constant("fluffy", np.array([3.0, 4.0]))
+    furball = Constant("furball", np.array([0.0, 2.0]))
+    matrix = EmbeddingMatrix([fluffy], "int8")
+
+    selected = matrix.select([furball, None, Constant("rex"), fluffy])
+    assert selected.storage == "int8" and len(selected) == 4
+    assert selected.row(fluffy) is None
+    assert selected.matrix[3].tolist() == matrix.matrix[0].tolist()
+    assert selected.vectors() == pytest.approx(
+        np.array([[0.0, 1.0], [0.0, 0.0], [0.0, 0.0], [0.6, 0.8]]),
+        abs=selected.row_error,
+    )
+    with pytest.raises(ValueError):
+        matrix.select([Constant("fuzzball", np.array([1.0, 1.0, 1.0]))])
+
+
+@pytest.mark.parametrize("storage", ["float32", "float16", "int8"])
+def test_compact_storage_stays_within_its_error_bound(storage: str) -> None:
+    rng = np.random.default_rng(0)
+    constants = [Constant(f"c{i}", rng.normal(size=64)) for i in range(50)]
+    exact = EmbeddingMatrix(constants)
+    compact = EmbeddingMatrix(constants, storage)
+
+    assert compact.storage == storage
+    assert compact.matrix.nbytes < exact.matrix.nbytes
+    assert 0 < compact.error_bound < 0.05
+    exact_scores = exact.scores(exact.matrix.T)
+    compact_scores = compact.scores(compact.vectors(dtype=np.float32).T)
+    assert np.abs(compact_scores - exact_scores).max() <= compact.error_bound
+    for constant in constants[:5]:
+        assert (
+            abs(
+                compact.similarity(constant, constants[0])
+                - exact.similarity(constant, constants[0])
+            )
+            <= compact.error_bound
+        )
+    # converted and added rows keep the same storage
+    converted = exact.astype(storage)
+    assert converted.storage == storage
+    assert np.abs(converted.vectors() - exact.matrix).max() <= converted.row_error
+    compact.add([Constant("extra", rng.normal(size=64))])
+    assert compact.storage == storage and len(compact) == 51
+
+
+def test_unknown_embedding_storage_fails() -> None:
+    with pytest.raises(ValueError):
+        EmbeddingMatrix([Constant("fluffy", np.array([1.0, 0.0]))], "int4")
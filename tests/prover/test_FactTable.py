@@ -0,0 +1,145 @@
+import numpy as np
+from fuzzy_reasoner.prover.EmbeddingMatrix import EmbeddingMatrix
+from fuzzy_reasoner.prover.FactTable import FactTable, build_position_index
+from fuzzy_reasoner.prover.SymbolTable import SymbolTable
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+
+
+parent_of = Predicate("parent_of")
+homer = Constant("homer")
+bart = Constant("bart")
+lisa = Constant("lisa")
+fuzzy_bart = Constant("bart", np.array([1.0, 0.0]))
+
+facts = [
+    Rule(parent_of(homer, bart)),
+    Rule(parent_of(homer, lisa)),
+    Rule(parent_of(Constant("marge"), bart)),
+]
+
+
+def test_fact_table_is_a_sequence_of_its_facts() -> None:
+    table = FactTable(parent_of, 2, SymbolTable(), False, facts)
+    assert len(table) == 3
+    assert list(table) == facts
+    assert table[1] is facts[1]
+    assert isinstance(table[1:], FactTable)
+    assert list(table[1:]) == facts[1:]
+
+
+def test_lookup_finds_rows_by_symbol() -> None:
+    table = FactTable(parent_of, 2, SymbolTable(), False, facts)
+    columns = table.columns()
+    assert columns.columns.shape == (3, 2)
+    assert table.lookup(columns, 0, homer).tolist() == [0, 1]
+    # constants are interned by symbol, so equal symbols match regardless of identity
+    assert table.lookup(columns, 1, Constant("bart")).tolist() == [0, 2]
+    assert table.lookup(columns, 1, Constant("maggie")).tolist() == []
+
+
+def test_appending_facts_invalidates_the_columns() -> None:
+    table = FactTable(parent_of, 2, SymbolTable(), False, facts[:1])
+    columns = table.columns()
+    table.append(facts[1])
+    assert table.columns() is not columns
+    assert table.lookup(table.columns(), 0, homer).tolist() == [0, 1]
+
+
+def test_without_builds_a_new_table() -> None:
+    table = FactTable(parent_of, 2, SymbolTable(), False, facts)
+    remaining = table.without({facts[0]})
+    assert remaining is not None
+    assert list(remaining) == facts[1:]
+    assert list(table) == facts
+    assert table.without(set(facts)) is None
+
+
+def test_can_index_avoids_positions_with_fuzzy_constants() -> None:
+    symbols = SymbolTable()
+    table = FactTable(
+        parent_of, 2, symbols, True, [*facts, Rule(parent_of(homer, fuzzy_bart))]
+    )
+    assert table.can_index(0, homer)
+    assert table.can_index(1, bart)
+    assert not table.can_index(1, fuzzy_bart)
+    assert FactTable(parent_of, 2, symbols, False, table).can_index(1, fuzzy_bart)
+
+
+def test_symbol_column_has_the_distinct_constants_of_a_position() -> None:
+    fuzzy_lisa = Constant("lisa", np.array([0.0, 2.0]))
+    symbols = SymbolTable()
+    table = FactTable(
+        parent_of, 2, symbols, True, [Rule(parent_of(homer, fuzzy_lisa)), *facts[:1]]
+    )
+    columns = table.columns()
+    symbol_column = table.symbol_column(columns, 1)
+    assert symbol_column is not None
+    assert table.symbol_column(columns, 1) is symbol_column
+    assert [symbols.constants[id].symbol for id in symbol_column.ids] == [
+        "lisa",
+        "bart",
+    ]
+    assert symbol_column.inverse.tolist() == [0, 1]
+    assert symbol_column.embedded.tolist() == [True, False]
+    assert symbol_column.vectors is not None
+    assert symbol_column.vectors.matrix.tolist() == [[0.0, 1.0], [0.0, 0.0]]
+    # without fuzzy constants, the constants are only compared by symbol
+    exact_table = FactTable(parent_of, 2, symbols, False, table)
+    exact_column = exact_table.symbol_column(exact_table.columns(), 1)
+    assert exact_column is not None and exact_column.vectors is None
+
+
+def test_symbol_column_copies_the_compact_rows_of_the_embeddings() -> None:
+    fuzzy_lisa = Constant("lisa", np.array([0.0, 2.0]))
+    fuzzy_maggie = Constant("maggie", np.array([0.6, 0.8]))
+    embeddings = EmbeddingMatrix([fuzzy_maggie, fuzzy_lisa], "int8")
+    table = FactTable(
+        parent_of,
+        2,
+        SymbolTable(),
+        True,
+        [Rule(parent_of(homer, fuzzy_lisa)), Rule(parent_of(homer, fuzzy_maggie))],
+        embeddings=embeddings,
+    )
+    symbol_column = table.symbol_column(table.columns(), 1)
+    assert symbol_column is not None and symbol_column.vectors is not None
+    assert symbol_column.vectors.storage == "int8"
+    rows = np.array([embeddings.row(fuzzy_lisa), embeddings.row(fuzzy_maggie)])
+    assert symbol_column.vectors.matrix.tolist() == embeddings.matrix[rows].tolist()
+    assert symbol_column.vectors.scales is not None and embeddings.scales is not None
+    assert symbol_column.vectors.scales.tolist() == embeddings.scales[rows].tolist()
+
+
+def test_symbol_column_refuses_symbols_with_different_embeddings() -> None:
+    table = FactTable(
+        parent_of, 2, SymbolTable(), True, [*facts, Rule(parent_of(homer, fuzzy_bart))]
+    )
+    assert table.symbol_column(table.columns(), 1) is None
+
+
+def test_build_position_index() -> None:
+    index = build_position_index(np.array([3, 1, 3, 2, 1]))
+    assert {key: rows.tolist() for key, rows in index.items()} == {
+        1: [1, 4],
+        2: [3],
+        3: [0, 2],
+    }
+
+
+def test_loaded_facts_are_only_built_when_needed() -> None:
+    symbols = SymbolTable()
+    for constant in [homer, bart, lisa]:
+        symbols.constants.add(constant)
+    loaded_columns = np.array([[0, 1], [0, 2]])
+    table = FactTable(parent_of, 2, symbols, False, [facts[2]], loaded_columns)
+    assert len(table) == 3
+    assert table.num_loaded == 2
+    assert table.columns().columns.tolist() == [[0, 1], [0, 2], [3, 1]]
+    assert facts[2] in table
+    fact = table[1]
+    assert table[1] is fact
+    assert fact in table
+    assert fact.head.terms == (homer, lisa)
+    assert table.added_facts == [facts[2]]
@@ -0,0 +1,145 @@
+from pathlib import Path
+import numpy as np
+import pytest  # type: ignore
+from fuzzy_reasoner.prover.KnowledgeFile import load_knowledge, save_knowledge
+from fuzzy_reasoner.prover.RuleIndex import RuleIndex
+from fuzzy_reasoner.prover.SLDProver import SLDProver
+from fuzzy_reasoner.prover.SymbolTable import SymbolTable
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+X = Variable("X")
+Y = Variable("Y")
+Z = Variable("Z")
+symbols = SymbolTable()
+father_of = symbols.predicate("father_of", np.array([1.0, 0.0, 1.0]))
+dad_of = Predicate("dad_of", np.array([0.9, 0.1, 1.0]))
+grandpa_of = Predicate("grandpa_of")
+abe = symbols.constant("abe")
+homer = symbols.constant("homer")
+bart = symbols.constant("bart", np.array([1.0, 0.2, 0.0]))
+
+knowledge = [
+    Rule(father_of(abe, homer)),
+    Rule(father_of(homer, bart)),
+    Rule(grandpa_of(X, Y), (dad_of(X, Z), father_of(Z, Y))),
+]
+
+
+def proof_results(prover: SLDProver) -> list[tuple[str, float]]:
+    return [
+        (str(proof.variable_bindings[X]), proof.similarity_score)
+        for proof in prover.prove_all(grandpa_of(X, Constant("bart")))
+    ]
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_loaded_knowledge_proves_the_same_goals(tmp_path: Path, mmap: bool) -> None:
+    prover = SLDProver(knowledge=knowledge, symbols=symbols)
+    prover.save(str(tmp_path))
+    loaded = SLDProver.load(str(tmp_path), mmap=mmap)
+    assert len(loaded.rules) == 3
+    assert proof_results(loaded) == proof_results(prover)
+    assert isinstance(loaded.embeddings.matrix, np.memmap) == mmap  # type: ignore
+
+
+def test_saved_similarity_graph_is_reused_for_the_same_threshold(
+    tmp_path: Path,
+) -> None:
+    prover = SLDProver(knowledge=knowledge, symbols=symbols, similarity_graph=True)
+    prover.save(str(tmp_path))
+    loaded = SLDProver.load(str(tmp_path), similarity_graph=True)
+    loaded_graph = load_knowledge(str(tmp_path)).similarity_graph
+    assert loaded.similarity_graph is not None and loaded_graph is not None
+    assert isinstance(loaded.similarity_graph.neighbours.indices, np.memmap)
+    assert loaded.similarity_graph.num_edges == prover.similarity_graph.num_edges  # type: ignore
+    assert proof_results(loaded) == proof_results(prover)
+    # a lower threshold needs more neighbours than the saved graph has, so it's rebuilt
+    rebuilt = SLDProver.load(
+        str(tmp_path), similarity_graph=True, min_similarity_threshold=0.1
+    )
+    assert rebuilt.similarity_graph is not None
+    assert rebuilt.similarity_graph.min_similarity == 0.1
+
+
+def test_compact_embeddings_are_saved_and_loaded_in_their_storage(
+    tmp_path: Path,
+) -> None:
+    prover = SLDProver(knowledge=knowledge, symbols=symbols, embedding_storage="int8")
+    prover.save(str(tmp_path))
+    loaded = SLDProver.load(str(tmp_path))
+    assert loaded.embeddings is not None and prover.embeddings is not None
+    assert loaded.embeddings.storage == "int8"
+    assert loaded.embeddings.scales is not None
+    assert loaded.embeddings.error_bound == pytest.approx(prover.embeddings.error_bound)
+    assert proof_results(loaded) == proof_results(prover)
+
+
+def test_saved_rules_keep_their_variables_and_embeddings(tmp_path: Path) -> None:
+    save_knowledge(RuleIndex(knowledge, symbols=symbols), str(tmp_path))
+    loaded = load_knowledge(str(tmp_path))
+    [rule] = loaded.rules
+    assert str(rule) == str(knowledge[2])
+    assert rule.body is not None
+    loaded_dad_of = rule.body[0].predicate
+    assert np.array_equal(loaded_dad_of.embedding, dad_of.embedding)  # type: ignore
+    [facts] = loaded.facts
+    assert facts.predicate.symbol == "father_of"
+    assert facts.columns.tolist() == [[0, 1], [1, 2]]
+    assert facts.embedded_positions == [False, True]
+
+
+def test_loaded_facts_are_only_built_when_matched(tmp_path: Path) -> None:
+    SLDProver(knowledge=knowledge, symbols=symbols).save(str(tmp_path))
+    loaded = SLDProver.load(str(tmp_path))
+    [table] = loaded.rule_index.rules_and_fact_tables()[1]
+    assert table.num_loaded == 2
+    loaded.prove(father_of(homer, X))
+    # only the fact which matched homer has been built
+    assert len(table._loaded_facts) == 1
+
+
+@pytest.mark.parametrize("fact_store", [True, False])
+def test_symbols_with_the_same_symbol_and_different_embeddings_are_saved(
+    tmp_path: Path, fact_store: bool
+) -> None:
+    other_bart = Constant("bart", np.array([0.0, 1.0, 0.0]))
+    other_father_of = Predicate("father_of", np.array([0.0, 1.0, 1.0]))
+    knowledge = [
+        Rule(father_of(homer, other_bart)),
+        Rule(father_of(abe, bart)),
+        Rule(other_father_of(abe, homer)),
+        Rule(grandpa_of(X, other_bart), (father_of(X, Y),)),
+    ]
+    prover = SLDProver(knowledge=knowledge, symbols=symbols, fact_store=fact_store)
+    num_constants = len(symbols.constants)
+    prover.save(str(tmp_path))
+    assert len(symbols.constants) == num_constants
+    loaded = SLDProver.load(str(tmp_path), fact_store=fact_store)
+    assert len(loaded.rules) == 4
+    for goal in [
+        father_of(X, Constant("bart", np.array([0.1, 1.0, 0.0]))),
+        father_of(X, Constant("bart", np.array([1.0, 0.1, 0.0]))),
+        father_of(abe, X),
+        grandpa_of(X, Constant("bart", np.array([0.0, 1.0, 0.1]))),
+    ]:
+        assert [
+            (str(proof.variable_bindings[X]), proof.similarity_score)
+            for proof in loaded.prove_all(goal)
+        ] == [
+            (str(proof.variable_bindings[X]), proof.similarity_score)
+            for proof in prover.prove_all(goal)
+        ]
+
+
+def test_saving_does_not_change_the_symbol_table(tmp_path: Path) -> None:
+    prover = SLDProver(knowledge=knowledge, fact_store=False)
+    num_constants = len(prover.rule_index.symbols.constants)
+    num_predicates = len(prover.rule_index.symbols.predicates)
+    prover.save(str(tmp_path))
+    assert len(prover.rule_index.symbols.constants) == num_constants
+    assert len(prover.rule_index.symbols.predicates) == num_predicates
+    assert proof_results(SLDProver.load(str(tmp_path))) == proof_results(prover)
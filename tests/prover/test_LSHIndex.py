@@ -0,0 +1,77 @@
+import numpy as np
+from numpy.typing import NDArray
+import pytest  # type: ignore
+from fuzzy_reasoner.prover.EmbeddingMatrix import EmbeddingMatrix, normalize_rows
+from fuzzy_reasoner.prover.LSHIndex import LSHConfig, LSHIndex
+from fuzzy_reasoner.prover.RuleIndex import RuleIndex
+from fuzzy_reasoner.prover.SLDProver import SLDProver
+from fuzzy_reasoner.similarity import cosine_similarity
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+def clustered_vectors(
+    num_clusters: int, cluster_size: int, dims: int = 32
+) -> NDArray[np.float64]:
+    rng = np.random.default_rng(1)
+    centers = rng.standard_normal((num_clusters, dims))
+    noise = rng.standard_normal((num_clusters, cluster_size, dims)) * 0.1
+    return normalize_rows((centers[:, np.newaxis, :] + noise).reshape(-1, dims))
+
+
+def test_lsh_search_returns_exact_similarities_above_the_threshold() -> None:
+    vectors = clustered_vectors(20, 10)
+    index = LSHIndex(vectors, LSHConfig(num_tables=4, num_bits=8))
+    rows, similarities = index.search(vectors[0], 0.8)
+    assert 0 in rows
+    assert similarities == pytest.approx(vectors[rows] @ vectors[0])
+    assert np.all(similarities >= 0.8)
+
+
+def test_lsh_recall_is_high_for_close_neighbours() -> None:
+    vectors = clustered_vectors(50, 10)
+    index = LSHIndex(vectors, LSHConfig(num_tables=8, num_bits=10))
+    assert index.recall(vectors[::10], 0.9) >= 0.95
+
+
+def test_lsh_looks_at_fewer_rows_than_an_exact_scan() -> None:
+    vectors = clustered_vectors(50, 10)
+    index = LSHIndex(vectors, LSHConfig(num_tables=4, num_bits=12, probe_radius=0))
+    assert len(index.candidate_rows(vectors[0])) < len(vectors) / 4
+
+
+def test_rule_index_can_measure_ann_recall_against_an_exact_scan() -> None:
+    vectors = clustered_vectors(20, 5, dims=16)
+    X = Variable("X")
+    rules = [
+        Rule(Predicate(f"pred_{i}", vector)(X)) for i, vector in enumerate(vectors)
+    ]
+    index = RuleIndex(
+        rules,
+        cosine_similarity,
+        EmbeddingMatrix.from_rules(rules),
+        LSHConfig(min_index_size=10),
+    )
+    goals = [rule.head for rule in rules[::5]]
+    assert index.measure_ann_recall(goals, 0.9) >= 0.9
+    assert index.measure_ann_recall(goals, 2.0) == 1.0
+
+
+def test_prover_can_use_an_ann_index_for_fuzzy_predicates() -> None:
+    vectors = clustered_vectors(20, 5, dims=16)
+    X = Variable("X")
+    bart = Constant("bart")
+    knowledge = [
+        Rule(Predicate(f"pred_{i}", vector)(bart)) for i, vector in enumerate(vectors)
+    ]
+    prover = SLDProver(
+        knowledge=knowledge,
+        min_similarity_threshold=0.99,
+        ann_config=LSHConfig(min_index_size=10),
+    )
+    proof = prover.prove(Predicate("query", vectors[42])(X))
+    assert proof is not None
+    assert proof.head.rule == knowledge[42]
+    assert proof.variable_bindings[X] == bart
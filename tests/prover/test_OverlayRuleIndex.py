@@ -0,0 +1,52 @@
+import numpy as np
+from fuzzy_reasoner.prover.EmbeddingMatrix import EmbeddingMatrix
+from fuzzy_reasoner.prover.OverlayRuleIndex import OverlayRuleIndex
+from fuzzy_reasoner.prover.RuleIndex import CandidateGroup, RuleIndex
+from fuzzy_reasoner.similarity import cosine_similarity
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+X = Variable("X")
+Y = Variable("Y")
+bart = Constant("bart")
+homer = Constant("homer")
+lisa = Constant("lisa")
+father_of = Predicate("father_of", np.array([1.0, 0.0, 1.0]))
+dad_of = Predicate("dad_of", np.array([0.9, 0.1, 1.0]))
+parent_of = Predicate("parent_of")
+
+base_rules = [
+    Rule(father_of(homer, bart)),
+    Rule(parent_of(homer, bart)),
+]
+
+
+def flatten(groups: list[CandidateGroup]) -> list[Rule]:
+    return [rule for _similarity, group in groups for rule in group]
+
+
+def test_overlay_candidates_include_base_and_extra_rules() -> None:
+    base = RuleIndex(
+        base_rules, cosine_similarity, EmbeddingMatrix.from_rules(base_rules)
+    )
+    extra_rules = [Rule(dad_of(homer, lisa)), Rule(parent_of(homer, lisa))]
+    overlay = OverlayRuleIndex(base, [*extra_rules, base_rules[0]])
+    assert len(overlay) == 4
+    assert flatten(overlay.candidates(father_of(X, Y), 0.5)) == [
+        base_rules[0],
+        extra_rules[0],
+    ]
+    assert flatten(overlay.candidates(parent_of(X, Y), 0.5)) == [
+        base_rules[1],
+        extra_rules[1],
+    ]
+    assert [
+        flatten(groups)
+        for groups in overlay.candidates_many([father_of(X, Y), parent_of(X, Y)], 0.5)
+    ] == [[base_rules[0], extra_rules[0]], [base_rules[1], extra_rules[1]]]
+    # the base index is never modified
+    assert base.rules == base_rules
+    assert flatten(base.candidates(parent_of(X, Y), 0.5)) == [base_rules[1]]
@@ -0,0 +1,124 @@
+import multiprocessing
+import numpy as np
+from fuzzy_reasoner.prover.ParallelProver import ParallelProver, split_range
+from fuzzy_reasoner.prover.SLDProver import SLDProver
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+X = Variable("X")
+Y = Variable("Y")
+Z = Variable("Z")
+grandpa_of = Predicate("grandpa_of")
+father_of = Predicate("father_of", np.array([0.99, 0.05, 1.07]))
+dad_of = Predicate("dad_of", np.array([1.0, 0.0, 1.0]))
+papa_of = Predicate("papa_of", np.array([1.0, 0.5, 0.8]))
+bart = Constant("bart")
+homer = Constant("homer")
+abe = Constant("abe")
+
+knowledge = [
+    Rule(father_of(homer, bart)),
+    Rule(dad_of(homer, bart)),
+    Rule(papa_of(homer, bart)),
+    Rule(father_of(abe, homer)),
+    Rule(dad_of(abe, homer)),
+    Rule(grandpa_of(X, Y), (father_of(X, Z), father_of(Z, Y))),
+    Rule(grandpa_of(X, Y), (dad_of(X, Z), papa_of(Z, Y))),
+]
+
+
+def test_split_range_covers_the_range_in_order() -> None:
+    assert split_range(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert split_range(2, 4) == [(0, 1), (1, 2)]
+    assert split_range(0, 4) == []
+
+
+def test_parallel_prove_all_matches_prove_all() -> None:
+    for tabling in [False, True]:
+        prover = SLDProver(knowledge=knowledge, tabling=tabling)
+        with ParallelProver(prover, max_workers=2, chunks_per_worker=2) as parallel:
+            for goal in [grandpa_of(X, bart), father_of(X, Y), grandpa_of(bart, X)]:
+                expected_proofs = prover.prove_all(goal)
+                proofs = parallel.prove_all(goal)
+                assert [proof.pretty_print() for proof in proofs] == [
+                    proof.pretty_print() for proof in expected_proofs
+                ]
+                for proof, expected_proof in zip(proofs, expected_proofs):
+                    # rules and symbols are the original objects, not copies
+                    assert proof.goal is goal
+                    assert proof.head.rule is expected_proof.head.rule
+                    assert proof.variable_bindings == expected_proof.variable_bindings
+
+
+def test_parallel_prove_all_orders_tied_proofs_like_iterative_deepening() -> None:
+    # every proof has a similarity of 1, and the deeper branch comes first
+    tied_knowledge = [
+        Rule(grandpa_of(X, Y), (father_of(X, Z), father_of(Z, Y))),
+        Rule(father_of(abe, homer)),
+        Rule(father_of(homer, bart)),
+        Rule(grandpa_of(abe, bart)),
+    ]
+    prover = SLDProver(knowledge=tied_knowledge, iterative_deepening=True)
+    goal = grandpa_of(X, bart)
+    expected_proofs = prover.prove_all(goal)
+    with ParallelProver(prover, max_workers=2, chunks_per_worker=2) as parallel:
+        proofs = parallel.prove_all(goal)
+    assert [proof.similarity_score for proof in proofs] == [1.0, 1.0]
+    assert [proof.head.rule for proof in proofs] == [
+        proof.head.rule for proof in expected_proofs
+    ]
+    assert proofs[0].head.rule is tied_knowledge[3]
+
+
+def test_parallel_prove_all_matches_prove_all_on_a_sliced_fuzzy_fact_table() -> None:
+    likes = Predicate("likes")
+    people = [Constant(f"person_{i}") for i in range(21)]
+    # the same similarity to the goal constant, so the proofs all tie
+    foods = [
+        Constant("soup", np.array([1.0, 0.1, 0.1])),
+        Constant("stew", np.array([1.0, 0.1, 0.1])),
+    ]
+    fuzzy_knowledge = [
+        Rule(likes(person, foods[i % 2])) for i, person in enumerate(people)
+    ]
+    goal = likes(X, Constant("broth", np.array([0.9, 0.4, 0.8])))
+    prover = SLDProver(knowledge=fuzzy_knowledge)
+    expected_proofs = prover.prove_all(goal)
+    # 4 chunks of 5 or 6 facts each, fewer than a whole table which is compared in bulk
+    with ParallelProver(prover, max_workers=2, chunks_per_worker=2) as parallel:
+        proofs = parallel.prove_all(goal)
+    assert len(proofs) == len(people)
+    assert [proof.similarity_score for proof in proofs] == [
+        proof.similarity_score for proof in expected_proofs
+    ]
+    assert [proof.head.rule for proof in proofs] == [
+        proof.head.rule for proof in expected_proofs
+    ]
+
+
+def test_parallel_prove_many_returns_results_in_input_order() -> None:
+    prover = SLDProver(knowledge=knowledge)
+    lisa = Constant("lisa")
+    goals = [
+        grandpa_of(X, bart),
+        dad_of(X, bart),
+        grandpa_of(X, lisa),
+        father_of(abe, X),
+    ]
+    extra_knowledge = [father_of(homer, lisa)]
+    context = multiprocessing.get_context("spawn")
+    with ParallelProver(prover, max_workers=2, mp_context=context) as parallel:
+        proofs = parallel.prove_many(goals, extra_knowledge)
+    expected_proofs = prover.prove_many(goals, extra_knowledge)
+    assert len(proofs) == len(goals)
+    for goal, proof, expected_proof in zip(goals, proofs, expected_proofs):
+        assert expected_proof is not None
+        assert proof is not None
+        assert proof.goal is goal
+        assert proof.similarity_score == expected_proof.similarity_score
+        assert proof.variable_bindings == expected_proof.variable_bindings
+    assert proofs[2] is not None
+    assert proofs[2].variable_bindings[X] is abe
@@ -0,0 +1,206 @@
+from concurrent.futures import ThreadPoolExecutor
+from immutables import Map
+import numpy as np
+import pytest  # type: ignore
+from fuzzy_reasoner.prover.EmbeddingMatrix import EmbeddingMatrix
+from fuzzy_reasoner.prover.FactTable import FactTable
+from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.RuleIndex import CandidateGroup, RuleIndex
+from fuzzy_reasoner.prover.operations.unify import unify
+from fuzzy_reasoner.similarity import cosine_similarity, symbol_compare
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+X = Variable("X")
+Y = Variable("Y")
+bart = Constant("bart")
+homer = Constant("homer")
+father_of = Predicate("father_of", np.array([1.0, 0.0, 1.0]))
+dad_of = Predicate("dad_of", np.array([0.9, 0.1, 1.0]))
+cat_of = Predicate("cat_of", np.array([0.0, 1.0, 0.0]))
+parent_of = Predicate("parent_of")
+parent_of2 = Predicate("parent_of")
+is_male = Predicate("is_male")
+
+rules = [
+    Rule(father_of(homer, bart)),
+    Rule(dad_of(homer, bart)),
+    Rule(cat_of(homer, bart)),
+    Rule(parent_of(homer, bart)),
+    Rule(parent_of2(X, Y), (father_of(X, Y),)),
+    Rule(is_male(homer)),
+]
+
+goals: list[Atom] = [
+    father_of(X, bart),
+    cat_of(homer, X),
+    parent_of(X, Y),
+    is_male(X),
+    Predicate("parent_of", np.array([1.0, 0.0, 1.0]))(X, Y),
+    Predicate("missing")(X),
+]
+
+
+def flatten(groups: list[CandidateGroup]) -> list[Rule]:
+    return [rule for _similarity, group in groups for rule in group]
+
+
+def full_scan(goal: Atom, similarity_func: object) -> set[Rule]:
+    return {
+        rule
+        for rule in rules
+        if unify(rule, Goal(goal, 1), 2, Map(), similarity_func, 0.5)  # type: ignore
+    }
+
+
+def test_candidates_never_miss_a_rule_found_by_a_full_scan() -> None:
+    embeddings = EmbeddingMatrix.from_rules(rules)
+    for similarity_func in [cosine_similarity, symbol_compare, None]:
+        index = RuleIndex(rules, similarity_func, embeddings)
+        for goal in goals:
+            candidates = set(flatten(index.candidates(goal)))
+            assert full_scan(goal, similarity_func) <= candidates
+
+
+def test_candidates_only_include_matching_symbols_without_fuzzy_matching() -> None:
+    index = RuleIndex(rules, symbol_compare)
+    # ground facts come after the other rules, from their fact tables
+    assert flatten(index.candidates(parent_of(X, Y))) == [rules[4], rules[3]]
+    assert flatten(index.candidates(is_male(X, Y))) == []
+
+
+def test_candidates_include_embedded_predicates_for_embedded_goals() -> None:
+    index = RuleIndex(rules, cosine_similarity)
+    assert set(flatten(index.candidates(father_of(X, Y)))) == set(rules[0:3])
+    assert flatten(index.candidates(is_male(X))) == [rules[5]]
+
+
+def test_candidates_fall_back_to_arity_for_custom_similarity_funcs() -> None:
+    index = RuleIndex(rules, lambda item1, item2: 1.0)
+    assert flatten(index.candidates(is_male(X, Y))) == rules[0:5]
+
+
+def test_index_dedupes_identical_rules() -> None:
+    index = RuleIndex([rules[0], rules[0], rules[1]])
+    assert len(index) == 2
+
+
+def test_candidates_are_scored_in_bulk_with_an_embedding_matrix() -> None:
+    index = RuleIndex(rules, cosine_similarity, EmbeddingMatrix.from_rules(rules))
+    groups = index.candidates(father_of(X, Y), min_similarity_threshold=0.5)
+    assert flatten(groups) == rules[0:2]
+    for similarity, group in groups:
+        for rule in group:
+            assert similarity == pytest.approx(
+                cosine_similarity(rule.head.predicate, father_of)
+            )
+
+
+def test_candidates_many_matches_candidates_for_each_goal() -> None:
+    for similarity_func in [None, symbol_compare, cosine_similarity]:
+        index = RuleIndex(rules, similarity_func, EmbeddingMatrix.from_rules(rules))
+        batch_groups = index.candidates_many([*goals, *goals], 0.5)
+        assert len(batch_groups) == 2 * len(goals)
+        for goal, groups in zip([*goals, *goals], batch_groups):
+            expected_groups = index.candidates(goal, 0.5)
+            assert flatten(groups) == flatten(expected_groups)
+            assert [sim for sim, _group in groups] == pytest.approx(
+                [sim for sim, _group in expected_groups]
+            )
+
+
+def test_fuzzy_predicates_are_built_once_under_concurrent_lookups() -> None:
+    index = RuleIndex(rules, cosine_similarity, EmbeddingMatrix.from_rules(rules))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda _: index._get_fuzzy_predicates(2), range(50))
+        )
+    assert all(result is results[0] for result in results)
+
+
+def test_added_and_removed_rules_match_a_rebuilt_index() -> None:
+    for similarity_func in [None, cosine_similarity, symbol_compare]:
+        embeddings = EmbeddingMatrix.from_rules(rules)
+        index = RuleIndex(rules[:2], similarity_func, embeddings)
+        index.candidates(father_of(X, Y))
+        index.add_rules(rules[2:])
+        removed = index.remove_rules([rules[1], rules[4], Rule(is_male(bart))])
+        assert removed == [rules[1], rules[4]]
+        remaining_rules = [rules[0], rules[2], rules[3], rules[5]]
+        assert index.rules == remaining_rules
+        rebuilt_index = RuleIndex(remaining_rules, similarity_func, embeddings)
+        for goal in goals:
+            assert flatten(index.candidates(goal, 0.5)) == flatten(
+                rebuilt_index.candidates(goal, 0.5)
+            )
+
+
+def test_removing_rules_does_not_change_candidates_already_looked_up() -> None:
+    index = RuleIndex(rules, cosine_similarity, EmbeddingMatrix.from_rules(rules))
+    groups = index.candidates(father_of(X, Y), 0.5)
+    index.remove_rules(rules[0:2])
+    assert flatten(groups) == rules[0:2]
+    assert flatten(index.candidates(father_of(X, Y), 0.5)) == []
+
+
+def test_rules_with_head_finds_rules_by_their_head_atom() -> None:
+    index = RuleIndex(rules)
+    assert index.rules_with_head(rules[3].head) == [rules[3]]
+    assert index.rules_with_head(parent_of(homer, bart)) == []
+
+
+def test_ground_facts_are_kept_in_fact_tables() -> None:
+    index = RuleIndex(rules, cosine_similarity)
+    groups = index.candidates(parent_of(X, Y))
+    assert groups[0] == (1.0, [rules[4]])
+    assert isinstance(groups[1][1], FactTable)
+    assert list(groups[1][1]) == [rules[3]]
+    assert index.rules_with_head(rules[3].head) == [rules[3]]
+
+
+def test_fact_store_does_not_change_which_rules_are_candidates() -> None:
+    embeddings = EmbeddingMatrix.from_rules(rules)
+    for similarity_func in [cosine_similarity, symbol_compare, None]:
+        for matrix in [embeddings, None]:
+            index = RuleIndex(rules, similarity_func, matrix)
+            plain_index = RuleIndex(rules, similarity_func, matrix, fact_store=False)
+            for goal in goals:
+                assert sorted(map(id, flatten(index.candidates(goal)))) == sorted(
+                    map(id, flatten(plain_index.candidates(goal)))
+                )
+            assert not any(
+                isinstance(group, FactTable)
+                for goal in goals
+                for _sim, group in plain_index.candidates(goal)
+            )
+
+
+def test_removing_facts_replaces_their_fact_table() -> None:
+    index = RuleIndex(rules, symbol_compare)
+    [(_sim, table)] = index.candidates(father_of(X, Y))[1:]
+    assert index.remove_rules([rules[0]]) == [rules[0]]
+    assert list(table) == [rules[0]]
+    assert flatten(index.candidates(father_of(X, Y))) == []
+    index.add_rules([rules[0]])
+    assert flatten(index.candidates(father_of(X, Y))) == [rules[0]]
+
+
+def test_fact_columns_are_indexed_like_added_facts() -> None:
+    for fact_store in [True, False]:
+        index = RuleIndex([rules[4]], symbol_compare, fact_store=fact_store)
+        for constant in [homer, bart]:
+            index.symbols.constants.add(constant)
+        index.add_fact_columns(parent_of, np.array([[0, 1], [1, 0]]))
+        assert len(index) == 3
+        candidates = flatten(index.candidates(parent_of(homer, X)))
+        assert [str(rule) for rule in candidates] == [
+            str(rules[4]),
+            str(rules[3]),
+            str(Rule(parent_of(bart, homer))),
+        ]
+        assert candidates[1] in index
+        assert index.rules_with_head(candidates[1].head) == [candidates[1]]
@@ -1,5 +1,14 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import FrozenInstanceError
+import tracemalloc
 import numpy as np
+import pytest  # type: ignore
+from fuzzy_reasoner.similarity import cosine_similarity
+from fuzzy_reasoner.prover.Proof import Proof
 from fuzzy_reasoner.prover.SLDProver import SLDProver
+from fuzzy_reasoner.prover.SearchHooks import PruneReason
+from fuzzy_reasoner.prover.SearchStats import SearchStats
 from fuzzy_reasoner.types.Constant import Constant
 from fuzzy_reasoner.types.Rule import Rule
 from fuzzy_reasoner.types.Variable import Variable
@@ -256,3 +265,680 @@ def test_prove_all_with_multiple_valid_proof_paths() -> None:
     assert len(results) == 4
     var_bindings_for_x = [result.variable_bindings[X] for result in results]
     assert [abe, abe, abe, abe] == var_bindings_for_x
+
+
+def test_similarity_cache_is_reused_across_queries() -> None:
+    X = Variable("X")
+    father_of = Predicate("father_of", np.array([0.99, 0.05, 1.07]))
+    dad_of = Predicate("dad_of", np.array([1.0, 0.0, 1.0]))
+    bart = Constant("bart", np.array([0.0, 1.0, 0.0]))
+    homer = Constant("homer", np.array([1.0, 0.0, 0.0]))
+
+    knowledge = [Rule(father_of(homer, bart)), Rule(dad_of(homer, bart))]
+
+    prover = SLDProver(knowledge=knowledge, similarity_cache_size=100)
+    assert prover.similarity_cache is not None
+
+    assert len(prover.prove_all(dad_of(X, bart))) == 2
+    first_info = prover.similarity_cache.cache_info()
+    assert first_info.misses > 0
+
+    assert len(prover.prove_all(dad_of(X, bart))) == 2
+    second_info = prover.similarity_cache.cache_info()
+    assert second_info.misses == first_info.misses
+    assert second_info.hits > first_info.hits
+
+
+def test_similarity_cache_is_disabled_by_default() -> None:
+    assert SLDProver(knowledge=[]).similarity_cache is None
+
+
+def test_iter_proofs_yields_the_same_proofs_as_prove_all() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    ancestor_of = Predicate("ancestor_of")
+    parent_of = Predicate("parent_of")
+    people = [Constant(name) for name in "abcde"]
+    knowledge = [
+        *[Rule(parent_of(p1, p2)) for p1, p2 in zip(people, people[1:])],
+        Rule(ancestor_of(X, Y), (parent_of(X, Y),)),
+        Rule(ancestor_of(X, Y), (parent_of(X, Z), ancestor_of(Z, Y))),
+    ]
+    prover = SLDProver(knowledge=knowledge)
+    goal = ancestor_of(people[0], X)
+
+    lazy_bindings = {proof.variable_bindings[X] for proof in prover.iter_proofs(goal)}
+    all_bindings = {proof.variable_bindings[X] for proof in prover.prove_all(goal)}
+    assert lazy_bindings == all_bindings == set(people[1:])
+
+
+def test_iter_proofs_does_no_more_search_work_after_stopping() -> None:
+    X = Variable("X")
+    is_dog = Predicate("is_dog")
+    dogs = [Constant(f"dog_{i}") for i in range(100)]
+    num_similarity_calls = 0
+
+    def counting_similarity(item1: Constant, item2: Constant) -> float:
+        nonlocal num_similarity_calls
+        num_similarity_calls += 1
+        return 1.0 if item1.symbol == item2.symbol else 0.0
+
+    prover = SLDProver(
+        knowledge=[Rule(is_dog(dog)) for dog in dogs],
+        similarity_func=counting_similarity,  # type: ignore
+    )
+    proofs = prover.iter_proofs(is_dog(X))
+    first_proof = next(proofs)
+    assert first_proof.variable_bindings[X] in dogs
+    assert num_similarity_calls == 1
+
+
+def test_prove_top_k_returns_the_best_proofs_in_order() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    grandpa_of = Predicate("grandpa_of")
+    father_of = Predicate("father_of", np.array([0.99, 0.05, 1.07]))
+    dad_of = Predicate("dad_of", np.array([1.0, 0.0, 1.0]))
+    papa_of = Predicate("papa_of", np.array([1.0, 0.5, 0.8]))
+    bart = Constant("bart")
+    homer = Constant("homer")
+    abe = Constant("abe")
+
+    knowledge = [
+        Rule(father_of(homer, bart)),
+        Rule(dad_of(homer, bart)),
+        Rule(papa_of(homer, bart)),
+        Rule(father_of(abe, homer)),
+        Rule(dad_of(abe, homer)),
+        Rule(grandpa_of(X, Y), (father_of(X, Z), father_of(Z, Y))),
+    ]
+    prover = SLDProver(knowledge=knowledge)
+    goal = grandpa_of(X, bart)
+
+    all_proofs = prover.prove_all(goal)
+    assert len(all_proofs) == 6
+    for k in range(1, 8):
+        top_proofs = prover.prove_top_k(goal, k)
+        assert len(top_proofs) == min(k, 6)
+        assert [proof.similarity_score for proof in top_proofs] == [
+            proof.similarity_score for proof in all_proofs[:k]
+        ]
+    best_proof = prover.prove(goal)
+    assert best_proof is not None
+    assert best_proof.similarity_score == 1.0
+    assert best_proof.variable_bindings[X] == abe
+
+
+def test_prove_top_k_prunes_branches_that_cannot_beat_the_best_proofs() -> None:
+    X = Variable("X")
+    is_pet = Predicate("is_pet", np.array([0.0, 0.0, 1.0]))
+    is_dog = Predicate("is_dog", np.array([1.0, 0.0, 0.0]))
+    is_cat = Predicate("is_cat", np.array([0.0, 1.0, 0.0]))
+    is_feline = Predicate("is_feline", np.array([0.0, 1.0, 1.0]))
+    is_animal = Predicate("is_animal", np.array([0.0, 0.6, 0.8]))
+    dogs = [Constant(f"dog_{i}") for i in range(10)]
+    cats = [Constant(f"cat_{i}") for i in range(10)]
+    num_similarity_calls = 0
+
+    def counting_similarity(item1: Constant, item2: Constant) -> float:
+        nonlocal num_similarity_calls
+        num_similarity_calls += 1
+        return cosine_similarity(item1, item2)
+
+    knowledge = [
+        Rule(is_pet(X), (is_dog(X),)),
+        Rule(is_animal(X), (is_cat(X),)),
+        *[Rule(is_dog(dog)) for dog in dogs],
+        *[Rule(is_feline(cat)) for cat in cats],
+    ]
+    prover = SLDProver(
+        knowledge=knowledge,
+        similarity_func=counting_similarity,  # type: ignore
+        min_similarity_threshold=0.65,
+    )
+
+    proofs = prover.prove_top_k(is_pet(X), 3)
+    assert len(proofs) == 3
+    for proof in proofs:
+        assert proof.similarity_score == 1.0
+        assert proof.variable_bindings[X] in dogs
+    top_k_similarity_calls = num_similarity_calls
+
+    num_similarity_calls = 0
+    assert len(prover.prove_all(is_pet(X))) == 30
+    # the cat branch is worse than every dog proof, so it's never expanded
+    assert top_k_similarity_calls < num_similarity_calls
+
+
+def test_prove_many_matches_prove_for_each_goal_in_order() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    grandpa_of = Predicate("grandpa_of")
+    father_of = Predicate("father_of", np.array([0.99, 0.05, 1.07]))
+    dad_of = Predicate("dad_of", np.array([1.0, 0.0, 1.0]))
+    papa_of = Predicate("papa_of", np.array([1.0, 0.5, 0.8]))
+    bart = Constant("bart")
+    homer = Constant("homer")
+    abe = Constant("abe")
+
+    knowledge = [
+        Rule(father_of(homer, bart)),
+        Rule(papa_of(abe, homer)),
+        Rule(grandpa_of(X, Y), (father_of(X, Z), father_of(Z, Y))),
+    ]
+    goals = [
+        grandpa_of(X, bart),
+        dad_of(X, bart),
+        grandpa_of(bart, X),
+        father_of(abe, X),
+        dad_of(homer, X),
+    ]
+    for tabling in [False, True]:
+        prover = SLDProver(knowledge=knowledge, tabling=tabling)
+        batch_proofs = prover.prove_many(goals)
+        assert len(batch_proofs) == len(goals)
+        for goal, batch_proof in zip(goals, batch_proofs):
+            proof = prover.prove(goal)
+            if proof is None:
+                assert batch_proof is None
+                continue
+            assert batch_proof is not None
+            assert batch_proof.goal == goal
+            assert batch_proof.similarity_score == pytest.approx(proof.similarity_score)
+            assert batch_proof.variable_bindings == proof.variable_bindings
+
+
+def test_binding_store_finds_the_same_proofs_as_substitution_maps() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    grandpa_of = Predicate("grandpa_of")
+    father_of = Predicate("father_of", np.array([0.99, 0.05, 1.07]))
+    dad_of = Predicate("dad_of", np.array([1.0, 0.0, 1.0]))
+    papa_of = Predicate("papa_of", np.array([1.0, 0.5, 0.8]))
+    bart = Constant("bart")
+    homer = Constant("homer")
+    abe = Constant("abe")
+
+    knowledge = [
+        Rule(father_of(homer, bart)),
+        Rule(dad_of(homer, bart)),
+        Rule(papa_of(homer, bart)),
+        Rule(father_of(abe, homer)),
+        Rule(dad_of(abe, homer)),
+        Rule(grandpa_of(X, Y), (father_of(X, Z), father_of(Z, Y))),
+    ]
+    prover = SLDProver(knowledge=knowledge)
+    store_prover = SLDProver(knowledge=knowledge, binding_store=True)
+    for goal in [grandpa_of(X, bart), grandpa_of(X, Y), father_of(X, Y)]:
+        proofs = prover.prove_all(goal)
+        store_proofs = store_prover.prove_all(goal)
+        assert len(store_proofs) == len(proofs)
+        for store_proof, proof in zip(store_proofs, proofs):
+            assert store_proof.pretty_print() == proof.pretty_print()
+            assert store_proof.variable_bindings == proof.variable_bindings
+
+
+def test_concurrent_proofs_on_a_shared_prover_match_sequential_proofs() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    grandpa_of = Predicate("grandpa_of")
+    father_of = Predicate("father_of", np.array([0.99, 0.05, 1.07]))
+    dad_of = Predicate("dad_of", np.array([1.0, 0.0, 1.0]))
+    papa_of = Predicate("papa_of", np.array([1.0, 0.5, 0.8]))
+    people = [Constant(f"person_{i}") for i in range(20)]
+
+    knowledge = [
+        *[Rule(father_of(child, parent)) for child, parent in zip(people, people[1:])],
+        *[Rule(papa_of(child, parent)) for child, parent in zip(people, people[2:])],
+        Rule(grandpa_of(X, Y), (father_of(X, Z), father_of(Z, Y))),
+    ]
+    goals = [
+        grandpa_of(X, Y),
+        grandpa_of(people[3], X),
+        dad_of(X, people[5]),
+        father_of(X, Y),
+    ]
+    for tabling in [False, True]:
+        prover = SLDProver(
+            knowledge=knowledge, tabling=tabling, similarity_cache_size=100
+        )
+
+        def prove_goal(index: int) -> list[str]:
+            goal = goals[index % len(goals)]
+            if index % 2:
+                proof = prover.prove(goal)
+                return [proof.pretty_print()] if proof else []
+            return [proof.pretty_print() for proof in prover.prove_all(goal)]
+
+        expected = [prove_goal(index) for index in range(2 * len(goals))]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(prove_goal, range(200)))
+        for index, result in enumerate(results):
+            # scopes are allocated per proof run, so proofs print identically every time
+            assert result == expected[index % len(expected)]
+
+
+def test_knowledge_can_be_added_and_retracted() -> None:
+    X = Variable("X")
+    is_dog = Predicate("is_dog")
+    is_pet = Predicate("is_pet")
+    fluffy = Constant("fluffy")
+    rex = Constant("rex")
+
+    pet_rule = Rule(is_pet(X), (is_dog(X),))
+    prover = SLDProver(knowledge=[is_dog(fluffy)])
+    assert prover.prove(is_pet(X)) is None
+
+    rex_is_dog = is_dog(rex)
+    prover.add_knowledge([pet_rule, rex_is_dog])
+    assert len(prover.rules) == 3
+    assert {proof.variable_bindings[X] for proof in prover.prove_all(is_pet(X))} == {
+        fluffy,
+        rex,
+    }
+
+    assert prover.retract([rex_is_dog, is_dog(rex)]) == 1
+    assert [proof.variable_bindings[X] for proof in prover.prove_all(is_pet(X))] == [
+        fluffy
+    ]
+    assert prover.retract([pet_rule]) == 1
+    assert prover.prove(is_pet(X)) is None
+
+
+def test_extra_knowledge_only_applies_to_its_own_query() -> None:
+    X = Variable("X")
+    is_dog = Predicate("is_dog")
+    fluffy = Constant("fluffy")
+    rex = Constant("rex")
+
+    prover = SLDProver(knowledge=[is_dog(fluffy)])
+    extra_knowledge = [is_dog(rex)]
+    proofs = prover.prove_all(is_dog(X), extra_knowledge)
+    assert [proof.variable_bindings[X] for proof in proofs] == [fluffy, rex]
+    assert len(prover.prove_all(is_dog(X))) == 1
+    assert len(prover.rules) == 1
+
+
+def test_fact_store_finds_the_same_proofs_as_unifying_each_fact() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    grandpa_of = Predicate("grandpa_of")
+    father_of = Predicate("father_of", np.array([0.99, 0.05, 1.07]))
+    dad_of = Predicate("dad_of", np.array([1.0, 0.0, 1.0]))
+    likes = Predicate("likes")
+    bart = Constant("bart", np.array([1.0, 0.1]))
+    bartholomew = Constant("bartholomew", np.array([0.9, 0.2]))
+    homer = Constant("homer")
+    abe = Constant("abe")
+
+    knowledge = [
+        Rule(father_of(homer, bart)),
+        Rule(dad_of(homer, bartholomew)),
+        Rule(father_of(abe, homer)),
+        Rule(dad_of(abe, homer)),
+        Rule(likes(homer, homer)),
+        Rule(likes(bart, homer)),
+        Rule(grandpa_of(X, Y), (father_of(X, Z), father_of(Z, Y))),
+    ]
+    goals = [
+        grandpa_of(X, bart),
+        grandpa_of(X, Y),
+        father_of(X, bartholomew),
+        likes(X, X),
+        likes(X, homer),
+    ]
+
+    def proof_bindings(proof: Proof) -> list[str]:
+        return sorted(
+            f"{variable} = {value}"
+            for variable, value in proof.variable_bindings.items()
+        )
+
+    for settings in [{}, {"tabling": True}, {"binding_store": True}]:
+        prover = SLDProver(knowledge=knowledge, **settings)  # type: ignore
+        plain_prover = SLDProver(
+            knowledge=knowledge, fact_store=False, **settings  # type: ignore
+        )
+        for goal in goals:
+            proofs = prover.prove_all(goal)
+            plain_proofs = plain_prover.prove_all(goal)
+            # bulk similarities are only equal up to floating point rounding
+            assert sorted(map(proof_bindings, proofs)) == sorted(
+                map(proof_bindings, plain_proofs)
+            )
+            assert sorted(proof.similarity_score for proof in proofs) == pytest.approx(
+                sorted(proof.similarity_score for proof in plain_proofs)
+            )
+            best = prover.prove(goal)
+            plain_best = plain_prover.prove(goal)
+            assert (best and best.similarity_score) == pytest.approx(
+                plain_best and plain_best.similarity_score
+            )
+
+
+def test_similarity_graph_finds_the_same_proofs_as_comparing_embeddings() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    grandpa_of = Predicate("grandpa_of")
+    father_of = Predicate("father_of", np.array([0.99, 0.05, 1.07]))
+    dad_of = Predicate("dad_of", np.array([1.0, 0.0, 1.0]))
+    # the graph needs every embedding to be the same size
+    bart = Constant("bart", np.array([1.0, 0.1, 0.0]))
+    bartholomew = Constant("bartholomew", np.array([0.9, 0.2, 0.0]))
+    lisa = Constant("lisa", np.array([0.1, 1.0, 0.0]))
+    homer = Constant("homer")
+    abe = Constant("abe")
+
+    knowledge = [
+        Rule(father_of(homer, bart)),
+        Rule(dad_of(homer, bartholomew)),
+        Rule(grandpa_of(X, Y), (father_of(X, Z), father_of(Z, Y))),
+    ]
+    extra_knowledge = [Rule(dad_of(abe, homer)), Rule(father_of(homer, lisa))]
+    goals = [grandpa_of(X, bart), grandpa_of(X, Y), father_of(X, bartholomew)]
+    for fact_store in [True, False]:
+        prover = SLDProver(knowledge, similarity_graph=True, fact_store=fact_store)
+        plain_prover = SLDProver(knowledge, fact_store=fact_store)
+        assert prover.similarity_graph is not None
+        no_knowledge: list[Rule] = []
+        for added_knowledge in [no_knowledge, extra_knowledge]:
+            prover.add_knowledge(added_knowledge)
+            plain_prover.add_knowledge(added_knowledge)
+            # the new embedded symbols are added to the graph
+            assert (prover.similarity_graph.embeddings.row(lisa) is not None) == bool(
+                added_knowledge
+            )
+            for goal in goals:
+                proofs = prover.prove_all(goal)
+                plain_proofs = plain_prover.prove_all(goal)
+                assert list(map(str, proofs)) == list(map(str, plain_proofs))
+                assert [proof.similarity_score for proof in proofs] == pytest.approx(
+                    [proof.similarity_score for proof in plain_proofs]
+                )
+
+
+def test_compact_embedding_storage_finds_the_same_proofs() -> None:
+    X = Variable("X")
+    father_of = Predicate("father_of", np.array([0.99, 0.05, 1.07]))
+    dad_of = Predicate("dad_of", np.array([1.0, 0.0, 1.0]))
+    bart = Constant("bart", np.array([1.0, 0.1, 0.0]))
+    bartholomew = Constant("bartholomew", np.array([0.9, 0.2, 0.0]))
+    homer = Constant("homer")
+    knowledge = [Rule(father_of(homer, bart)), Rule(dad_of(homer, bartholomew))]
+    goals = [father_of(X, bartholomew), dad_of(homer, X)]
+    prover = SLDProver(knowledge)
+    for storage in ["float32", "float16", "int8"]:
+        compact_prover = SLDProver(knowledge, embedding_storage=storage)
+        assert compact_prover.embeddings is not None
+        error_bound = compact_prover.embeddings.error_bound
+        for goal in goals:
+            proofs = prover.prove_all(goal)
+            compact_proofs = compact_prover.prove_all(goal)
+            # proofs with nearly the same similarity may swap places
+            assert sorted(str(proof.head.rule) for proof in compact_proofs) == sorted(
+                str(proof.head.rule) for proof in proofs
+            )
+            scores = [proof.similarity_score for proof in proofs]
+            compact_scores = [proof.similarity_score for proof in compact_proofs]
+            assert compact_scores == pytest.approx(scores, abs=error_bound)
+    with pytest.raises(ValueError):
+        SLDProver(knowledge, embedding_storage="int4")
+
+
+def test_compact_embedding_storage_shrinks_the_memory_the_prover_keeps() -> None:
+    X = Variable("X")
+    likes = Predicate("likes")
+    homer = Constant("homer")
+    rng = np.random.default_rng(0)
+    foods = [Constant(f"food_{i}", rng.normal(size=512)) for i in range(1000)]
+    knowledge = [Rule(likes(homer, food)) for food in foods]
+
+    def kept_memory(storage: str) -> int:
+        tracemalloc.start()
+        try:
+            prover = SLDProver(knowledge, embedding_storage=storage)
+            # compares the foods in bulk, which copies their rows for the fact table
+            assert len(prover.prove_all(likes(X, foods[0]))) > 0
+            return tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+    embeddings_size = 1000 * 512 * 8
+    float64_memory = kept_memory("float64")
+    int8_memory = kept_memory("int8")
+    # the prover's matrix and the fact table's rows
+    assert float64_memory > 2 * embeddings_size
+    assert int8_memory < float64_memory / 4
+
+
+def test_aprove_all_finds_the_same_proofs_as_prove_all() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    grandpa_of = Predicate("grandpa_of")
+    father_of = Predicate("father_of", np.array([0.99, 0.05, 1.07]))
+    dad_of = Predicate("dad_of", np.array([1.0, 0.0, 1.0]))
+    bart = Constant("bart", np.array([1.0, 0.1]))
+    bartholomew = Constant("bartholomew", np.array([0.9, 0.2]))
+    homer = Constant("homer")
+    abe = Constant("abe")
+
+    knowledge = [
+        Rule(father_of(homer, bart)),
+        Rule(dad_of(homer, bartholomew)),
+        Rule(father_of(abe, homer)),
+        Rule(dad_of(abe, homer)),
+        Rule(grandpa_of(X, Y), (father_of(X, Z), father_of(Z, Y))),
+    ]
+    prover = SLDProver(knowledge=knowledge)
+    for goal in [grandpa_of(X, bart), grandpa_of(X, Y), father_of(X, bartholomew)]:
+        proofs = prover.prove_all(goal)
+        async_proofs = asyncio.run(prover.aprove_all(goal, yield_every=1))
+        assert sorted(map(str, async_proofs)) == sorted(map(str, proofs))
+        assert [proof.similarity_score for proof in async_proofs] == [
+            proof.similarity_score for proof in proofs
+        ]
+        best = asyncio.run(prover.aprove(goal))
+        assert best is not None
+        assert best.similarity_score == proofs[0].similarity_score
+
+
+def test_aprove_lets_other_tasks_run_and_stops_when_cancelled() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    edge = Predicate("edge")
+    path = Predicate("path")
+    nodes = [Constant(f"node_{i}") for i in range(6)]
+    # a fully connected graph, so the search space is far too big to finish
+    knowledge = [
+        Rule(path(X, Y), (edge(X, Y),)),
+        Rule(path(X, Y), (edge(X, Z), path(Z, Y))),
+        *(Rule(edge(node1, node2)) for node1 in nodes for node2 in nodes),
+    ]
+    prover = SLDProver(knowledge=knowledge, max_proof_depth=30)
+
+    async def run() -> int:
+        search = asyncio.ensure_future(prover.aprove_all(path(X, Y), yield_every=10))
+        ticks = 0
+        for _ in range(20):
+            await asyncio.sleep(0)
+            ticks += 1
+        search.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await search
+        return ticks
+
+    assert asyncio.run(run()) == 20
+
+
+def test_proof_nodes_are_only_built_when_needed() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    father_of = Predicate("father_of")
+    parent_of = Predicate("parent_of")
+    is_male = Predicate("is_male")
+    bart = Constant("bart")
+    homer = Constant("homer")
+    knowledge = [
+        Rule(parent_of(homer, bart)),
+        Rule(is_male(homer)),
+        Rule(father_of(X, Y), (parent_of(X, Y), is_male(X))),
+    ]
+    for settings in [{}, {"tabling": True}, {"binding_store": True}]:
+        prover = SLDProver(knowledge=knowledge, **settings)  # type: ignore
+        for proof in [
+            prover.prove(father_of(homer, X)),
+            *prover.prove_all(father_of(X, Y)),
+        ]:
+            assert proof is not None
+            assert proof.step is not None
+            assert proof.variable_bindings[X] == (
+                bart if proof.goal.terms[0] is homer else homer
+            )
+            assert proof.similarity_score == 1.0
+            head = proof.head
+            assert proof.head is head
+            assert head.overall_similarity == proof.similarity_score
+            assert head.children is not None
+            assert [child.rule for child in head.children] == knowledge[:2]
+            with pytest.raises(FrozenInstanceError):
+                proof.step = None  # type: ignore
+
+
+def test_prove_all_distinct_keeps_the_best_proof_of_each_answer() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    edge = Predicate("edge")
+    path = Predicate("path")
+    nodes = [Constant(f"node_{i}") for i in range(5)]
+    # a fully connected graph, so every pair of nodes is joined by many paths
+    knowledge = [
+        Rule(path(X, Y), (edge(X, Y),)),
+        Rule(path(X, Y), (edge(X, Z), path(Z, Y))),
+        *(Rule(edge(node1, node2)) for node1 in nodes for node2 in nodes),
+    ]
+    for settings in [
+        {},
+        {"tabling": True},
+        {"binding_store": True},
+        {"iterative_deepening": True},
+    ]:
+        prover = SLDProver(
+            knowledge=knowledge, max_proof_depth=3, **settings  # type: ignore
+        )
+        for goal in [path(nodes[0], X), path(X, Y), path(nodes[0], nodes[1])]:
+            proofs = prover.prove_all(goal)
+            stats = SearchStats()
+            distinct_proofs = prover.prove_all(goal, hooks=stats, distinct=True)
+            answers = {proof.variable_bindings for proof in proofs}
+            assert len(distinct_proofs) == len(answers)
+            assert {proof.variable_bindings for proof in distinct_proofs} == answers
+            for answer in answers:
+                best = max(
+                    proof.similarity_score
+                    for proof in proofs
+                    if proof.variable_bindings == answer
+                )
+                assert [
+                    proof.similarity_score
+                    for proof in distinct_proofs
+                    if proof.variable_bindings == answer
+                ] == [best]
+            if not settings:
+                assert stats.goals_expanded > 0
+                assert stats.pruned[PruneReason.DOMINATED_ANSWER] > 0
+            top_proofs = prover.prove_top_k(goal, 2, distinct=True)
+            assert len({proof.variable_bindings for proof in top_proofs}) == len(
+                top_proofs
+            )
+
+
+def test_non_positive_threshold_unifies_mismatched_predicates() -> None:
+    X = Variable("X")
+    p = Predicate("p")
+    q = Predicate("q")
+    fuzzy_p = Predicate("fuzzy_p", np.array([1.0, 0.0]))
+    fuzzy_q = Predicate("fuzzy_q", np.array([0.0, 1.0]))
+    d = Constant("d")
+    e = Constant("e")
+    f = Constant("f")
+    knowledge = [
+        Rule(q(d)),
+        Rule(p(e)),
+        Rule(fuzzy_q(f)),
+        Rule(fuzzy_p(e)),
+        Rule(p(X), (fuzzy_q(X),)),
+    ]
+
+    def full_scan_similarity(
+        item1: Constant | Predicate, item2: Constant | Predicate
+    ) -> float:
+        return cosine_similarity(item1, item2)
+
+    def answer(proof: Proof) -> tuple[str, float]:
+        return (str(proof.variable_bindings[X]), proof.similarity_score)
+
+    for threshold in [0.0, -0.5]:
+        for settings in [{}, {"tabling": True}, {"binding_store": True}]:
+            prover = SLDProver(
+                knowledge=knowledge,
+                min_similarity_threshold=threshold,
+                **settings,  # type: ignore
+            )
+            scan_prover = SLDProver(
+                knowledge=knowledge,
+                min_similarity_threshold=threshold,
+                similarity_func=full_scan_similarity,
+                **settings,  # type: ignore
+            )
+            for goal in [p(X), fuzzy_p(X)]:
+                proofs = prover.prove_all(goal)
+                scan_proofs = scan_prover.prove_all(goal)
+                # tabling keeps whichever proof of an answer it finds first
+                assert sorted(map(answer, proofs)) == sorted(map(answer, scan_proofs))
+                if not settings:
+                    assert sorted(map(str, proofs)) == sorted(map(str, scan_proofs))
+                # only the fact q(d) binds X to d
+                assert d in [proof.variable_bindings[X] for proof in proofs]
+
+
+def test_repeated_variables_in_goals_and_rule_heads_are_proven() -> None:
+    X = Variable("X")
+    q = Predicate("q")
+    r = Predicate("r")
+    b = Constant("b")
+    c = Constant("c")
+    # unifying q(X, X) with q(X, X) used to bind the goal's X to itself, which looped forever
+    knowledge = [Rule(q(b, b)), Rule(q(X, X), (r(X),)), Rule(r(c))]
+    for settings in [{}, {"fact_store": False}, {"binding_store": True}]:
+        prover = SLDProver(knowledge=knowledge, **settings)  # type: ignore
+        proofs = prover.prove_all(q(X, X))
+        assert len(proofs) == 2
+        assert {proof.variable_bindings[X] for proof in proofs} == {b, c}
+
+
+def test_prove_all_distinct_resolves_answers_with_repeated_variables() -> None:
+    X = Variable("X")
+    q = Predicate("q")
+    r = Predicate("r")
+    b = Constant("b")
+    c = Constant("c")
+    # the answers of partial proofs are resolved too, before q(X, X) has bound X at all
+    knowledge = [Rule(q(b, b)), Rule(q(X, X), (r(X),)), Rule(r(c)), Rule(r(b))]
+    for settings in [{}, {"binding_store": True}, {"iterative_deepening": True}]:
+        prover = SLDProver(knowledge=knowledge, **settings)  # type: ignore
+        assert len(prover.prove_all(q(X, X))) == 3
+        proofs = prover.prove_all(q(X, X), distinct=True)
+        assert len(proofs) == 2
+        assert {proof.variable_bindings[X] for proof in proofs} == {b, c}
+        top_proofs = prover.prove_top_k(q(X, X), 2, distinct=True)
+        assert {proof.variable_bindings[X] for proof in top_proofs} == {b, c}
@@ -0,0 +1,111 @@
+from __future__ import annotations
+from time import monotonic
+from typing import Any
+import pytest  # type: ignore
+from fuzzy_reasoner.prover.SLDProver import SLDProver
+from fuzzy_reasoner.prover.SearchBudget import (
+    BudgetExhausted,
+    BudgetLimit,
+    CancellationToken,
+    SearchBudget,
+)
+from fuzzy_reasoner.prover.SearchStats import SearchStats
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+X = Variable("X")
+Y = Variable("Y")
+Z = Variable("Z")
+edge = Predicate("edge")
+path = Predicate("path")
+nodes = [Constant(f"node_{i}") for i in range(6)]
+
+# a fully connected graph, so the number of paths grows exponentially with the proof depth
+knowledge = [
+    Rule(path(X, Y), (edge(X, Y),)),
+    Rule(path(X, Y), (edge(X, Z), path(Z, Y))),
+    *(Rule(edge(node1, node2)) for node1 in nodes for node2 in nodes),
+]
+
+modes: list[dict[str, Any]] = [{}, {"tabling": True}, {"binding_store": True}]
+
+
+def test_budget_limits_goal_expansions() -> None:
+    budget = SearchBudget(max_expansions=3)
+    for _ in range(3):
+        budget.charge_expansion()
+    assert not budget.truncated
+    with pytest.raises(BudgetExhausted):
+        budget.charge_expansion()
+    assert budget.exhausted_limit == BudgetLimit.EXPANSIONS
+    # once a budget has run out, it stays run out
+    with pytest.raises(BudgetExhausted):
+        budget.charge_expansion()
+
+
+def test_prove_all_returns_the_proofs_found_before_the_budget_ran_out() -> None:
+    for settings in modes:
+        prover = SLDProver(knowledge=knowledge, max_proof_depth=6, **settings)
+        # tabling expands far fewer goals, since each variant is only evaluated once
+        max_expansions = 3 if settings.get("tabling") else 50
+        budget = SearchBudget(max_expansions=max_expansions)
+        stats = SearchStats()
+        proofs = prover.prove_all(path(nodes[0], nodes[5]), hooks=stats, budget=budget)
+        assert budget.truncated
+        assert budget.expansions == max_expansions
+        assert stats.goals_expanded == max_expansions
+        assert stats.searches == 1
+        if not settings.get("tabling"):
+            # tabling only returns answers once the goal's table is complete
+            assert len(proofs) > 0
+
+
+def test_searches_which_fit_in_the_budget_are_not_truncated() -> None:
+    for settings in modes:
+        prover = SLDProver(knowledge=knowledge, max_proof_depth=2, **settings)
+        budget = SearchBudget(max_expansions=10_000, timeout=60)
+        proofs = prover.prove_all(path(nodes[0], nodes[5]), budget=budget)
+        assert not budget.truncated
+        assert len(proofs) == len(prover.prove_all(path(nodes[0], nodes[5])))
+
+
+def test_prove_returns_the_best_proof_found_within_the_budget() -> None:
+    prover = SLDProver(knowledge=knowledge, max_proof_depth=20)
+    budget = SearchBudget(max_expansions=100)
+    proof = prover.prove(path(nodes[0], nodes[5]), budget=budget)
+    assert proof is not None
+    assert not budget.truncated
+    budget = SearchBudget(max_expansions=1)
+    assert prover.prove(path(nodes[0], nodes[5]), budget=budget) is None
+    assert budget.truncated
+
+
+def test_deadlines_and_cancellation_stop_the_search() -> None:
+    prover = SLDProver(knowledge=knowledge, max_proof_depth=20)
+    budget = SearchBudget(deadline=monotonic() - 1)
+    assert prover.prove_all(path(nodes[0], X), budget=budget) == []
+    assert budget.exhausted_limit == BudgetLimit.DEADLINE
+
+    token = CancellationToken()
+    budget = SearchBudget(cancellation=token)
+    proofs = prover.iter_proofs(path(nodes[0], X), budget=budget)
+    assert next(proofs) is not None
+    token.cancel()
+    # the proofs from the goal expansion in progress are still yielded
+    assert len(list(proofs)) == len(nodes) - 1
+    assert budget.exhausted_limit == BudgetLimit.CANCELLED
+
+
+def test_a_shared_budget_stops_the_rest_of_prove_many() -> None:
+    prover = SLDProver(knowledge=knowledge, max_proof_depth=20)
+    budget = SearchBudget(max_expansions=4)
+    proofs = prover.prove_many(
+        [edge(nodes[0], X), path(nodes[0], nodes[5]), path(nodes[1], nodes[5])],
+        budget=budget,
+    )
+    assert proofs[0] is not None
+    assert proofs[2] is None
+    assert budget.truncated
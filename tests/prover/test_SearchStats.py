@@ -0,0 +1,114 @@
+from __future__ import annotations
+import numpy as np
+from fuzzy_reasoner.prover.Goal import Goal
+from fuzzy_reasoner.prover.SLDProver import SLDProver
+from fuzzy_reasoner.prover.SearchHooks import PruneReason, SearchHooks, UnifyFailure
+from fuzzy_reasoner.prover.SearchStats import SearchStats
+from fuzzy_reasoner.similarity import cosine_similarity
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+X = Variable("X")
+Y = Variable("Y")
+Z = Variable("Z")
+father_of = Predicate("father_of", np.array([1.0, 0.0, 1.0]))
+dad_of = Predicate("dad_of", np.array([0.9, 0.1, 1.0]))
+cat_of = Predicate("cat_of", np.array([0.0, 1.0, 0.0]))
+grandpa_of = Predicate("grandpa_of")
+abe = Constant("abe")
+homer = Constant("homer")
+bart = Constant("bart")
+
+knowledge = [
+    Rule(father_of(abe, homer)),
+    Rule(father_of(homer, bart)),
+    Rule(cat_of(homer, Constant("snowball"))),
+    Rule(father_of(X), (cat_of(X, Y),)),
+    Rule(grandpa_of(X, Y), (dad_of(X, Z), father_of(Z, Y))),
+]
+
+
+def cosine_similarity_copy(
+    item1: Constant | Predicate, item2: Constant | Predicate
+) -> float:
+    return cosine_similarity(item1, item2)
+
+
+class RecordingHooks(SearchHooks):
+    def __init__(self) -> None:
+        self.events: list[tuple[str, str]] = []
+
+    def on_search_start(self, goal: Goal, max_depth: int) -> None:
+        self.events.append(("start", str(goal.statement)))
+
+    def on_search_end(self, goal: Goal) -> None:
+        self.events.append(("end", str(goal.statement)))
+
+    def on_goal_expanded(self, goal: Goal, depth: int) -> None:
+        self.events.append(("expand", str(goal.statement)))
+
+
+def test_search_stats_count_the_search() -> None:
+    for settings in [{}, {"binding_store": True}, {"fact_store": False}]:
+        prover = SLDProver(knowledge=knowledge, **settings)  # type: ignore
+        stats = SearchStats()
+        proofs = prover.prove_all(grandpa_of(abe, X), hooks=stats)
+        assert len(proofs) == 1
+        assert stats.searches == 1
+        assert stats.goals_expanded == 3
+        # both body goals of the grandpa_of rule are one level down
+        assert stats.expansions_by_depth == {0: 1, 1: 2}
+        assert stats.max_depth_reached == 1
+        assert stats.unify_successes == 3
+        assert stats.elapsed_time == sum(stats.time_by_depth.values())
+        assert stats.as_dict()["unify_successes"] == 3
+
+
+def test_search_stats_report_why_unification_failed() -> None:
+    # with a custom similarity func, every rule with the same arity is a candidate
+    prover = SLDProver(knowledge=knowledge, similarity_func=cosine_similarity_copy)
+    stats = SearchStats()
+    prover.prove_all(father_of(X, Constant("lisa")), hooks=stats)
+    assert stats.unify_failures == {
+        UnifyFailure.ARITY: 0,
+        UnifyFailure.PREDICATE: 2,
+        UnifyFailure.TERMS: 2,
+    }
+    assert stats.unify_attempts == 4
+    # each predicate and constant compared, which doesn't include diagnosing the failures
+    assert stats.similarity_calls == 6
+
+
+def test_search_stats_count_depth_pruning() -> None:
+    prover = SLDProver(knowledge=knowledge, max_proof_depth=0)
+    stats = SearchStats()
+    assert prover.prove_all(grandpa_of(abe, X), hooks=stats) == []
+    assert stats.pruned[PruneReason.DEPTH] > 0
+    assert prover.prove(grandpa_of(abe, X), hooks=stats) is None
+    assert stats.searches == 2
+
+
+def test_hooks_see_every_search_start_and_end() -> None:
+    prover = SLDProver(knowledge=knowledge)
+    hooks = RecordingHooks()
+    prover.prove_many([grandpa_of(abe, X), father_of(homer, X)], hooks=hooks)
+    assert hooks.events[0] == ("start", "grandpa_of(CONST:abe,VAR:X)")
+    assert hooks.events[-1] == ("end", "father_of(CONST:homer,VAR:X)")
+    assert [event for event, _goal in hooks.events].count("start") == 2
+    proofs = prover.iter_proofs(father_of(homer, X), hooks=hooks)
+    next(proofs)
+    proofs.close()
+    assert hooks.events[-1] == ("end", "father_of(CONST:homer,VAR:X)")
+
+
+def test_searches_without_hooks_are_unchanged() -> None:
+    prover = SLDProver(knowledge=knowledge)
+    stats = SearchStats()
+    with_hooks = prover.prove_all(grandpa_of(abe, X), hooks=stats)
+    without_hooks = prover.prove_all(grandpa_of(abe, X))
+    assert [str(proof) for proof in with_hooks] == [
+        str(proof) for proof in without_hooks
+    ]
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest  # type: ignore
+from fuzzy_reasoner.prover.EmbeddingMatrix import EmbeddingMatrix
+from fuzzy_reasoner.prover.SimilarityGraph import NOT_NEIGHBOURS, SimilarityGraph
+from fuzzy_reasoner.types.Constant import Constant
+
+
+rng = np.random.default_rng(0)
+constants = [Constant(f"c{i}", rng.normal(size=4)) for i in range(30)]
+
+
+def test_similarity_graph_agrees_with_the_embedding_matrix_above_its_threshold() -> None:
+    embeddings = EmbeddingMatrix(constants)
+    graph = SimilarityGraph(embeddings, 0.5)
+    assert len(graph) == 30
+    for constant1 in constants:
+        for constant2 in constants:
+            similarity = embeddings.similarity(constant1, constant2)
+            if similarity >= 0.5:
+                assert graph.similarity(constant1, constant2) == pytest.approx(
+                    similarity
+                )
+            else:
+                assert graph.similarity(constant1, constant2) == NOT_NEIGHBOURS
+    # symbols outside the graph are compared directly
+    outsider = Constant("outsider", constants[0].embedding)
+    assert graph.similarity(outsider, constants[0]) == pytest.approx(1.0)
+    assert graph.similarity(Constant("a"), Constant("a")) == 1.0
+
+
+def test_extending_the_graph_matches_building_it_from_scratch() -> None:
+    embeddings = EmbeddingMatrix(constants[:20])
+    graph = SimilarityGraph(embeddings, 0.3)
+    assert embeddings.add(constants) == list(range(20, 30))
+    graph.extend()
+    full_graph = SimilarityGraph(EmbeddingMatrix(constants), 0.3)
+    assert graph.num_edges == full_graph.num_edges
+    assert np.array_equal(graph.neighbours.indptr, full_graph.neighbours.indptr)
+    assert np.array_equal(graph.neighbours.indices, full_graph.neighbours.indices)
+    assert graph.neighbours.similarities == pytest.approx(
+        full_graph.neighbours.similarities
+    )
+
+
+def test_renumber_maps_the_graph_onto_a_reordered_matrix() -> None:
+    embeddings = EmbeddingMatrix(constants[:10])
+    graph = SimilarityGraph(embeddings, 0.3)
+    # the reordered matrix drops the first constant and has an extra one at the end
+    reordered = [*reversed(constants[1:10]), constants[10]]
+    rows = np.array([-1, *range(8, -1, -1)])
+    neighbours = graph.renumber(rows, EmbeddingMatrix(reordered))
+    expected = SimilarityGraph(EmbeddingMatrix(reordered), 0.3).neighbours
+    assert np.array_equal(neighbours.indptr, expected.indptr)
+    assert np.array_equal(neighbours.indices, expected.indices)
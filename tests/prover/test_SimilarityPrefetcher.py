@@ -0,0 +1,83 @@
+from __future__ import annotations
+import asyncio
+from typing import Sequence
+from fuzzy_reasoner.prover.SLDProver import SLDProver
+from fuzzy_reasoner.prover.SearchStats import SearchStats
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+X = Variable("X")
+Y = Variable("Y")
+Z = Variable("Z")
+grandpa_of = Predicate("grandpa_of")
+father_of = Predicate("father_of")
+dad_of = Predicate("dad_of")
+bart = Constant("bart")
+bartholomew = Constant("bartholomew")
+homer = Constant("homer")
+abe = Constant("abe")
+
+knowledge = [
+    Rule(father_of(homer, bart)),
+    Rule(dad_of(homer, bartholomew)),
+    Rule(father_of(abe, homer)),
+    Rule(grandpa_of(X, Y), (father_of(X, Z), father_of(Z, Y))),
+]
+
+known_similarities = {
+    frozenset(["father_of", "dad_of"]): 0.9,
+    frozenset(["bart", "bartholomew"]): 0.8,
+}
+
+
+def similarity(item1: Constant | Predicate, item2: Constant | Predicate) -> float:
+    if item1.symbol == item2.symbol:
+        return 1.0
+    return known_similarities.get(frozenset([item1.symbol, item2.symbol]), 0.0)
+
+
+def test_async_similarity_func_is_used_for_unification() -> None:
+    batches: list[list[tuple[Constant | Predicate, Constant | Predicate]]] = []
+
+    async def batch_similarity(
+        pairs: list[tuple[Constant | Predicate, Constant | Predicate]]
+    ) -> Sequence[float]:
+        batches.append(pairs)
+        await asyncio.sleep(0)
+        return [similarity(item1, item2) for item1, item2 in pairs]
+
+    # a custom similarity func means every predicate comparison goes through unification
+    prover = SLDProver(knowledge=knowledge, similarity_func=lambda a, b: 0.0)
+    stats = SearchStats()
+    proofs = asyncio.run(
+        prover.aprove_all(
+            grandpa_of(abe, bart), hooks=stats, similarity_func=batch_similarity
+        )
+    )
+    assert [proof.similarity_score for proof in proofs] == [1.0, 0.8]
+    assert proofs[1].head.children is not None
+    assert str(proofs[1].head.children[1].rule) == str(knowledge[1])
+
+    pairs = [pair for batch in batches for pair in batch]
+    assert len(batches) > 0
+    assert all(len(batch) > 0 for batch in batches)
+    # each pair is only ever scored once
+    assert len(set(pairs)) == len(pairs)
+    assert stats.similarity_calls > 0
+
+
+def test_async_similarity_func_matches_the_same_sync_similarity_func() -> None:
+    async def batch_similarity(
+        pairs: list[tuple[Constant | Predicate, Constant | Predicate]]
+    ) -> Sequence[float]:
+        return [similarity(item1, item2) for item1, item2 in pairs]
+
+    prover = SLDProver(knowledge=knowledge, similarity_func=similarity)
+    for goal in [grandpa_of(X, bart), grandpa_of(X, Y), dad_of(X, bart)]:
+        proofs = prover.prove_all(goal)
+        async_proofs = asyncio.run(
+            prover.aprove_all(goal, similarity_func=batch_similarity)
+        )
+        assert sorted(map(str, async_proofs)) == sorted(map(str, proofs))
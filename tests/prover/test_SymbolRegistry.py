@@ -0,0 +1,49 @@
+import pickle
+import numpy as np
+from fuzzy_reasoner.prover.SymbolRegistry import SymbolRegistry
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+X = Variable("X")
+Y = Variable("Y")
+homer = Constant("homer")
+bart = Constant("bart")
+father_of = Predicate("father_of", np.array([1.0, 0.0, 1.0]))
+parent_of = Predicate("parent_of")
+
+rules = [
+    Rule(father_of(homer, bart)),
+    Rule(parent_of(X, Y), (father_of(X, Y),)),
+]
+
+
+def test_registries_of_copied_rules_map_objects_back_to_the_originals() -> None:
+    registry = SymbolRegistry(rules)
+    copied_rules = pickle.loads(pickle.dumps(rules))
+    copied_registry = SymbolRegistry(copied_rules)
+    assert len(registry) == len(copied_registry)
+
+    payload = copied_registry.dumps((copied_rules[1], copied_rules[0].head.terms))
+    rule, terms = registry.loads(payload)
+    assert rule is rules[1]
+    assert terms[0] is homer
+    assert terms[1] is bart
+
+
+def test_child_registries_only_number_new_objects() -> None:
+    registry = SymbolRegistry(rules)
+    lisa = Constant("lisa")
+    goal = parent_of(X, lisa)
+    child = SymbolRegistry(parent=registry)
+    child.add_atom(goal)
+    assert len(child) == len(registry) + 2
+    assert child.get_id(X) == registry.get_id(X)
+    assert child.get_object(len(registry)) is goal
+    assert child.loads(child.dumps([goal, homer])) == [goal, homer]
+    # objects unknown to the registry are pickled by value
+    copied_goal = registry.loads(registry.dumps(goal))
+    assert copied_goal is not goal
+    assert copied_goal.predicate is parent_of
@@ -0,0 +1,63 @@
+import numpy as np
+from fuzzy_reasoner.prover.SLDProver import SLDProver
+from fuzzy_reasoner.prover.SymbolTable import SymbolTable
+from fuzzy_reasoner.types.Atom import Atom
+from fuzzy_reasoner.types.Constant import Constant
+from fuzzy_reasoner.types.Predicate import Predicate
+from fuzzy_reasoner.types.Rule import Rule
+from fuzzy_reasoner.types.Variable import Variable
+
+
+def test_interning_returns_one_shared_object_per_symbol() -> None:
+    symbols = SymbolTable()
+    bart = symbols.constant("bart")
+    assert symbols.constant("bart") is bart
+    assert symbols.intern(Constant("bart")) is bart
+    assert symbols.predicate("bart") is not bart
+    assert symbols.constants.get_id("bart") == 0
+    assert symbols.constants[0] is bart
+
+
+def test_interning_keeps_symbols_with_different_embeddings() -> None:
+    symbols = SymbolTable()
+    bart = symbols.constant("bart", np.array([1.0, 0.0]))
+    assert symbols.intern(Constant("bart", np.array([1.0, 0.0]))) is bart
+    other_bart = Constant("bart", np.array([0.0, 1.0]))
+    assert symbols.intern(other_bart) is other_bart
+    assert symbols.intern(Constant("bart")).embedding is None
+
+
+def test_embeddings_are_stored_in_shared_blocks() -> None:
+    symbols = SymbolTable(embedding_block_size=2)
+    items = [symbols.constant(f"c{i}", np.array([float(i), 1.0])) for i in range(5)]
+    matrix = symbols.embedding_matrix()
+    assert matrix.shape == (5, 2)
+    assert symbols.num_embeddings == 5
+    for row, item in enumerate(items):
+        assert symbols.constants.rows[row] == row
+        assert isinstance(item.embedding, np.ndarray)
+        assert np.array_equal(matrix[row], item.embedding)
+        assert item.embedding.base is not None
+
+
+def test_interned_knowledge_proves_the_same_goals() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    parent_of = Predicate("parent_of")
+    knowledge: list[Atom | Rule] = [
+        Rule(parent_of(Constant("homer"), Constant("bart"))),
+        Rule(parent_of(Constant("marge"), Constant("bart"))),
+        parent_of(Constant("homer"), Constant("lisa")),
+    ]
+    symbols = SymbolTable()
+    interned = symbols.intern_knowledge(knowledge)
+    assert len(symbols.constants) == 4
+    assert len(symbols.predicates) == 1
+    prover = SLDProver(knowledge=interned, symbols=symbols)
+    assert prover.rule_index.symbols is symbols
+    proofs = prover.prove_all(parent_of(X, symbols.constant("bart")))
+    assert {str(proof.variable_bindings[X]) for proof in proofs} == {
+        "CONST:homer",
+        "CONST:marge",
+    }
+    assert len(SLDProver(knowledge=knowledge).prove_all(parent_of(X, Y))) == 3
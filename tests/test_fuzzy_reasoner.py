@@ -70,3 +70,46 @@ def test_basic_proof() -> None:
     ).strip()
     print(proof.pretty_print())
     assert proof.pretty_print() == pretty_proof
+
+
+def test_proof_nodes_show_the_substitutions_from_when_their_goal_was_proven() -> None:
+    X = Variable("X")
+    Y = Variable("Y")
+    Z = Variable("Z")
+    p = Predicate("p")
+    q = Predicate("q")
+    r = Predicate("r")
+    c = Constant("c")
+
+    knowledge: Knowledge = [Rule(p(X), (q(X), r(X))), Rule(q(Y)), r(c)]
+
+    pretty_proof = dedent(
+        """
+        | goal: p(VAR:Z)
+        | rule: p(VAR:X):-[q(VAR:X), r(VAR:X)]
+        | unification similarity: 1.0
+        | overall similarity: 1.0
+        | goal subs: Z->c
+        | rule subs: X->c
+        | subgoals: q(VAR:X), r(VAR:X)
+          ║
+          ╠═ | goal: q(VAR:X)
+          ║  | rule: q(VAR:Y):-[]
+          ║  | unification similarity: 1.0
+          ║  | overall similarity: 1.0
+          ║
+          ╠═ | goal: r(VAR:X)
+          ║  | rule: r(CONST:c):-[]
+          ║  | unification similarity: 1.0
+          ║  | overall similarity: 1.0
+          ║  | goal subs: X->c
+        """
+    ).strip()
+    for settings in [{}, {"tabling": True}, {"iterative_deepening": True}]:
+        prover = SLDProver(knowledge=knowledge, **settings)  # type: ignore
+        proof = prover.prove(p(Z))
+        assert proof is not None
+        assert proof.pretty_print() == pretty_proof
+        assert [proof.pretty_print() for proof in prover.prove_all(p(Z))] == [
+            pretty_proof
+        ]
@@ -1,7 +1,11 @@
 import pytest  # type: ignore
 import numpy as np
 
-from fuzzy_reasoner.similarity import cosine_similarity, symbol_compare
+from fuzzy_reasoner.similarity import (
+    SimilarityCache,
+    cosine_similarity,
+    symbol_compare,
+)
 from fuzzy_reasoner.types.Constant import Constant
 
 
@@ -32,3 +36,47 @@ def test_symbol_compare_compares_symbols_directly() -> None:
         Constant("same", np.array([1, 0, 1])),
         Constant("same", np.array([0, 1, 1])),
     ) == pytest.approx(1.0)
+
+
+def test_similarity_cache_memoizes_calls_and_tracks_hits_and_misses() -> None:
+    calls = []
+
+    def similarity_func(item1: Constant, item2: Constant) -> float:
+        calls.append((item1, item2))
+        return 0.7
+
+    cache = SimilarityCache(similarity_func, maxsize=10)  # type: ignore
+    a = Constant("a")
+    b = Constant("b")
+    assert cache(a, b) == 0.7
+    assert cache(a, b) == 0.7
+    assert cache(b, a) == 0.7
+    assert calls == [(a, b), (b, a)]
+    assert cache.cache_info() == (1, 2, 10, 2)
+
+    cache.cache_clear()
+    assert cache.cache_info() == (0, 0, 10, 0)
+
+
+def test_similarity_cache_evicts_least_recently_used_entries() -> None:
+    cache = SimilarityCache(symbol_compare, maxsize=2)
+    a = Constant("a")
+    b = Constant("b")
+    c = Constant("c")
+    cache(a, a)
+    cache(b, b)
+    cache(a, a)
+    cache(c, c)
+    assert cache.cache_info().currsize == 2
+    cache(a, a)
+    assert cache.cache_info().hits == 2
+    cache(b, b)
+    assert cache.cache_info().misses == 4
+
+
+def test_similarity_cache_keeps_constants_with_the_same_symbol_separate() -> None:
+    cache = SimilarityCache(cosine_similarity)
+    a1 = Constant("a", np.array([1, 0]))
+    a2 = Constant("a", np.array([0, 1]))
+    assert cache(a1, a1) == pytest.approx(1.0)
+    assert cache(a1, a2) == pytest.approx(0.0)
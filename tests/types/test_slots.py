@@ -0,0 +1,39 @@
+import pickle
+import weakref
+from dataclasses import FrozenInstanceError
+import numpy as np
+import pytest  # type: ignore
+from fuzzy_reasoner.types import Atom, Constant, Predicate, Rule, Variable
+
+
+def test_terms_use_slots_instead_of_a_dict() -> None:
+    X = Variable("X")
+    bart = Constant("bart")
+    is_male = Predicate("is_male", np.array([1.0, 0.0]))
+    for item in [X, bart, is_male, is_male(bart), Rule(is_male(X))]:
+        assert not hasattr(item, "__dict__")
+    assert Constant("bart").embedding is None
+    assert Rule(is_male(bart)).body is None
+
+
+def test_slotted_terms_are_still_frozen() -> None:
+    bart = Constant("bart")
+    with pytest.raises(FrozenInstanceError):
+        bart.symbol = "lisa"  # type: ignore
+
+
+def test_slotted_terms_can_be_pickled() -> None:
+    bart = Constant("bart", np.array([1.0, 0.0]))
+    atom = Atom(Predicate("is_male"), (bart, Variable("X")))
+    copy = pickle.loads(pickle.dumps(Rule(atom)))
+    assert str(copy) == str(Rule(atom))
+    copied_bart = copy.head.terms[0]
+    assert isinstance(copied_bart, Constant)
+    assert np.array_equal(np.array([1.0, 0.0]), copied_bart.embedding)  # type: ignore
+
+
+def test_slotted_terms_can_be_weakly_referenced() -> None:
+    bart = Constant("bart")
+    is_male = Predicate("is_male", np.array([1.0, 0.0]))
+    for item in [Variable("X"), bart, is_male, is_male(bart), Rule(is_male(bart))]:
+        assert weakref.ref(item)() is item